@@ -1,10 +1,26 @@
-from typing import Dict, Any, List
-from langgraph.graph import StateGraph, START, END
-import json
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from typing_extensions import TypedDict
-from datetime import datetime
+from datetime import date, datetime
 import os
+import sys
+import time
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from registry import get_compiled_agent
+from history import HistoryStore
+import events
+from instrumentation import Instrumentation
+from rules import RuleSet
+from core import (REQUIRED_FIELDS, HISTORY_REQUIRED_FIELDS, CAC_ALERT_THRESHOLD, REVENUE_GROWTH_THRESHOLD,
+                  REVENUE_DECLINE_THRESHOLD, COST_INCREASE_THRESHOLD, ALERT_NEGATIVE_PROFIT, ALERT_CAC_INCREASE,
+                  ALERT_REVENUE_DECLINE, ALERT_COST_INCREASE, REC_REDUCE_COSTS, REC_MAINTAIN_OPERATIONS,
+                  REC_REVIEW_MARKETING, REC_INCREASE_ADVERTISING, REC_INVESTIGATE_MARKET, REC_OPTIMIZE_COSTS,
+                  REC_SCALE_OPERATIONS, DEFAULT_RULE_SPECS, DEFAULT_RULES, OUTPUT_PROFILES, calculate_metrics)
+from cache import AnalysisCache
+from anomaly import AnomalyDetector
+from schema import CURRENT_DAY_SCHEMA, DEFAULT_SCHEMA
+from persistence import ResultsLog, write_json_atomic
 
 class BusinessState(TypedDict):
     """State schema for business data analysis"""
@@ -16,89 +32,95 @@ class BusinessState(TypedDict):
 
 def input_node(state: BusinessState) -> BusinessState:
     """Process input business data"""
-    data = state.get("input_data", {})
-    
-    # Validate required fields
-    required_fields = ["daily_revenue", "daily_cost", "number_of_customers", 
-                      "previous_day_revenue", "previous_day_cost", "previous_day_customers"]
-    
-    for field in required_fields:
-        if field not in data:
-            raise ValueError(f"Missing required field: {field}")
-    
-    print(f"✅ Input data validated: {json.dumps(data, indent=2)}")
+    # Types, missing values, NaN and negatives; numeric strings are parsed into a copy of the caller's dict
+    data = dict(state.get("input_data", {}))
+    error = DEFAULT_SCHEMA.check(data)
+    if error is not None:
+        raise ValueError(error)
+    state["input_data"] = data
+    
+    if events.is_enabled(events.DEBUG):
+        events.emit("payload", events.DEBUG, node="input", data=data)
     return state
 
 def processing_node(state: BusinessState) -> BusinessState:
     """Calculate key business metrics"""
-    data = state["input_data"]
-    
-    # Calculate current day metrics
-    daily_profit = data["daily_revenue"] - data["daily_cost"]
-    current_cac = data["daily_cost"] / data["number_of_customers"] if data["number_of_customers"] > 0 else 0
-    
-    # Calculate previous day metrics for comparison
-    prev_profit = data["previous_day_revenue"] - data["previous_day_cost"]
-    prev_cac = data["previous_day_cost"] / data["previous_day_customers"] if data["previous_day_customers"] > 0 else 0
-    
-    # Calculate percentage changes
-    revenue_change = ((data["daily_revenue"] - data["previous_day_revenue"]) / data["previous_day_revenue"] * 100) if data["previous_day_revenue"] > 0 else 0
-    cost_change = ((data["daily_cost"] - data["previous_day_cost"]) / data["previous_day_cost"] * 100) if data["previous_day_cost"] > 0 else 0
-    cac_change = ((current_cac - prev_cac) / prev_cac * 100) if prev_cac > 0 else 0
-    
-    metrics = {
-        "daily_profit": daily_profit,
-        "current_cac": current_cac,
-        "previous_cac": prev_cac,
-        "revenue_change_percent": revenue_change,
-        "cost_change_percent": cost_change,
-        "cac_change_percent": cac_change,
-        "profit_status": "positive" if daily_profit > 0 else "negative"
-    }
+    metrics = calculate_metrics(state["input_data"])
     
     state["metrics"] = metrics
-    print(f"📊 Metrics calculated: {json.dumps(metrics, indent=2)}")
+    if events.is_enabled(events.DEBUG):
+        events.emit("payload", events.DEBUG, node="processing", data=metrics)
     return state
 
-def recommendation_node(state: BusinessState) -> BusinessState:
-    """Generate recommendations based on metrics"""
-    metrics = state["metrics"]
-    alerts = []
-    recommendations = []
-    
-    # Profit/Loss Analysis
-    if metrics["daily_profit"] < 0:
-        alerts.append("⚠️ Daily profit is negative")
-        recommendations.append("Reduce operational costs to improve profitability")
-    else:
-        recommendations.append("✅ Maintain current profitable operations")
+def history_input_node(state: BusinessState) -> BusinessState:
+    """Validate a single-day record whose comparison data comes from the history store"""
+    data = state.get("input_data", {})
     
-    # CAC Analysis
-    if metrics["cac_change_percent"] > 20:
-        alerts.append(f"🚨 CAC increased by {metrics['cac_change_percent']:.1f}% (>20% threshold)")
-        recommendations.append("Review marketing campaigns and optimize customer acquisition strategies")
+    for field in HISTORY_REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f"Missing required field: {field}")
     
-    # Revenue Growth Analysis
-    if metrics["revenue_change_percent"] > 10:
-        recommendations.append("📈 Strong revenue growth detected - consider increasing advertising budget")
-    elif metrics["revenue_change_percent"] < -10:
-        alerts.append("📉 Revenue declined significantly")
-        recommendations.append("Investigate market conditions and adjust sales strategy")
+    # Same value checks as input_node for today's numbers; parsed into a copy of the caller's dict
+    data = dict(data)
+    error = CURRENT_DAY_SCHEMA.check(data)
+    if error is not None:
+        raise ValueError(error)
+    state["input_data"] = data
     
-    # Cost Management
-    if metrics["cost_change_percent"] > 15:
-        alerts.append("💰 Costs increased significantly")
-        recommendations.append("Review and optimize cost structure")
+    if events.is_enabled(events.DEBUG):
+        events.emit("payload", events.DEBUG, node="input", data=data)
+    return state
+
+def make_history_processing_node(history: HistoryStore):
+    """Build a processing node that appends each record to `history` and reads comparisons from it"""
+    def history_processing_node(state: BusinessState) -> BusinessState:
+        """Calculate day-over-day, week-over-week and rolling metrics from the history store"""
+        data = state["input_data"]
+        comparison = history.append(data["entity_id"], data["date"], data["daily_revenue"],
+                                    data["daily_cost"], data["number_of_customers"])
+        trends = comparison.pop("trends")
+        
+        # Keep the caller's dict untouched; the output echoes the filled-in comparison fields
+        data = {**data, **comparison}
+        metrics = calculate_metrics(data)
+        metrics["trends"] = trends
+        
+        state["input_data"] = data
+        state["metrics"] = metrics
+        if events.is_enabled(events.DEBUG):
+            events.emit("payload", events.DEBUG, node="processing", data=metrics)
+        return state
     
-    # Combined Analysis
-    if metrics["revenue_change_percent"] > 0 and metrics["daily_profit"] > 0:
-        recommendations.append("🎯 Business is growing profitably - consider scaling operations")
+    return history_processing_node
+
+def make_recommendation_node(rules: RuleSet):
+    """Build a recommendation node that evaluates a compiled rule set"""
+    def recommendation_node(state: BusinessState) -> BusinessState:
+        """Generate recommendations based on metrics"""
+        alerts, recommendations = rules.evaluate(state["metrics"])
+        
+        state["alerts"] = alerts
+        state["recommendations"] = recommendations
+        return state
     
-    state["alerts"] = alerts
-    state["recommendations"] = recommendations
+    return recommendation_node
+
+recommendation_node = make_recommendation_node(DEFAULT_RULES)
+
+def make_anomaly_node(detector: AnomalyDetector):
+    """Build a node that scores each record against its entity's running statistics"""
+    def anomaly_node(state: BusinessState) -> BusinessState:
+        """Flag revenue, cost and CAC values that are outliers for the entity"""
+        data = state["input_data"]
+        metrics = state["metrics"]
+        result = detector.observe(data.get("entity_id", "default"), data["daily_revenue"], data["daily_cost"],
+                                  metrics["current_cac"])
+        
+        metrics["anomalies"] = result
+        state["alerts"] = state["alerts"] + detector.alerts(result)
+        return state
     
-    print(f"💡 Generated {len(alerts)} alerts and {len(recommendations)} recommendations")
-    return state
+    return anomaly_node
 
 def output_node(state: BusinessState) -> BusinessState:
     """Format final output"""
@@ -116,7 +138,7 @@ def output_node(state: BusinessState) -> BusinessState:
             "current_cac": round(metrics["current_cac"], 2),
             "previous_cac": round(metrics["previous_cac"], 2),
             "cac_change_percent": round(metrics["cac_change_percent"], 2),
-            "cac_alert": metrics["cac_change_percent"] > 20
+            "cac_alert": metrics["cac_change_percent"] > CAC_ALERT_THRESHOLD
         },
         "alerts": state["alerts"],
         "recommendations": state["recommendations"],
@@ -129,57 +151,235 @@ def output_node(state: BusinessState) -> BusinessState:
         "input_data": state["input_data"]
     }
     
+    if "trends" in metrics:
+        output["trends"] = metrics["trends"]
+    if "anomalies" in metrics:
+        output["anomalies"] = metrics["anomalies"]
+    
     state["output"] = output
-    print("📋 Final output generated")
     return state
 
-def create_business_agent():
-    """Create the LangGraph business intelligence agent"""
+def minimal_output_node(state: BusinessState) -> BusinessState:
+    """Format the lightweight output: no timestamp, previous CAC, version, input echo or extras"""
+    metrics = state["metrics"]
+    alerts = state["alerts"]
+    recommendations = state["recommendations"]
+    
+    state["output"] = {
+        "profit_loss_status": {
+            "daily_profit": metrics["daily_profit"],
+            "status": metrics["profit_status"],
+            "revenue_change_percent": round(metrics["revenue_change_percent"], 2),
+            "cost_change_percent": round(metrics["cost_change_percent"], 2)
+        },
+        "customer_acquisition": {
+            "current_cac": round(metrics["current_cac"], 2),
+            "cac_change_percent": round(metrics["cac_change_percent"], 2),
+            "cac_alert": metrics["cac_change_percent"] > CAC_ALERT_THRESHOLD
+        },
+        "alerts": alerts,
+        "recommendations": recommendations,
+        "summary": {
+            "total_alerts": len(alerts),
+            "total_recommendations": len(recommendations),
+            "analysis_date": date.today().isoformat()
+        }
+    }
+    return state
+
+# Output node per profile; every profile shares the same input, metric and rule nodes
+_OUTPUT_NODES = {"full": output_node, "minimal": minimal_output_node}
+
+def chain_nodes(nodes: List[Callable[[BusinessState], BusinessState]]) -> Callable[[BusinessState], BusinessState]:
+    """Run several nodes in order as one graph node"""
+    def analysis_node(state: BusinessState) -> BusinessState:
+        """Validate, compute metrics, evaluate rules and format the output in one step"""
+        for node in nodes:
+            state = node(state)
+        return state
+    
+    return analysis_node
+
+def as_async_node(node: Callable[[BusinessState], BusinessState]) -> Callable[[BusinessState], Awaitable[BusinessState]]:
+    """Wrap a synchronous node as a coroutine
+    
+    The nodes are short CPU-bound functions, so running them inline on the event loop is
+    cheaper than the executor hop LangGraph uses for sync nodes under `ainvoke`.
+    """
+    async def async_node(state: BusinessState) -> BusinessState:
+        return node(state)
+    
+    async_node.__name__ = f"async_{getattr(node, '__name__', 'node')}"
+    async_node.__doc__ = node.__doc__
+    return async_node
+
+def create_business_agent(history: Optional[HistoryStore] = None, async_nodes: bool = False,
+                          instrumentation: Optional[Instrumentation] = None, rules: Optional[RuleSet] = None,
+                          compact: bool = False, locale: Optional[str] = None,
+                          anomaly_detector: Optional[AnomalyDetector] = None, profile: str = "full"):
+    """Create the LangGraph business intelligence agent
+    
+    With a `history` store, records only carry entity_id, date and today's values;
+    previous-day, week-over-week and rolling metrics are read from the store.
+    With `async_nodes`, every node is a coroutine and the graph must be run with `ainvoke`.
+    With `instrumentation`, every node's wall time is recorded into it.
+    With `rules`, recommendations come from that rule set instead of the built-in thresholds.
+    With `compact`, metrics travel as a slotted object and alerts as a fired-rules bitmask that
+    is only rendered (in `locale`, default English) by the output node; input_data is not copied.
+    With an `anomaly_detector`, an anomaly stage after the recommendations flags values that
+    are outliers for the record's entity_id (records without one share the "default" entity).
+    `profile` picks the output shape: "full", or "minimal" (what simple_agent returns), which
+    skips building the timestamp, previous CAC, version and input echo altogether and runs
+    the same steps as one "analysis" graph node; each step still reports its own events
+    and timings under its usual name.
+    """
+    
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output profile: {profile} (expected one of {OUTPUT_PROFILES})")
+    if compact:
+        if history is not None or anomaly_detector is not None:
+            raise ValueError("Compact mode does not support history-backed analysis or anomaly detection")
+        if profile != "full":
+            raise ValueError("Compact mode only renders the full output profile")
+        from compact import CompactState, compact_nodes
+        nodes = compact_nodes(rules, locale or "en")
+        schema = CompactState
+    else:
+        if locale is not None:
+            raise ValueError("Localized output needs compact=True")
+        if history is None:
+            nodes = {"input": input_node, "processing": processing_node}
+        else:
+            nodes = {"input": history_input_node, "processing": make_history_processing_node(history)}
+        nodes["recommendation"] = recommendation_node if rules is None else make_recommendation_node(rules)
+        if anomaly_detector is not None:
+            nodes["anomaly"] = make_anomaly_node(anomaly_detector)
+        nodes["output"] = _OUTPUT_NODES[profile]
+        schema = BusinessState
+    
+    # Every step reports events and timings under its own name, even when chained below
+    for name, node in nodes.items():
+        node = events.observed_node(name, node)
+        if instrumentation is not None:
+            node = instrumentation.wrap(name, node)
+        nodes[name] = node
+    if profile == "minimal":
+        # Graph dispatch costs far more per node than the node bodies, and the minimal
+        # profile emits none of the intermediate state, so the steps run as a single graph node
+        nodes = {"analysis": chain_nodes(list(nodes.values()))}
+    
+    # LangGraph is only imported once a graph is actually built, so the metric math,
+    # rules and batch paths start without it
+    from langgraph.graph import StateGraph, START, END
     
     # Create state graph
-    workflow = StateGraph(BusinessState)
+    workflow = StateGraph(schema)
     
     # Add nodes
-    workflow.add_node("input", input_node)
-    workflow.add_node("processing", processing_node) 
-    workflow.add_node("recommendation", recommendation_node)
-    workflow.add_node("output", output_node)
-    
-    # Define edges (flow)
-    workflow.add_edge(START, "input")
-    workflow.add_edge("input", "processing")
-    workflow.add_edge("processing", "recommendation")
-    workflow.add_edge("recommendation", "output")
-    workflow.add_edge("output", END)
+    for name, node in nodes.items():
+        workflow.add_node(name, as_async_node(node) if async_nodes else node)
+    
+    # Define edges (flow): the nodes run in order
+    names = list(nodes)
+    workflow.add_edge(START, names[0])
+    for source, target in zip(names, names[1:]):
+        workflow.add_edge(source, target)
+    workflow.add_edge(names[-1], END)
     
     # Compile the graph
     agent = workflow.compile()
     return agent
 
-def save_to_json(data: Dict[str, Any], filename: str = "langgraph.json") -> None:
-    """Save analysis results to JSON file"""
+def save_to_json(data: Dict[str, Any], filename: str = "langgraph.json", pretty: bool = True) -> None:
+    """Save analysis results to JSON file (atomically; errors are reported and re-raised)"""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Results saved to {filename}")
+        write_json_atomic(data, filename, pretty=pretty)
+        events.emit("results_saved", path=filename)
     except Exception as e:
-        print(f"❌ Error saving to {filename}: {e}")
+        events.emit("save_failed", events.ERROR, path=filename, error=str(e))
+        raise
 
-def run_business_analysis(input_data: Dict[str, Any], save_to_file: bool = True) -> Dict[str, Any]:
-    """Run the business analysis agent"""
-    agent = create_business_agent()
-    
-    initial_state = BusinessState(
+def _agent_config(**options: Any) -> Dict[str, Any]:
+    """Graph build options that are actually set, so defaults share one registry entry"""
+    return {key: value for key, value in options.items() if value is not None and value is not False}
+
+def get_business_agent(**config: Any):
+    """Return the process-wide compiled business agent for a config (compiled once, then reused)
+    
+    Takes the options of create_business_agent (e.g. `profile`, `rules`); options left at
+    their defaults share one compiled graph.
+    """
+    if config.get("profile") == "full":
+        config.pop("profile")
+    return get_compiled_agent("full", create_business_agent, **_agent_config(**config))
+
+def initial_state(input_data: Dict[str, Any], compact: bool = False) -> BusinessState:
+    """Empty pipeline state for one input record, as passed to the agent's invoke"""
+    if compact:
+        return {"input_data": input_data, "metrics": None, "fired": 0, "output": {}}
+    return BusinessState(
         input_data=input_data,
         metrics={},
         alerts=[],
         recommendations=[],
         output={}
     )
-    
-    print("🚀 Starting business analysis...")
-    result = agent.invoke(initial_state)
-    print("✅ Analysis completed!")
+
+def run_business_analysis(input_data: Dict[str, Any], save_to_file: bool = True, reuse_agent: bool = True,
+                          history: Optional[HistoryStore] = None,
+                          instrumentation: Optional[Instrumentation] = None,
+                          rules: Optional[RuleSet] = None, cache: Optional[AnalysisCache] = None,
+                          compact: bool = False, locale: Optional[str] = None,
+                          anomaly_detector: Optional[AnomalyDetector] = None,
+                          profile: str = "full") -> Dict[str, Any]:
+    """Run the business analysis agent
+    
+    Pass a `history` store to analyze single-day records (entity_id, date, today's values)
+    against the entity's stored history instead of explicit previous_day_* fields, an
+    `instrumentation` object to collect per-node timings, a compiled `rules` set to
+    replace the built-in alert thresholds, and an `AnalysisCache` to reuse the output of
+    identical inputs. With `compact`, the pipeline runs on the compact state representation
+    and the output omits input_data; `locale` picks the message language ("en" or "fa").
+    An `anomaly_detector` adds z-score outlier alerts per entity_id. `profile="minimal"`
+    returns the lightweight output of simple_agent.
+    """
+    config = _agent_config(history=history, instrumentation=instrumentation, rules=rules,
+                           compact=compact, locale=locale, anomaly_detector=anomaly_detector,
+                           profile=profile if profile != "full" else None)
+    
+    cache_key = None
+    if cache is not None:
+        if history is not None or anomaly_detector is not None:
+            raise ValueError("History-backed and anomaly-scored analyses depend on stored state and cannot be cached")
+        variant = rules.fingerprint if rules is not None else ""
+        if compact:
+            variant += f":compact:{locale or 'en'}"
+        if profile != "full":
+            variant += f":{profile}"
+        # Keyed by the parsed record, as input_node would see it
+        input_data = dict(input_data)
+        error = DEFAULT_SCHEMA.check(input_data)
+        if error is not None:
+            raise ValueError(error)
+        cache_key = cache.key(input_data, variant=variant)
+        output = cache.get(cache_key, input_data)
+        if output is not None:
+            events.emit("analysis_cached", events.DEBUG, key=cache_key)
+            if save_to_file:
+                save_to_json(output, "langgraph.json")
+            return output
+    
+    agent = get_business_agent(**config) if reuse_agent else create_business_agent(**config)
+    
+    state = initial_state(input_data, compact)
+    
+    events.emit("analysis_started")
+    start = time.perf_counter()
+    result = agent.invoke(state)
+    events.emit("analysis_completed", duration_ms=(time.perf_counter() - start) * 1000)
+    
+    if cache_key is not None:
+        cache.put(cache_key, result["output"])
     
     # Save to JSON file if requested
     if save_to_file:
@@ -187,99 +387,159 @@ def run_business_analysis(input_data: Dict[str, Any], save_to_file: bool = True)
     
     return result["output"]
 
-def run_multiple_scenarios():
-    """Run analysis on multiple business scenarios and save each to separate files"""
-    
-    scenarios = {
-        "profitable_growth": {
-            "daily_revenue": 8000,
-            "daily_cost": 5000,
-            "number_of_customers": 80,
-            "previous_day_revenue": 7000,
-            "previous_day_cost": 4500,
-            "previous_day_customers": 75
-        },
-        "loss_scenario": {
-            "daily_revenue": 3000,
-            "daily_cost": 4500,
-            "number_of_customers": 30,
-            "previous_day_revenue": 4000,
-            "previous_day_cost": 3500,
-            "previous_day_customers": 40
-        },
-        "high_cac_alert": {
-            "daily_revenue": 6000,
-            "daily_cost": 5000,
-            "number_of_customers": 25,  # Low customers = high CAC
-            "previous_day_revenue": 6000,
-            "previous_day_cost": 3000,
-            "previous_day_customers": 60  # Much higher customers before
-        }
-    }
+async def arun_business_analysis(input_data: Dict[str, Any], save_to_file: bool = True,
+                                 history: Optional[HistoryStore] = None,
+                                 instrumentation: Optional[Instrumentation] = None,
+                                 rules: Optional[RuleSet] = None) -> Dict[str, Any]:
+    """Run the business analysis agent on the event loop via the graph's async invocation"""
+    config = _agent_config(async_nodes=True, history=history, instrumentation=instrumentation, rules=rules)
+    agent = get_business_agent(**config)
     
-    print("🎯 Running multiple business scenarios...")
+    result = await agent.ainvoke(initial_state(input_data))
+    
+    # File writes go to a worker thread so the event loop keeps serving other analyses
+    if save_to_file:
+        await asyncio.to_thread(save_to_json, result["output"], "langgraph.json")
+    
+    return result["output"]
+
+async def arun_business_analysis_batch(records: Iterable[Dict[str, Any]], concurrency: int = 64,
+                                       history: Optional[HistoryStore] = None,
+                                       instrumentation: Optional[Instrumentation] = None,
+                                       return_exceptions: bool = False) -> List[Any]:
+    """Analyze many records concurrently on one event loop, at most `concurrency` at a time
+    
+    Results are returned in input order. With `return_exceptions`, a failing record yields
+    its exception instead of cancelling the whole batch. When sharing a `history` store,
+    records of the same entity should be submitted in separate, date-ordered batches.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def analyze(record: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await arun_business_analysis(record, save_to_file=False, history=history,
+                                                instrumentation=instrumentation)
+    
+    return await asyncio.gather(*(analyze(record) for record in records), return_exceptions=return_exceptions)
+
+# Built-in what-if scenarios used by run_multiple_scenarios
+DEFAULT_SCENARIOS = {
+    "profitable_growth": {
+        "daily_revenue": 8000,
+        "daily_cost": 5000,
+        "number_of_customers": 80,
+        "previous_day_revenue": 7000,
+        "previous_day_cost": 4500,
+        "previous_day_customers": 75
+    },
+    "loss_scenario": {
+        "daily_revenue": 3000,
+        "daily_cost": 4500,
+        "number_of_customers": 30,
+        "previous_day_revenue": 4000,
+        "previous_day_cost": 3500,
+        "previous_day_customers": 40
+    },
+    "high_cac_alert": {
+        "daily_revenue": 6000,
+        "daily_cost": 5000,
+        "number_of_customers": 25,  # Low customers = high CAC
+        "previous_day_revenue": 6000,
+        "previous_day_cost": 3000,
+        "previous_day_customers": 60  # Much higher customers before
+    }
+}
+
+def _analyze_scenario(item: Tuple[str, Dict[str, Any]]) -> Tuple[str, Dict[str, Any], float]:
+    """Analyze one named scenario and time it (module-level so process pools can pickle it)"""
+    scenario_name, data = item
+    start = time.perf_counter()
+    result = run_business_analysis(data, save_to_file=False)
+    return scenario_name, result, (time.perf_counter() - start) * 1000
+
+def _scenario_executor(backend: str, workers: int) -> Executor:
+    """Create the pool used to run scenarios in parallel"""
+    if backend == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown backend: {backend} (expected 'thread' or 'process')")
+
+def run_multiple_scenarios(scenarios: Optional[Dict[str, Dict[str, Any]]] = None, workers: int = 1,
+                           backend: str = "thread", per_scenario_files: bool = True,
+                           results_log: Optional[str] = None,
+                           combined_file: Optional[str] = "langgraph_combined.json") -> Dict[str, Any]:
+    """Run analysis on multiple business scenarios and save each to separate files
+    
+    With `workers` > 1 (or None for one per CPU) scenarios run on a thread or process
+    pool; results keep the order of `scenarios` regardless of completion order.
+    For bulk sweeps, turn off `per_scenario_files` and/or append every result to a
+    `results_log` (JSONL, or msgpack for .msgpack paths) instead. Pass
+    `combined_file=None` to only return the combined results.
+    """
+    
+    scenarios = DEFAULT_SCENARIOS if scenarios is None else scenarios
+    workers = workers or os.cpu_count() or 1
+    
+    events.emit("scenarios_started", total=len(scenarios), message="🎯 Running multiple business scenarios...")
     results = {}
+    timings = {}
+    start = time.perf_counter()
     
-    for scenario_name, data in scenarios.items():
-        print(f"\n📊 Analyzing scenario: {scenario_name}")
-        result = run_business_analysis(data, save_to_file=False)
-        results[scenario_name] = result
-        
-        # Save individual scenario result
-        filename = f"langgraph_{scenario_name}.json"
-        save_to_json(result, filename)
+    if workers == 1:
+        outcomes = map(_analyze_scenario, scenarios.items())
+        executor = None
+    else:
+        executor = _scenario_executor(backend, workers)
+        # Batch items per task so process pools don't pay one IPC round-trip per scenario
+        chunksize = max(1, len(scenarios) // (workers * 4)) if backend == "process" else 1
+        outcomes = executor.map(_analyze_scenario, scenarios.items(), chunksize=chunksize)
+    
+    log = ResultsLog(results_log) if results_log else None
+    try:
+        # map() yields in submission order, so the combined output is deterministic
+        for scenario_name, result, elapsed_ms in outcomes:
+            events.emit("scenario_completed", scenario=scenario_name, duration_ms=elapsed_ms,
+                        message=f"\n📊 Analyzed scenario: {scenario_name} ({elapsed_ms:.1f} ms)")
+            results[scenario_name] = result
+            timings[scenario_name] = round(elapsed_ms, 3)
+            
+            if log is not None:
+                log.write({"scenario": scenario_name, "result": result})
+            
+            # Save individual scenario result
+            if per_scenario_files:
+                save_to_json(result, f"langgraph_{scenario_name}.json")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if log is not None:
+            log.close()
     
     # Save combined results
     combined_results = {
         "analysis_summary": {
             "total_scenarios": len(scenarios),
             "analysis_timestamp": datetime.now().isoformat(),
-            "scenarios_analyzed": list(scenarios.keys())
+            "scenarios_analyzed": list(scenarios.keys()),
+            "workers": workers,
+            "backend": backend if workers > 1 else "serial",
+            "total_elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+            "scenario_timings_ms": timings
         },
         "results": results
     }
     
-    save_to_json(combined_results, "langgraph_combined.json")
-    print("\n🎉 All scenarios analyzed and saved!")
+    # Large sweeps are not meant to be read by humans; skip pretty-printing them
+    if combined_file:
+        save_to_json(combined_results, combined_file, pretty=per_scenario_files)
+    events.emit("scenarios_completed", total=len(scenarios), message="\n🎉 All scenarios analyzed and saved!")
     
     return combined_results
 
-# Example usage
 if __name__ == "__main__":
-    # Single analysis example
-    print("=" * 60)
-    print("🏢 BUSINESS INTELLIGENCE AGENT - LANGGRAPH")
-    print("=" * 60)
-    
-    sample_data = {
-        "daily_revenue": 5000,
-        "daily_cost": 3000,
-        "number_of_customers": 50,
-        "previous_day_revenue": 4500,
-        "previous_day_cost": 2500,
-        "previous_day_customers": 45
-    }
-    
-    # Run single analysis
-    result = run_business_analysis(sample_data)
-    
-    print("\n📊 BUSINESS ANALYSIS REPORT:")
-    print("=" * 50)
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-    
-    # Ask user if they want to run multiple scenarios
-    print("\n" + "=" * 60)
-    user_input = input("🤔 Would you like to run multiple scenarios? (y/n): ")
-    
-    if user_input.lower() in ['y', 'yes']:
-        combined_results = run_multiple_scenarios()
-        print("\n📁 Files created:")
-        print("- langgraph.json (main analysis)")
-        print("- langgraph_profitable_growth.json")
-        print("- langgraph_loss_scenario.json") 
-        print("- langgraph_high_cac_alert.json")
-        print("- langgraph_combined.json (all scenarios)")
-    else:
-        print("📁 Main analysis saved to: langgraph.json")
-    
-    print("\n✨ Analysis complete! Check the JSON files for detailed results.")
+    # python agent.py [analyze|stream|scenarios|serve] ...; see cli.py
+    from cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
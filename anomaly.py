@@ -0,0 +1,191 @@
+from typing import Dict, Any, Hashable, List, Optional, Sequence
+import os
+import threading
+import numpy as np
+
+# Streams scored per entity, in column order
+SERIES = ("revenue", "cost", "cac")
+
+# Alert text per stream; {z} is the signed z-score
+ANOMALY_ALERTS = {
+    "revenue": "🔍 Revenue is unusual for this entity (z={z:+.1f})",
+    "cost": "🔍 Costs are unusual for this entity (z={z:+.1f})",
+    "cac": "🔍 CAC is unusual for this entity (z={z:+.1f})",
+}
+
+class AnomalyDetector:
+    """Per-entity streaming mean/variance of revenue, cost and CAC with z-score outlier flags
+
+    With `alpha`, the estimates are exponentially weighted (EWMA mean and variance) and
+    follow slow drift; with `alpha=None` every observation weighs the same (Welford's
+    running variance). Each value is scored against the statistics *before* it is folded
+    in. Memory is one fixed-size row per entity, and the whole state can be snapshotted
+    to a small .npz file and loaded after a restart.
+    """
+
+    def __init__(self, alpha: Optional[float] = 0.1, threshold: float = 3.0, warmup: int = 7,
+                 initial_entities: int = 1024):
+        if alpha is not None and not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1 (or None for equal weights)")
+        if threshold <= 0:
+            raise ValueError("threshold must be positive")
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        capacity = max(1, initial_entities)
+        self._index: Dict[str, int] = {}
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._means = np.zeros((capacity, len(SERIES)), dtype=np.float64)
+        self._variances = np.zeros((capacity, len(SERIES)), dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, entity_id: Hashable) -> bool:
+        return str(entity_id) in self._index
+
+    def _grow(self, needed: int) -> None:
+        """Grow the backing arrays (doubling) until they hold `needed` entities"""
+        capacity = len(self._counts)
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self._counts)
+        if extra:
+            self._counts = np.concatenate([self._counts, np.zeros(extra, dtype=np.int64)])
+            self._means = np.concatenate([self._means, np.zeros((extra, len(SERIES)))])
+            self._variances = np.concatenate([self._variances, np.zeros((extra, len(SERIES)))])
+
+    def _rows(self, entity_ids: Sequence[Hashable]) -> np.ndarray:
+        """Rows of entities, allocating new ones on first sight (ids are keyed as strings)"""
+        index = self._index
+        rows = np.empty(len(entity_ids), dtype=np.int64)
+        for position, entity_id in enumerate(entity_ids):
+            key = str(entity_id)
+            row = index.get(key)
+            if row is None:
+                row = index[key] = len(index)
+            rows[position] = row
+        self._grow(len(index))
+        return rows
+
+    def _score_unique(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Score and update rows that are all distinct (one vectorized step)"""
+        counts = self._counts[rows]
+        means = self._means[rows]
+        variances = self._variances[rows]
+
+        std = np.sqrt(variances)
+        z = np.zeros_like(values)
+        np.divide(values - means, std, out=z, where=std > 0)
+        z[counts < self.warmup] = 0.0
+
+        # mean += w * delta; var = (1 - w) * (var + w * delta^2), with w = alpha or 1/n
+        counts = counts + 1
+        weight = (np.full(len(rows), self.alpha) if self.alpha is not None else 1.0 / counts)[:, None]
+        weight[counts == 1] = 1.0
+        delta = values - means
+        self._means[rows] = means + weight * delta
+        self._variances[rows] = (1 - weight) * (variances + weight * delta * delta)
+        self._counts[rows] = counts
+        return z
+
+    def score_batch(self, entity_ids: Sequence[Hashable], revenue: Sequence[float], cost: Sequence[float],
+                    cac: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Score a batch of observations in order and fold them into the statistics
+
+        Rows of the same entity are applied in input order: the batch is split into rounds
+        by each row's occurrence number, and every round is one vectorized update.
+        Returns a z-score array per series, `flagged` (any |z| over the threshold) and
+        `observations` (the entity's count including that row).
+        """
+        values = np.column_stack([np.asarray(revenue, dtype=np.float64), np.asarray(cost, dtype=np.float64),
+                                  np.asarray(cac, dtype=np.float64)])
+        if len(entity_ids) != len(values):
+            raise ValueError(f"Got {len(entity_ids)} entity ids for {len(values)} rows")
+        z = np.zeros_like(values)
+        observations = np.zeros(len(values), dtype=np.int64)
+        with self._lock:
+            rows = self._rows(entity_ids)
+            if len(rows):
+                # Occurrence number of each row within its entity (0 for the first)
+                order = np.argsort(rows, kind="stable")
+                sorted_rows = rows[order]
+                starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+                run_lengths = np.diff(np.r_[starts, len(rows)])
+                occurrence = np.empty(len(rows), dtype=np.int64)
+                occurrence[order] = np.arange(len(rows)) - np.repeat(starts, run_lengths)
+                # Rows grouped by round in one stable sort (each group in input order), split per round
+                by_round = np.argsort(occurrence, kind="stable")
+                bounds = np.cumsum(np.bincount(occurrence))[:-1]
+                for members in np.split(by_round, bounds):
+                    z[members] = self._score_unique(rows[members], values[members])
+                    observations[members] = self._counts[rows[members]]
+
+        scores = {name: z[:, i] for i, name in enumerate(SERIES)}
+        scores["flagged"] = (np.abs(z) > self.threshold).any(axis=1)
+        scores["observations"] = observations
+        return scores
+
+    def observe(self, entity_id: Hashable, revenue: float, cost: float, cac: float) -> Dict[str, Any]:
+        """Score one observation and fold it in; returns z-scores and the flagged series"""
+        scores = self.score_batch([entity_id], [revenue], [cost], [cac])
+        z = {name: float(scores[name][0]) for name in SERIES}
+        return {"z_scores": z, "flagged": [name for name in SERIES if abs(z[name]) > self.threshold],
+                "observations": int(scores["observations"][0])}
+
+    def alerts(self, result: Dict[str, Any]) -> List[str]:
+        """Alert texts for a result of `observe`"""
+        return [ANOMALY_ALERTS[name].format(z=result["z_scores"][name]) for name in result["flagged"]]
+
+    def get(self, entity_id: Hashable) -> Optional[Dict[str, Any]]:
+        """Current statistics of an entity, or None"""
+        row = self._index.get(str(entity_id))
+        if row is None:
+            return None
+        return {"observations": int(self._counts[row]),
+                "mean": dict(zip(SERIES, self._means[row].tolist())),
+                "std": dict(zip(SERIES, np.sqrt(self._variances[row]).tolist()))}
+
+    def save(self, path: str) -> None:
+        """Write a snapshot (.npz) atomically"""
+        with self._lock:
+            size = len(self._index)
+            ids = np.array(list(self._index), dtype=str) if size else np.array([], dtype=str)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, ids=ids, counts=self._counts[:size], means=self._means[:size],
+                             variances=self._variances[:size],
+                             params=np.array([np.nan if self.alpha is None else self.alpha,
+                                              self.threshold, self.warmup]))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    @classmethod
+    def load(cls, path: str) -> "AnomalyDetector":
+        """Restore a detector from a snapshot written by `save`"""
+        with np.load(path, allow_pickle=False) as snapshot:
+            alpha, threshold, warmup = snapshot["params"].tolist()
+            ids = snapshot["ids"].tolist()
+            detector = cls(None if np.isnan(alpha) else alpha, threshold, int(warmup), initial_entities=len(ids))
+            detector._index = {entity_id: row for row, entity_id in enumerate(ids)}
+            detector._counts[:len(ids)] = snapshot["counts"]
+            detector._means[:len(ids)] = snapshot["means"]
+            detector._variances[:len(ids)] = snapshot["variances"]
+        return detector
+
+def annotate_outputs(outputs: List[Dict[str, Any]], scores: Dict[str, np.ndarray], threshold: float) -> None:
+    """Add anomaly alerts and an `anomalies` entry (as from `observe`) to batch outputs, in place"""
+    z_columns = {name: scores[name].tolist() for name in SERIES}
+    observations = scores["observations"].tolist()
+    for i, output in enumerate(outputs):
+        z = {name: z_columns[name][i] for name in SERIES}
+        flagged = [name for name in SERIES if abs(z[name]) > threshold]
+        if flagged:
+            output["alerts"].extend(ANOMALY_ALERTS[name].format(z=z[name]) for name in flagged)
+            output["summary"]["total_alerts"] = len(output["alerts"])
+        output["anomalies"] = {"z_scores": z, "flagged": flagged, "observations": observations[i]}
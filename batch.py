@@ -0,0 +1,220 @@
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Union
+from datetime import date, datetime
+import numpy as np
+from core import (REQUIRED_FIELDS, CAC_ALERT_THRESHOLD, DEFAULT_RULES, NUMERIC_METRICS, OUTPUT_PROFILES,
+                  evaluate_metric, evaluate_metrics, profit_status)
+from rules import RuleSet
+from anomaly import AnomalyDetector, annotate_outputs
+from schema import DEFAULT_SCHEMA
+
+ColumnarBatch = Mapping[str, Union[np.ndarray, Sequence[float]]]
+
+# Columns copied into every output when a batch carries them, so results can be joined
+# back to their source rows (ingest adds the 1-based "record_number" of the input file)
+KEY_FIELDS = ("record_number", "entity_id", "date")
+
+def key_columns(batch: ColumnarBatch) -> Dict[str, List[Any]]:
+    """The KEY_FIELDS present in a batch, as lists of plain values"""
+    return {field: np.asarray(batch[field]).tolist() if isinstance(batch[field], np.ndarray) else list(batch[field])
+            for field in KEY_FIELDS if field in batch}
+
+def to_columns(batch: ColumnarBatch) -> Dict[str, np.ndarray]:
+    """Convert a columnar batch into equal-length NumPy arrays of the required fields"""
+    columns = {}
+    for field in REQUIRED_FIELDS:
+        if field not in batch:
+            raise ValueError(f"Missing required field: {field}")
+        column = np.asarray(batch[field])
+        if column.ndim != 1:
+            raise ValueError(f"Field {field} must be one-dimensional, got shape {column.shape}")
+        columns[field] = column
+
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"All fields must have the same length, got lengths {sorted(lengths)}")
+    return columns
+
+def validated_columns(batch: ColumnarBatch) -> Dict[str, np.ndarray]:
+    """to_columns plus the DEFAULT_SCHEMA checks of input_node; the first invalid row raises ValueError"""
+    validated = DEFAULT_SCHEMA.validate(to_columns(batch))
+    for row, error in validated.rejected:
+        raise ValueError(f"Row {row}: {error}")
+    return validated.columns
+
+def divide_arrays(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Broadcasting division that yields 0 where the denominator is not positive (same as safe_divide)"""
+    result = np.zeros(np.broadcast_shapes(np.shape(numerator), np.shape(denominator)), dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+def percent_change_arrays(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Broadcasting percent change versus previous, 0 where previous is not positive"""
+    result = np.zeros(np.broadcast_shapes(np.shape(current), np.shape(previous)), dtype=np.float64)
+    np.divide(current - previous, previous, out=result, where=previous > 0)
+    # Multiply after dividing, in the same order as percent_change, so results match bit for bit
+    result *= 100
+    return result
+
+# Column-wise implementations of the core.METRIC_TABLE operations
+ARRAY_OPERATIONS = {
+    "subtract": np.subtract,
+    "divide": divide_arrays,
+    "percent_change": percent_change_arrays,
+    "profit_status": lambda daily_profit: np.where(daily_profit > 0, "positive", "negative"),
+}
+
+def compute_metrics_batch(columns: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Vectorized equivalent of processing_node over a whole batch (numeric metrics only)
+
+    Columns may also have broadcastable shapes (e.g. the grids of a ScenarioSet).
+    """
+    return evaluate_metrics(columns, ARRAY_OPERATIONS, NUMERIC_METRICS)
+
+def _message_values(metrics: Dict[str, np.ndarray], rules: RuleSet) -> Dict[str, List[Any]]:
+    """Metric columns as Python lists for render_batch, plus profit_status if a message reads it"""
+    values = {name: column.tolist() for name, column in metrics.items()}
+    if any("profit_status" in names for names in rules.dependencies().values()):
+        values["profit_status"] = evaluate_metric("profit_status", metrics, ARRAY_OPERATIONS).tolist()
+    return values
+
+def build_outputs(columns: Dict[str, np.ndarray], metrics: Dict[str, np.ndarray],
+                  rules: RuleSet, include_input: bool, profile: str = "full",
+                  keys: Optional[Mapping[str, Sequence[Any]]] = None) -> List[Dict[str, Any]]:
+    """Render per-row outputs in the same shape as output_node (or minimal_output_node)
+
+    `metrics` are the columns of compute_metrics_batch for `columns` (the input fields,
+    echoed as input_data). `keys` (see key_columns) are added to each output as top-level fields.
+    """
+    if profile == "minimal":
+        outputs = _build_minimal_outputs(metrics, rules)
+    else:
+        outputs = _build_full_outputs(columns, metrics, rules, include_input)
+    if keys:
+        names = list(keys)
+        for output, values in zip(outputs, zip(*(keys[name] for name in names))):
+            output.update(zip(names, values))
+    return outputs
+
+def _build_full_outputs(columns: Dict[str, np.ndarray], metrics: Dict[str, np.ndarray],
+                        rules: RuleSet, include_input: bool) -> List[Dict[str, Any]]:
+    """Render per-row outputs in the same shape as output_node"""
+    now = datetime.now()
+    timestamp = now.isoformat()
+    analysis_date = now.strftime("%Y-%m-%d")
+
+    # Convert every column to Python scalars once instead of indexing arrays per row
+    values = _message_values(metrics, rules)
+    alerts_per_row, recommendations_per_row = rules.render_batch(rules.evaluate_batch(metrics), values)
+    cac_alert = (metrics["cac_change_percent"] > CAC_ALERT_THRESHOLD).tolist()
+    profit = values["daily_profit"]
+    current_cac = values["current_cac"]
+    prev_cac = values["previous_cac"]
+    revenue_change = values["revenue_change_percent"]
+    cost_change = values["cost_change_percent"]
+    cac_change = values["cac_change_percent"]
+    inputs = [columns[field].tolist() for field in REQUIRED_FIELDS] if include_input else None
+
+    outputs = []
+    for i in range(len(profit)):
+        alerts = alerts_per_row[i]
+        recommendations = recommendations_per_row[i]
+
+        output = {
+            "analysis_timestamp": timestamp,
+            "profit_loss_status": {
+                "daily_profit": profit[i],
+                "status": profit_status(profit[i]),
+                "revenue_change_percent": round(revenue_change[i], 2),
+                "cost_change_percent": round(cost_change[i], 2)
+            },
+            "customer_acquisition": {
+                "current_cac": round(current_cac[i], 2),
+                "previous_cac": round(prev_cac[i], 2),
+                "cac_change_percent": round(cac_change[i], 2),
+                "cac_alert": cac_alert[i]
+            },
+            "alerts": alerts,
+            "recommendations": recommendations,
+            "summary": {
+                "total_alerts": len(alerts),
+                "total_recommendations": len(recommendations),
+                "analysis_date": analysis_date,
+                "agent_version": "1.0.0"
+            }
+        }
+        if include_input:
+            output["input_data"] = {field: column[i] for field, column in zip(REQUIRED_FIELDS, inputs)}
+        outputs.append(output)
+
+    return outputs
+
+def _build_minimal_outputs(metrics: Dict[str, np.ndarray], rules: RuleSet) -> List[Dict[str, Any]]:
+    """Render per-row outputs in the same shape as minimal_output_node"""
+    analysis_date = date.today().isoformat()
+    values = _message_values(metrics, rules)
+    alerts_per_row, recommendations_per_row = rules.render_batch(rules.evaluate_batch(metrics), values)
+    cac_alert = (metrics["cac_change_percent"] > CAC_ALERT_THRESHOLD).tolist()
+    profit = values["daily_profit"]
+    current_cac = values["current_cac"]
+    revenue_change = values["revenue_change_percent"]
+    cost_change = values["cost_change_percent"]
+    cac_change = values["cac_change_percent"]
+
+    outputs = []
+    for i in range(len(profit)):
+        alerts = alerts_per_row[i]
+        recommendations = recommendations_per_row[i]
+        outputs.append({
+            "profit_loss_status": {
+                "daily_profit": profit[i],
+                "status": profit_status(profit[i]),
+                "revenue_change_percent": round(revenue_change[i], 2),
+                "cost_change_percent": round(cost_change[i], 2)
+            },
+            "customer_acquisition": {
+                "current_cac": round(current_cac[i], 2),
+                "cac_change_percent": round(cac_change[i], 2),
+                "cac_alert": cac_alert[i]
+            },
+            "alerts": alerts,
+            "recommendations": recommendations,
+            "summary": {
+                "total_alerts": len(alerts),
+                "total_recommendations": len(recommendations),
+                "analysis_date": analysis_date
+            }
+        })
+    return outputs
+
+def run_business_analysis_batch(batch: ColumnarBatch, include_input: bool = True,
+                                rules: Optional[RuleSet] = None,
+                                anomaly_detector: Optional[AnomalyDetector] = None,
+                                entity_ids: Optional[Sequence[Any]] = None,
+                                profile: str = "full", validate: bool = True) -> List[Dict[str, Any]]:
+    """Run the business analysis over a columnar batch in vectorized form
+
+    `batch` maps each required field to a NumPy array or an equal-length list.
+    Returns one output dict per row, shaped like the output of `run_business_analysis`.
+    `rules` replaces the built-in alert thresholds, as in run_business_analysis.
+    With an `anomaly_detector`, rows are scored in order against their entity's running
+    statistics; ids come from `entity_ids` or an "entity_id" column of the batch.
+    `profile="minimal"` renders the lightweight simple_agent output (input_data is never included).
+    Key columns of the batch ("record_number", "entity_id", "date") are copied into each output.
+    Rows are checked against the input schema like input_node does, and the first invalid
+    row raises ValueError; pass `validate=False` for columns that already went through
+    Schema.validate.
+    """
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output profile: {profile} (expected one of {OUTPUT_PROFILES})")
+    columns = validated_columns(batch) if validate else to_columns(batch)
+    metrics = compute_metrics_batch(columns)
+    outputs = build_outputs(columns, metrics, rules or DEFAULT_RULES, include_input, profile, key_columns(batch))
+    if anomaly_detector is not None:
+        if entity_ids is None:
+            if "entity_id" not in batch:
+                raise ValueError("Anomaly detection needs entity_ids or an entity_id column")
+            entity_ids = batch["entity_id"]
+        scores = anomaly_detector.score_batch(entity_ids, columns["daily_revenue"], columns["daily_cost"],
+                                              metrics["current_cac"])
+        annotate_outputs(outputs, scores, anomaly_detector.threshold)
+    return outputs
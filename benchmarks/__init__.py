@@ -0,0 +1 @@
+"""Performance benchmarks for the business analysis agent (run with `python -m benchmarks.<name>`)"""
@@ -0,0 +1,49 @@
+"""Alert queries over a memory-mapped columnar store versus scanning a JSONL results log"""
+import argparse
+import os
+import tempfile
+import time
+
+from batch import run_business_analysis_batch
+from benchmarks.suite import synthetic_columns
+from columnar import ColumnStore
+from persistence import ResultsLog, read_results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows-per-day", type=int, default=100_000, help="results stored per date partition")
+    parser.add_argument("--days", type=int, default=30, help="date partitions")
+    parser.add_argument("--log-sample", type=int, default=100_000, help="results written to the JSONL log for comparison")
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.rows_per_day, seed=11)
+    entities = [f"store-{i % 1000}" for i in range(args.rows_per_day)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = ColumnStore(os.path.join(tmpdir, "store"))
+        start = time.perf_counter()
+        for day in range(args.days):
+            store.append_batch(columns, dates=f"2024-05-{day % 31 + 1:02d}", entity_ids=entities)
+        total = args.rows_per_day * args.days
+        print(f"{total} results in {args.days} partitions, written in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        matches = store.count("2024-05-01", "2024-05-31", where=["cac_alert == 1"])
+        print(f"  count cac_alert             {(time.perf_counter() - start) * 1000:9.1f} ms  ({matches} matches)")
+        start = time.perf_counter()
+        matches = store.count(alerts=["negative_profit", "cost_increase"])
+        print(f"  count two alert bits        {(time.perf_counter() - start) * 1000:9.1f} ms  ({matches} matches)")
+        start = time.perf_counter()
+        result = store.query("2024-05-01", "2024-05-07", where=["cac_alert == 1"], columns=["cac_change_percent"])
+        print(f"  query one week with rows    {(time.perf_counter() - start) * 1000:9.1f} ms  ({len(result['date'])} rows)")
+
+        log_path = os.path.join(tmpdir, "results.jsonl")
+        sample = {field: values[:args.log_sample] for field, values in columns.items()}
+        with ResultsLog(log_path) as log:
+            log.write_many(run_business_analysis_batch(sample, include_input=False))
+        start = time.perf_counter()
+        matches = sum(1 for result in read_results(log_path) if result["customer_acquisition"]["cac_alert"])
+        scan = (time.perf_counter() - start) * total / args.log_sample
+        print(f"  JSONL scan cac_alert        {scan * 1000:9.1f} ms  (extrapolated from {args.log_sample} results)")
+
+if __name__ == "__main__":
+    main()
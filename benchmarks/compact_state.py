@@ -0,0 +1,64 @@
+"""Memory per record of the dict-based outputs versus the compact state representation"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from agent import calculate_metrics, DEFAULT_RULES, DEFAULT_SCENARIOS, REQUIRED_FIELDS
+from batch import run_business_analysis_batch
+from compact import CompactMetrics, analyze_batch_compact, fired_mask
+
+def _measure(build):
+    """(retained bytes, peak bytes, seconds) of building and holding a result"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, elapsed
+
+def _dict_state(record):
+    metrics = calculate_metrics(record)
+    return metrics, DEFAULT_RULES.evaluate(metrics)
+
+def _compact_state(record):
+    metrics = CompactMetrics.from_record(record)
+    return metrics, fired_mask(DEFAULT_RULES, metrics)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000, help="batch size")
+    parser.add_argument("--state-records", type=int, default=100_000, help="records kept as pipeline state")
+    args = parser.parse_args()
+
+    scenarios = list(DEFAULT_SCENARIOS.values())
+    columns = {field: [scenarios[i % len(scenarios)][field] for i in range(args.records)]
+               for field in REQUIRED_FIELDS}
+    records = [scenarios[i % len(scenarios)] for i in range(args.state_records)]
+
+    print(f"Batch of {args.records} records (retained / peak bytes per record)")
+    cases = [
+        ("dict outputs + input_data", lambda: run_business_analysis_batch(columns)),
+        ("dict outputs", lambda: run_business_analysis_batch(columns, include_input=False)),
+        ("compact batch", lambda: analyze_batch_compact(columns)),
+    ]
+    for label, build in cases:
+        retained, peak, elapsed = _measure(build)
+        print(f"  {label:28s} {retained / args.records:8.1f} B  {peak / args.records:8.1f} B  "
+              f"{args.records / elapsed:10.0f} records/s")
+
+    print(f"Per-record pipeline state, {args.state_records} records (retained / peak bytes per record)")
+    state_cases = [
+        ("metrics dict + message lists", lambda: [_dict_state(record) for record in records]),
+        ("slotted metrics + bitmask", lambda: [_compact_state(record) for record in records]),
+    ]
+    for label, build in state_cases:
+        retained, peak, elapsed = _measure(build)
+        print(f"  {label:28s} {retained / args.state_records:8.1f} B  {peak / args.state_records:8.1f} B  "
+              f"{args.state_records / elapsed:10.0f} records/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per-call latency of run_business_analysis with cold versus warm graph compilation"""
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+import agent
+import simple_agent
+from registry import invalidate
+
+SAMPLE_DATA = {
+    "daily_revenue": 5000,
+    "daily_cost": 3000,
+    "number_of_customers": 50,
+    "previous_day_revenue": 4500,
+    "previous_day_cost": 2500,
+    "previous_day_customers": 45
+}
+
+def _time_calls(run, calls: int, cold: bool) -> list:
+    """Time `calls` invocations of `run`, dropping the compiled agent first when cold"""
+    timings = []
+    for _ in range(calls):
+        if cold:
+            invalidate()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def _report(label: str, timings: list) -> None:
+    print(f"{label:<34} mean={statistics.mean(timings):8.3f} ms  "
+          f"median={statistics.median(timings):8.3f} ms  min={min(timings):8.3f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    variants = {
+        "agent": lambda: agent.run_business_analysis(SAMPLE_DATA, save_to_file=False),
+        "simple_agent": lambda: simple_agent.run_business_analysis(SAMPLE_DATA),
+    }
+
+    for name, run in variants.items():
+        # Node output is not what we are measuring
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+            cold = _time_calls(run, args.calls, cold=True)
+            warm = _time_calls(run, args.calls, cold=False)
+        _report(f"{name} cold (compile/call)", cold)
+        _report(f"{name} warm (registry)", warm)
+        print(f"{'':<34} speedup x{statistics.mean(cold) / statistics.mean(warm):.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Cold import time of the entry-point modules, and whether each one pulls in LangGraph"""
+import argparse
+import subprocess
+import sys
+
+MODULES = ("core", "batch", "ingest", "server", "agent", "simple_agent", "langgraph.graph")
+
+def cold_import(statement: str, repeats: int) -> float:
+    """Best wall time in ms of `statement` in a fresh interpreter"""
+    def best(code: str) -> float:
+        script = ("import time; start = time.perf_counter(); " + code +
+                  "; print((time.perf_counter() - start) * 1000)")
+        return min(float(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                        check=True).stdout) for _ in range(repeats))
+    return best(statement)
+
+def loads_langgraph(module: str) -> bool:
+    code = f"import sys, {module}; print('langgraph' in sys.modules)"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          check=True).stdout.strip() == "True"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        elapsed = cold_import(f"import {module}", args.repeats)
+        flag = "loads LangGraph" if loads_langgraph(module) else ""
+        print(f"import {module:<18} {elapsed:8.1f} ms  {flag}")
+    elapsed = cold_import("import agent; agent.get_business_agent()", args.repeats)
+    print(f"{'agent + build graph':<25} {elapsed:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
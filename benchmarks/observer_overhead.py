@@ -0,0 +1,38 @@
+"""Throughput of run_business_analysis with console-style event output versus events disabled"""
+import argparse
+import os
+import time
+
+import events
+from agent import run_business_analysis, DEFAULT_SCENARIOS
+
+def _throughput(records: list) -> float:
+    """Records per second for analyzing `records` one by one"""
+    start = time.perf_counter()
+    for record in records:
+        run_business_analysis(record, save_to_file=False)
+    return len(records) / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=5000)
+    args = parser.parse_args()
+
+    scenarios = list(DEFAULT_SCENARIOS.values())
+    records = [scenarios[i % len(scenarios)] for i in range(args.records)]
+    run_business_analysis(records[0], save_to_file=False)
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        # DEBUG console output is what every call used to print (payload dumps included)
+        with events.observing(events.ConsoleObserver(stream=devnull, level=events.DEBUG)):
+            verbose = _throughput(records)
+        with events.observing(events.ConsoleObserver(stream=devnull, level=events.INFO)):
+            info = _throughput(records)
+    silent = _throughput(records)
+
+    print(f"console DEBUG (old prints)  {verbose:10.0f} records/s")
+    print(f"console INFO                {info:10.0f} records/s")
+    print(f"events disabled (library)   {silent:10.0f} records/s  (x{silent / verbose:.2f} vs DEBUG)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Roll-up time for a store -> region -> division -> company tree versus re-analyzing summed dicts per entity"""
+import argparse
+import time
+
+from agent import run_business_analysis
+from benchmarks.suite import synthetic_columns
+from hierarchy import Hierarchy, RollupAccumulator
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leaves", type=int, default=40_000)
+    parser.add_argument("--regions", type=int, default=800)
+    parser.add_argument("--divisions", type=int, default=20)
+    parser.add_argument("--days", type=int, default=1, help="records per leaf")
+    args = parser.parse_args()
+
+    parents = {f"store-{i}": f"region-{i % args.regions}" for i in range(args.leaves)}
+    parents.update({f"region-{i}": f"division-{i % args.divisions}" for i in range(args.regions)})
+    parents.update({f"division-{i}": "company" for i in range(args.divisions)})
+    columns = synthetic_columns(args.leaves * args.days)
+    entity_ids = [f"store-{i % args.leaves}" for i in range(args.leaves * args.days)]
+
+    start = time.perf_counter()
+    hierarchy = Hierarchy(parents)
+    built = time.perf_counter()
+    accumulator = RollupAccumulator(hierarchy)
+    accumulator.add(entity_ids, columns)
+    rollup = accumulator.result()
+    outputs = rollup.outputs()
+    done = time.perf_counter()
+    print(f"{len(hierarchy)} entities, {len(entity_ids)} records")
+    print(f"  build hierarchy          {(built - start) * 1000:9.1f} ms")
+    print(f"  sum, roll up, analyze    {(done - built) * 1000:9.1f} ms  ({len(outputs)} outputs)")
+
+    # The old way runs the graph once per entity on a summed dict; time a sample of those
+    # calls (leaving out the summing itself, so this is a lower bound)
+    sample = [output["input_data"] for output in outputs[:500]]
+    start = time.perf_counter()
+    for summed in sample:
+        run_business_analysis(summed, save_to_file=False)
+    per_entity = (time.perf_counter() - start) / len(sample)
+    print(f"  graph per entity (est.)  {per_entity * len(hierarchy) * 1000:9.1f} ms  "
+          f"(x{per_entity * len(hierarchy) / (done - built):.0f} slower)")
+
+if __name__ == "__main__":
+    main()
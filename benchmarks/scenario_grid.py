@@ -0,0 +1,45 @@
+"""What-if grid evaluation with shared terms versus a flat batch and per-scenario graph calls"""
+import argparse
+import time
+
+from agent import DEFAULT_RULES, DEFAULT_SCENARIOS, run_business_analysis
+from batch import compute_metrics_batch
+from scenarios import ScenarioSet
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--step", type=float, default=0.001, help="relative step of the cost and revenue axes")
+    parser.add_argument("--graph-sample", type=int, default=500, help="scenarios timed through the graph")
+    args = parser.parse_args()
+
+    scenarios = ScenarioSet.relative_grid(DEFAULT_SCENARIOS["profitable_growth"], {
+        "daily_cost": (-0.3, 0.3, args.step),
+        "daily_revenue": (-0.3, 0.3, args.step * 10),
+        "number_of_customers": (-0.5, 0.5, 0.01),
+    })
+    print(f"{len(scenarios)} scenarios, grid {scenarios.shape}")
+
+    start = time.perf_counter()
+    result = scenarios.evaluate()
+    evaluated = time.perf_counter()
+    regions = result.regions()
+    done = time.perf_counter()
+    print(f"  shared-term evaluation   {(evaluated - start) * 1000:9.1f} ms")
+    print(f"  alert regions            {(done - evaluated) * 1000:9.1f} ms  ({len(regions)} regions)")
+
+    start = time.perf_counter()
+    columns = scenarios.columns()
+    DEFAULT_RULES.evaluate_batch(compute_metrics_batch(columns))
+    flat = time.perf_counter() - start
+    print(f"  flat batch (expanded)    {flat * 1000:9.1f} ms")
+
+    records = [{field: column[i].item() for field, column in columns.items()} for i in range(args.graph_sample)]
+    run_business_analysis(records[0], save_to_file=False)
+    start = time.perf_counter()
+    for record in records:
+        run_business_analysis(record, save_to_file=False)
+    per_call = (time.perf_counter() - start) / len(records)
+    print(f"  graph per scenario       {per_call * len(scenarios):9.1f} s   (extrapolated from {len(records)} calls)")
+
+if __name__ == "__main__":
+    main()
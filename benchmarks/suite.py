@@ -0,0 +1,238 @@
+"""Benchmark suite for the analysis pipeline with a stored baseline
+
+Runs single-call latency (agent and simple_agent), batch throughput, memory peak, graph
+compile cost and persistence cost on synthetic records shaped like DEFAULT_SCENARIOS.
+
+    python -m benchmarks.suite                    # run and print
+    python -m benchmarks.suite --check            # exit 1 if anything regressed vs the baseline
+    python -m benchmarks.suite --save-baseline    # record the current numbers as the baseline
+
+The baseline is machine specific; refresh it when moving to different hardware.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import agent
+import simple_agent
+from agent import DEFAULT_SCENARIOS, REQUIRED_FIELDS
+from batch import run_business_analysis_batch
+from persistence import ResultsLog, write_json_atomic
+from registry import invalidate
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Relative slack before a difference from the baseline counts as a regression; timings on
+# shared machines routinely move by 20-40% between runs, real regressions are larger
+DEFAULT_TOLERANCE = 0.50
+
+DEFAULT_BATCH_SIZES = (1_000, 100_000, 1_000_000)
+
+# Larger batches are analyzed in chunks of this size so memory stays bounded
+BATCH_CHUNK = 100_000
+
+def synthetic_columns(count: int, seed: int = 0, jitter: float = 0.2) -> dict:
+    """Columnar records drawn from the DEFAULT_SCENARIOS shapes with +/- `jitter` noise"""
+    rng = np.random.default_rng(seed)
+    shapes = np.array([[scenario[field] for field in REQUIRED_FIELDS] for scenario in DEFAULT_SCENARIOS.values()],
+                      dtype=np.float64)
+    values = shapes[rng.integers(0, len(shapes), count)] * rng.uniform(1 - jitter, 1 + jitter, (count, len(REQUIRED_FIELDS)))
+    columns = {field: values[:, i].round(2) for i, field in enumerate(REQUIRED_FIELDS)}
+    for field in ("number_of_customers", "previous_day_customers"):
+        columns[field] = np.maximum(columns[field].round(), 1).astype(np.int64)
+    return columns
+
+def synthetic_records(count: int, seed: int = 0) -> list:
+    """Per-record dicts of synthetic_columns"""
+    columns = synthetic_columns(count, seed)
+    lists = {field: column.tolist() for field, column in columns.items()}
+    return [{field: lists[field][i] for field in REQUIRED_FIELDS} for i in range(count)]
+
+# Throughput runs are repeated and the best run kept, which is far less noisy than one run
+REPEATS = 3
+
+@contextlib.contextmanager
+def _no_gc():
+    """Keep collector pauses, which depend on whatever ran before, out of the timings (as timeit does)"""
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+def _best_seconds(run, repeats: int = REPEATS) -> float:
+    best = float("inf")
+    with _no_gc():
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def _median_ms(run, calls: int) -> float:
+    timings = []
+    with _no_gc():
+        for _ in range(calls):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def bench_latency(calls: int) -> dict:
+    """Median single-call latency with a warm compiled graph"""
+    records = synthetic_records(calls)
+    results = {}
+    variants = {
+        "agent": lambda record: agent.run_business_analysis(record, save_to_file=False),
+        "simple_agent": lambda record: simple_agent.run_business_analysis(record),
+    }
+    for name, run in variants.items():
+        run(records[0])
+        iterator = iter(records * 2)
+        results[f"latency_{name}_ms"] = (_median_ms(lambda: run(next(iterator)), calls), "ms", "lower")
+    return results
+
+def bench_compile(calls: int) -> dict:
+    """Median cost of compiling the graph from scratch"""
+    def compile_graph() -> None:
+        invalidate()
+        agent.get_business_agent()
+
+    return {"compile_agent_ms": (_median_ms(compile_graph, calls), "ms", "lower")}
+
+def bench_batch(sizes) -> dict:
+    """Vectorized batch throughput per batch size"""
+    results = {}
+    for size in sizes:
+        chunk = synthetic_columns(min(size, BATCH_CHUNK), seed=size)
+        run_business_analysis_batch({field: column[:10] for field, column in chunk.items()})
+
+        def analyze_all() -> None:
+            remaining = size
+            while remaining:
+                count = min(remaining, BATCH_CHUNK)
+                run_business_analysis_batch({field: column[:count] for field, column in chunk.items()},
+                                            include_input=False)
+                remaining -= count
+
+        # One pass is already long enough to be stable for big batches
+        repeats = REPEATS if size <= BATCH_CHUNK else 1
+        results[f"batch_{size}_records_per_s"] = (size / _best_seconds(analyze_all, repeats), "records/s", "higher")
+    return results
+
+def bench_memory(size: int) -> dict:
+    """Peak traced memory per record while building batch outputs"""
+    columns = synthetic_columns(size)
+    gc.collect()
+    tracemalloc.start()
+    outputs = run_business_analysis_batch(columns)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del outputs
+    return {"batch_peak_bytes_per_record": (peak / size, "B", "lower")}
+
+def bench_persistence(size: int, calls: int) -> dict:
+    """Cost of writing one pretty JSON result file and of appending results to a log"""
+    outputs = run_business_analysis_batch(synthetic_columns(size))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "langgraph.json")
+        iterator = iter(outputs * (calls // len(outputs) + 2))
+        results["save_json_ms"] = (_median_ms(lambda: write_json_atomic(next(iterator), path, pretty=True), calls),
+                                   "ms", "lower")
+        for fmt in ("jsonl", "msgpack"):
+            def write_log() -> None:
+                with ResultsLog(os.path.join(tmpdir, f"results.{fmt}"), fmt, append=False) as log:
+                    log.write_many(outputs)
+
+            results[f"results_log_{fmt}_records_per_s"] = (size / _best_seconds(write_log), "records/s", "higher")
+    return results
+
+def run_suite(batch_sizes=DEFAULT_BATCH_SIZES, calls: int = 300) -> dict:
+    """All benchmarks as {name: {"value", "unit", "better"}}"""
+    measurements = {}
+    # Node output is not what we are measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        measurements.update(bench_latency(calls))
+        measurements.update(bench_compile(max(calls // 5, 5)))
+    measurements.update(bench_batch(batch_sizes))
+    measurements.update(bench_memory(10_000))
+    measurements.update(bench_persistence(10_000, calls))
+    return {name: {"value": value, "unit": unit, "better": better}
+            for name, (value, unit, better) in measurements.items()}
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Names and descriptions of benchmarks that got worse than the baseline by more than `tolerance`"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or not reference["value"]:
+            continue
+        ratio = result["value"] / reference["value"]
+        worse = ratio > 1 + tolerance if result["better"] == "lower" else ratio < 1 - tolerance
+        if worse:
+            regressions.append(f"{name}: {result['value']:.4g} {result['unit']} vs baseline "
+                               f"{reference['value']:.4g} {reference['unit']} ({(ratio - 1) * 100:+.1f}%)")
+    return regressions
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["benchmarks"]
+
+def save_baseline(results: dict, path: str = BASELINE_PATH) -> None:
+    document = {"machine": {"python": platform.python_version(), "platform": platform.platform(),
+                            "processor": platform.machine()},
+                "benchmarks": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite for the analysis pipeline")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)),
+                        help="comma-separated batch sizes")
+    parser.add_argument("--calls", type=int, default=300, help="calls per latency measurement")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a benchmark regressed vs the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before --check fails")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run_suite(tuple(int(size) for size in args.sizes.split(",")), args.calls)
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        change = f"  ({(result['value'] / reference['value'] - 1) * 100:+6.1f}% vs baseline)" if reference else ""
+        print(f"{name:<36} {result['value']:14.3f} {result['unit']:<10}{change}")
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+    if args.check:
+        if not baseline:
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+            return 1
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"   {regression}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import hashlib
+import os
+import threading
+import time
+import orjson
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of a result cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+class MemoryBackend:
+    """In-process LRU of serialized results, bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int = 100_000, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, ttl: Optional[float], stats: CacheStats) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, stored_at = entry
+            if ttl is not None and time.time() - stored_at > ttl:
+                self._remove(key)
+                stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: bytes, stats: CacheStats) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, time.time())
+            self._bytes += len(payload)
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        payload, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class DiskBackend:
+    """One file per result under a directory, with an in-memory LRU index for eviction
+
+    Files are written atomically (temp file + rename), and their modification time is the
+    storage time used for TTL checks, so the cache survives restarts.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 1_000_000, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _path(self, key: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from existing files, oldest first"""
+        entries = []
+        for shard in os.listdir(self.directory):
+            shard_path = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(shard_path, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def get(self, key: str, ttl: Optional[float], stats: CacheStats) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            path = self._path(key)
+            try:
+                if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+                    self._remove(key)
+                    stats.expirations += 1
+                    return None
+                with open(path, "rb") as f:
+                    payload = f.read()
+            except FileNotFoundError:
+                # Removed behind our back (another process or a manual cleanup)
+                self._bytes -= self._index.pop(key)
+                return None
+            self._index.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: bytes, stats: CacheStats) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if key in self._index:
+                self._bytes -= self._index.pop(key)
+            self._index[key] = len(payload)
+            self._bytes += len(payload)
+            while self._index and (len(self._index) > self.max_entries or
+                                   (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._index)))
+                stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._index.pop(key)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+class AnalysisCache:
+    """Memoizes analysis outputs by a stable hash of the schema-parsed input
+
+    Outputs are stored with their timestamps and input_data blanked, and those are filled
+    in again on every read, so a cached result looks exactly like a freshly computed one.
+    """
+
+    def __init__(self, backend: Optional[Any] = None, ttl: Optional[float] = None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def key(self, input_data: Dict[str, Any], variant: str = "") -> str:
+        """Stable key for a record and analysis variant (key order does not matter)
+
+        Pass the record as parsed by the schema, so "5000" and 5000 share a key; int and
+        float values stay distinct because the output keeps their type.
+        """
+        serialized = orjson.dumps(input_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        digest = hashlib.blake2b(serialized, digest_size=20)
+        digest.update(variant.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str, input_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Cached output for a key with fresh timestamps and the caller's `input_data`, or None"""
+        payload = self.backend.get(key, self.ttl, self.stats)
+        if payload is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+
+        output = orjson.loads(payload)
+        now = datetime.now()
+        if "analysis_timestamp" in output:
+            output["analysis_timestamp"] = now.isoformat()
+        if "analysis_date" in output.get("summary", {}):
+            output["summary"]["analysis_date"] = now.strftime("%Y-%m-%d")
+        if "input_data" in output and input_data is not None:
+            output["input_data"] = dict(input_data)
+        return output
+
+    def put(self, key: str, output: Dict[str, Any]) -> None:
+        """Store an output with its timestamps and input_data blanked (they are re-created on read)"""
+        stored = dict(output)
+        if "input_data" in stored:
+            stored["input_data"] = None
+        if "analysis_timestamp" in stored:
+            stored["analysis_timestamp"] = None
+        if "analysis_date" in stored.get("summary", {}):
+            stored["summary"] = {**stored["summary"], "analysis_date": None}
+        self.backend.put(key, orjson.dumps(stored, option=orjson.OPT_SERIALIZE_NUMPY), self.stats)
+
+    def clear(self) -> None:
+        self.backend.clear()
@@ -0,0 +1,362 @@
+from typing import Dict, Any, List, Optional, Tuple
+import argparse
+import sys
+import time
+import orjson
+import events
+from ingest import DEFAULT_CHUNK_SIZE, detect_format, ingest_file, iter_records
+from persistence import ResultsLog, dumps, write_json_atomic
+
+OUTPUT_FORMATS = ("json", "jsonl", "msgpack")
+
+# Analyzed by `python agent.py` without arguments
+SAMPLE_RECORD = {
+    "daily_revenue": 5000,
+    "daily_cost": 3000,
+    "number_of_customers": 50,
+    "previous_day_revenue": 4500,
+    "previous_day_cost": 2500,
+    "previous_day_customers": 45
+}
+
+def output_format(output: str, requested: Optional[str], default: str = "json") -> str:
+    """Explicit --format, else from the output file name, else `default`"""
+    if requested:
+        return requested
+    for fmt in ("jsonl", "msgpack"):
+        if output.endswith(f".{fmt}"):
+            return fmt
+    return "json" if output.endswith(".json") else default
+
+def read_records(source: str) -> List[Dict[str, Any]]:
+    """Records from JSON text or '-' for stdin: one object, a list, or JSON lines"""
+    text = sys.stdin.buffer.read() if source == "-" else source.encode("utf-8")
+    try:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        data = [orjson.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+def write_results(results: Any, output: str, fmt: str) -> None:
+    """Write one document (json) or a sequence of records (jsonl/msgpack) to a path or '-' for stdout"""
+    if fmt == "json":
+        if output == "-":
+            sys.stdout.buffer.write(dumps(results, pretty=True) + b"\n")
+            sys.stdout.buffer.flush()
+        else:
+            write_json_atomic(results, output, pretty=True)
+        return
+    target = sys.stdout.buffer if output == "-" else output
+    with ResultsLog(target, fmt, append=False) as log:
+        log.write_many(results if isinstance(results, list) else [results])
+
+def report(args: argparse.Namespace, records: int, elapsed: float, rejected: int = 0) -> None:
+    """Throughput line on stderr (suppressed by --quiet)"""
+    if args.quiet:
+        return
+    rejected_text = f", {rejected} rejected" if rejected else ""
+    rate = records / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {records} records analyzed{rejected_text} in {elapsed:.3f} s ({rate:.0f} records/s)", file=sys.stderr)
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    from agent import run_business_analysis
+    from rules import load_rules
+
+    if args.sample or args.record is None:
+        records = [SAMPLE_RECORD]
+    else:
+        records = read_records(args.record)
+    rules = load_rules(args.rules) if args.rules else None
+    fmt = output_format(args.output, args.format)
+
+    start = time.perf_counter()
+    results = [run_business_analysis(record, save_to_file=args.save, rules=rules, compact=args.compact,
+                                     locale=args.locale)
+               for record in records]
+    elapsed = time.perf_counter() - start
+    write_results(results[0] if len(results) == 1 and fmt == "json" else results, args.output, fmt)
+    report(args, len(results), elapsed)
+    return 0
+
+def cmd_stream(args: argparse.Namespace) -> int:
+    fmt = output_format(args.output, args.format, default="jsonl")
+    if fmt == "json":
+        print("❌ stream writes jsonl or msgpack", file=sys.stderr)
+        return 2
+    input_format = args.input_format or ("jsonl" if args.input == "-" else detect_format(args.input))
+
+    def report_reject(record_number: int, record: Dict[str, Any], error: str) -> None:
+        if not args.quiet:
+            print(f"❌ Record {record_number} rejected: {error}", file=sys.stderr)
+
+    if args.checkpoint:
+        if args.input == "-" or args.output == "-":
+            print("❌ --checkpoint needs a real input file and output file to resume from", file=sys.stderr)
+            return 2
+        from resumable import run_resumable_batch
+        stats = run_resumable_batch(iter_records(args.input, input_format), args.output, args.checkpoint,
+                                    args.job_id, args.chunk_size, fmt, on_reject=report_reject,
+                                    include_input=not args.no_input)
+        if stats["restarted"] and not args.quiet:
+            print(f"⚠️ Output of job {args.job_id} was missing or truncated; the job was restarted", file=sys.stderr)
+    else:
+        stats = ingest_file(args.input, args.output, input_format, args.chunk_size, report_reject,
+                            not args.no_input, fmt, args.workers)
+    report(args, stats["records_written"], stats["elapsed_seconds"], stats["records_rejected"])
+    return 0
+
+def cmd_scenarios(args: argparse.Namespace) -> int:
+    from agent import run_multiple_scenarios
+
+    scenarios = None
+    if args.scenarios:
+        with open(args.scenarios, "rb") as f:
+            scenarios = orjson.loads(f.read())
+    fmt = output_format(args.output, args.format)
+
+    start = time.perf_counter()
+    combined = run_multiple_scenarios(scenarios, workers=args.workers, backend=args.backend,
+                                      per_scenario_files=args.per_scenario_files, combined_file=None)
+    elapsed = time.perf_counter() - start
+    if fmt == "json":
+        write_results(combined, args.output, fmt)
+    else:
+        write_results([{"scenario": name, "result": result} for name, result in combined["results"].items()],
+                      args.output, fmt)
+    report(args, len(combined["results"]), elapsed)
+    return 0
+
+def parse_variation(text: str) -> Tuple[str, Tuple[float, ...]]:
+    """field=low:high[:step] with relative changes, e.g. daily_cost=-0.3:0.3:0.01"""
+    field, sep, spec = text.partition("=")
+    try:
+        bounds = tuple(float(part) for part in spec.split(":"))
+    except ValueError:
+        bounds = ()
+    if not sep or len(bounds) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"expected field=low:high[:step], got {text!r}")
+    return field, bounds
+
+def cmd_grid(args: argparse.Namespace) -> int:
+    from scenarios import ScenarioSet
+
+    base = read_records(args.base)[0] if args.base else SAMPLE_RECORD
+    ranges = dict(args.vary)
+    if args.samples:
+        scenarios = ScenarioSet.random(base, {field: bounds[:2] for field, bounds in ranges.items()},
+                                       args.samples, args.seed)
+    else:
+        steps = [field for field, bounds in ranges.items() if len(bounds) != 3]
+        if steps:
+            print(f"❌ Grid variations need a step (field=low:high:step): {', '.join(steps)}", file=sys.stderr)
+            return 2
+        scenarios = ScenarioSet.relative_grid(base, ranges)
+    fmt = output_format(args.output, args.format)
+
+    start = time.perf_counter()
+    result = scenarios.evaluate()
+    regions = result.regions()
+    elapsed = time.perf_counter() - start
+    if fmt == "json":
+        write_results({"scenarios": len(result), "shape": list(scenarios.shape), "varied": scenarios.varied,
+                       "regions": regions}, args.output, fmt)
+    else:
+        write_results(regions, args.output, fmt)
+    if not args.quiet:
+        print(result.format_regions(), file=sys.stderr)
+    report(args, len(result), elapsed)
+    return 0
+
+def cmd_enqueue(args: argparse.Namespace) -> int:
+    from worker import JobQueue
+
+    input_format = args.input_format or ("jsonl" if args.input == "-" else detect_format(args.input))
+    with JobQueue(args.queue) as queue:
+        queued = queue.enqueue_many(iter_records(args.input, input_format), args.entity_field)
+        depth = queue.depth()
+    if not args.quiet:
+        print(f"📥 {queued} jobs queued ({depth['queued']} waiting in {args.queue})", file=sys.stderr)
+    return 0
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    from worker import WorkerService, format_stats
+
+    def print_stats(stats: Dict[str, Any]) -> None:
+        if not args.quiet:
+            print(format_stats(stats), file=sys.stderr)
+
+    service = WorkerService(args.queue, args.output_dir, args.workers, args.batch_size, profile=args.profile,
+                            fmt=args.results_format)
+    with service:
+        try:
+            service.run_forever(args.stats_interval, print_stats, drain=args.drain)
+        except KeyboardInterrupt:
+            pass
+        print_stats(service.stats())
+    return 0
+
+def cmd_store(args: argparse.Namespace) -> int:
+    from columnar import ColumnStore
+    from ingest import raw_chunks
+
+    input_format = args.input_format or ("jsonl" if args.input == "-" else detect_format(args.input))
+    store = ColumnStore(args.store)
+    stored = rejected = seen = 0
+
+    def report_reject(record_number: int, record: Dict[str, Any], error: str) -> None:
+        nonlocal rejected
+        rejected += 1
+        if not args.quiet:
+            print(f"❌ Record {seen + record_number} rejected: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    for chunk in raw_chunks(iter_records(args.input, input_format), args.chunk_size):
+        stored += store.append_records(chunk, args.date_field, args.date, on_reject=report_reject)
+        seen += len(chunk)
+    report(args, stored, time.perf_counter() - start, rejected)
+    return 0
+
+def cmd_query(args: argparse.Namespace) -> int:
+    from columnar import ColumnStore
+
+    def report_matches(matches: int, elapsed: float) -> None:
+        if not args.quiet:
+            print(f"🔎 {matches} results matched in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+    store = ColumnStore(args.store)
+    filters = dict(start=args.start, end=args.end, where=args.where, alerts=args.alert, fired=args.fired,
+                   entities=args.entity)
+    start = time.perf_counter()
+    if args.count:
+        count = store.count(**filters)
+        report_matches(count, time.perf_counter() - start)
+        write_results({"count": count}, args.output, output_format(args.output, args.format))
+        return 0
+
+    columns = args.columns.split(",") if args.columns else None
+    result = store.query(columns=columns, **filters)
+    names = list(result)
+    rows = [dict(zip(names, values)) for values in zip(*(result[name].tolist() for name in names))]
+    elapsed = time.perf_counter() - start
+    write_results(rows, args.output, output_format(args.output, args.format, default="jsonl"))
+    report_matches(len(rows), elapsed)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    flags = argparse.ArgumentParser(add_help=False)
+    flags.add_argument("-q", "--quiet", action="store_true", help="no events, progress or throughput output")
+    flags.add_argument("-v", "--verbose", action="store_true", help="also dump node payloads on stderr")
+
+    common = argparse.ArgumentParser(add_help=False, parents=[flags])
+    common.add_argument("-o", "--output", default="-", help="results file ('-' for stdout)")
+    common.add_argument("--format", choices=OUTPUT_FORMATS, help="output format (default: from file name)")
+
+    parser = argparse.ArgumentParser(prog="agent.py", description="Business intelligence agent")
+    commands = parser.add_subparsers(dest="command")
+
+    analyze = commands.add_parser("analyze", parents=[common], help="analyze one record (or a few)")
+    analyze.add_argument("record", nargs="?", help="record as JSON (object, list or JSON lines); '-' for stdin")
+    analyze.add_argument("--sample", action="store_true", help="analyze the built-in sample record")
+    analyze.add_argument("--save", action="store_true", help="also write langgraph.json for the dashboard")
+    analyze.add_argument("--compact", action="store_true", help="run on the compact state (omits input_data)")
+    analyze.add_argument("--locale", help="message language in compact mode (en or fa)")
+    analyze.add_argument("--rules", help="JSON/YAML alert rules file")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    stream = commands.add_parser("stream", parents=[common], help="stream a CSV/JSONL file or stdin")
+    stream.add_argument("input", help="CSV or JSONL file of daily records ('-' for stdin)")
+    stream.add_argument("-f", "--input-format", choices=["csv", "jsonl"], help="input format (default: from file name)")
+    stream.add_argument("--workers", type=int, default=1, help="worker processes analyzing chunks")
+    stream.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per vectorized chunk")
+    stream.add_argument("--no-input", action="store_true", help="omit input_data from each result")
+    stream.add_argument("--checkpoint", help="SQLite checkpoint file; makes the run resumable after a crash")
+    stream.add_argument("--job-id", default="default", help="job name inside the checkpoint file")
+    stream.set_defaults(handler=cmd_stream)
+
+    scenarios = commands.add_parser("scenarios", parents=[common], help="run a scenario sweep")
+    scenarios.add_argument("--scenarios", help="JSON file of {name: record} (default: built-in scenarios)")
+    scenarios.add_argument("--workers", type=int, default=1, help="parallel workers (0 for one per CPU)")
+    scenarios.add_argument("--backend", choices=["thread", "process"], default="thread", help="worker pool type")
+    scenarios.add_argument("--per-scenario-files", action="store_true", help="also write langgraph_<name>.json files")
+    scenarios.set_defaults(handler=cmd_scenarios)
+
+    grid = commands.add_parser("grid", parents=[common], help="what-if grid around a record, summarized by alert region")
+    grid.add_argument("--base", help="base record as JSON ('-' for stdin; default: the sample record)")
+    grid.add_argument("--vary", type=parse_variation, action="append", required=True,
+                      help="relative change of one field, field=low:high:step (repeat to cross fields)")
+    grid.add_argument("--samples", type=int, help="draw this many random scenarios within low:high instead")
+    grid.add_argument("--seed", type=int, help="random seed for --samples")
+    grid.set_defaults(handler=cmd_grid)
+
+    enqueue = commands.add_parser("enqueue", parents=[flags], help="add a CSV/JSONL file of records to a job queue")
+    enqueue.add_argument("input", help="CSV or JSONL file of daily records ('-' for stdin)")
+    enqueue.add_argument("--queue", required=True, help="SQLite job queue file")
+    enqueue.add_argument("-f", "--input-format", choices=["csv", "jsonl"], help="input format (default: from file name)")
+    enqueue.add_argument("--entity-field", default="entity_id", help="record field that routes jobs to workers")
+    enqueue.set_defaults(handler=cmd_enqueue)
+
+    worker = commands.add_parser("worker", parents=[flags], help="run sharded worker processes on a job queue")
+    worker.add_argument("--queue", required=True, help="SQLite job queue file")
+    worker.add_argument("--output-dir", required=True, help="directory of per-worker results logs")
+    worker.add_argument("--workers", type=int, default=2, help="worker processes (entities are sharded across them)")
+    worker.add_argument("--batch-size", type=int, default=256, help="jobs claimed and written per batch")
+    worker.add_argument("--profile", choices=["full", "minimal"], default="full", help="output profile")
+    worker.add_argument("--results-format", choices=["jsonl", "msgpack"], default="jsonl", help="results log format")
+    worker.add_argument("--stats-interval", type=float, default=10.0, help="seconds between stats lines on stderr")
+    worker.add_argument("--drain", action="store_true", help="exit once the queue is empty instead of waiting")
+    worker.set_defaults(handler=cmd_worker)
+
+    store = commands.add_parser("store", parents=[flags], help="analyze a CSV/JSONL file into a columnar results store")
+    store.add_argument("input", help="CSV or JSONL file of daily records ('-' for stdin)")
+    store.add_argument("--store", required=True, help="columnar store directory")
+    store.add_argument("-f", "--input-format", choices=["csv", "jsonl"], help="input format (default: from file name)")
+    store.add_argument("--date-field", default="date", help="record field holding the partition date")
+    store.add_argument("--date", help="partition date for records without one (default: today)")
+    store.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per segment write")
+    store.set_defaults(handler=cmd_store)
+
+    query = commands.add_parser("query", parents=[common], help="filter results in a columnar store")
+    query.add_argument("--store", required=True, help="columnar store directory")
+    query.add_argument("--from", dest="start", help="first date (YYYY-MM-DD, inclusive)")
+    query.add_argument("--to", dest="end", help="last date (YYYY-MM-DD, inclusive)")
+    query.add_argument("--where", action="append", default=[], help="condition such as 'cac_change_percent > 20' (repeatable)")
+    query.add_argument("--alert", action="append", default=[], help="rule id that raised an alert (repeatable)")
+    query.add_argument("--fired", action="append", default=[], help="rule id whose condition held (repeatable)")
+    query.add_argument("--entity", action="append", help="entity id to include (repeatable)")
+    query.add_argument("--columns", help="comma-separated columns to return (default: all)")
+    query.add_argument("--count", action="store_true", help="only count the matching results")
+    query.set_defaults(handler=cmd_query)
+
+    # Dispatched to server.main before parsing; listed here for --help
+    commands.add_parser("serve", help="serve the live dashboard (--host, --port, --preload, ...)", add_help=False)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; without a command, analyze the sample record and save langgraph.json"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        argv = ["analyze", "--sample", "--save"]
+    if argv[0] == "serve":
+        from server import main as serve_main
+        return serve_main(argv[1:])
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        build_parser().print_help()
+        return 2
+
+    if args.quiet:
+        previous = events.set_observer(None)
+    else:
+        previous = events.set_observer(events.ConsoleObserver(stream=sys.stderr,
+                                                              level=events.DEBUG if args.verbose else events.INFO))
+    try:
+        return args.handler(args)
+    except (ValueError, OSError) as error:
+        # Bad input records, rule files or paths: one line instead of a traceback
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    finally:
+        events.set_observer(previous)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from datetime import date
+import json
+import os
+import shutil
+import time
+import numpy as np
+from core import REQUIRED_FIELDS, CAC_ALERT_THRESHOLD, DEFAULT_RULES
+from batch import ColumnarBatch, compute_metrics_batch, to_columns, validated_columns
+from rules import RuleSet, parse_comparison
+from ingest import RejectHandler
+from schema import DEFAULT_SCHEMA
+
+# Typed columns of every segment: inputs, metrics, output flags and rule bitmasks
+COLUMN_TYPES = {
+    "daily_revenue": np.float64,
+    "daily_cost": np.float64,
+    "number_of_customers": np.int64,
+    "previous_day_revenue": np.float64,
+    "previous_day_cost": np.float64,
+    "previous_day_customers": np.int64,
+    "daily_profit": np.float64,
+    "current_cac": np.float64,
+    "previous_cac": np.float64,
+    "revenue_change_percent": np.float64,
+    "cost_change_percent": np.float64,
+    "cac_change_percent": np.float64,
+    "profit_positive": np.bool_,
+    "cac_alert": np.bool_,
+    "total_alerts": np.uint8,
+    "total_recommendations": np.uint8,
+    # Bit i: rule i of the segment's rule list fired / raised an alert
+    "fired": np.uint64,
+    "alerts": np.uint64,
+    # Index into the segment's entity list, -1 without an entity id
+    "entity": np.int32,
+}
+
+MAX_RULES = 64
+
+_META_FILE = "_meta.json"
+
+Condition = Union[str, Tuple[str, str, float]]
+
+def _parse_condition(condition: Condition) -> Tuple[str, Any, float]:
+    """("cac_change_percent", ">", 20) or the same as text, "cac_change_percent > 20" """
+    column, op, value = parse_comparison(condition)
+    if column not in COLUMN_TYPES or column in ("fired", "alerts", "entity"):
+        raise ValueError(f"Unknown column in condition: {column}")
+    return column, op, value
+
+def _partition_name(value: Any) -> str:
+    """A date as its YYYY-MM-DD partition name (ValueError for anything else)"""
+    text = str(value)
+    try:
+        valid = date.fromisoformat(text).isoformat() == text
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Invalid date {value!r} (expected YYYY-MM-DD)")
+    return text
+
+def _rule_bits(masks: Mapping[str, np.ndarray], rule_ids: Sequence[str], size: int) -> np.ndarray:
+    bits = np.zeros(size, dtype=np.uint64)
+    for bit, rule_id in enumerate(rule_ids):
+        bits |= masks[rule_id].astype(np.uint64) << np.uint64(bit)
+    return bits
+
+def _message_counts(masks: Mapping[str, np.ndarray], rules: RuleSet, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Alert bitmask plus alert and recommendation counts per row, without rendering messages"""
+    alerts = np.zeros(size, dtype=np.uint64)
+    alert_count = np.zeros(size, dtype=np.uint8)
+    recommendation_count = np.zeros(size, dtype=np.uint8)
+    for bit, rule in enumerate(rules.rules):
+        fired = masks[rule.rule_id]
+        for outcome, rows in ((rule.then, fired), (rule.otherwise, ~fired)):
+            if outcome is None:
+                continue
+            if outcome.alert:
+                alerts |= rows.astype(np.uint64) << np.uint64(bit)
+                alert_count += rows
+            if outcome.recommendation:
+                recommendation_count += rows
+    return alerts, alert_count, recommendation_count
+
+class Segment:
+    """One immutable block of results in a date partition, with memory-mapped columns
+
+    Columns are opened lazily with np.load(mmap_mode="r"), so a query only pages in the
+    columns it touches and filtering works on the file pages directly, without copies.
+    """
+
+    def __init__(self, path: str, partition: str):
+        self.path = path
+        self.date = partition
+        with open(os.path.join(path, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.rule_ids: List[str] = meta["rules"]
+        self.entities: List[str] = meta["entities"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """A read-only, memory-mapped column"""
+        array = self._columns.get(name)
+        if array is None:
+            if name not in COLUMN_TYPES:
+                raise KeyError(f"Unknown column: {name}")
+            array = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+            self._columns[name] = array
+        return array
+
+    def _bit_mask(self, column: str, rule_id: str) -> np.ndarray:
+        if rule_id not in self.rule_ids:
+            return np.zeros(self.rows, dtype=bool)
+        bit = np.uint64(1) << np.uint64(self.rule_ids.index(rule_id))
+        return (self.column(column) & bit) != 0
+
+    def fired(self, rule_id: str) -> np.ndarray:
+        """Rows where a rule's condition held"""
+        return self._bit_mask("fired", rule_id)
+
+    def alerted(self, rule_id: str) -> np.ndarray:
+        """Rows where a rule raised an alert"""
+        return self._bit_mask("alerts", rule_id)
+
+    def bitmask(self, column: str, rule_ids: Sequence[str]) -> np.ndarray:
+        """A "fired"/"alerts" column re-encoded over `rule_ids` (a no-op view when the rule lists match)"""
+        bits = self.column(column)
+        if list(rule_ids) == self.rule_ids:
+            return bits
+        remapped = np.zeros(self.rows, dtype=np.uint64)
+        for bit, rule_id in enumerate(rule_ids):
+            if rule_id in self.rule_ids:
+                remapped |= self._bit_mask(column, rule_id).astype(np.uint64) << np.uint64(bit)
+        return remapped
+
+    def entity_ids(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Entity id per row (None where missing), as an object array"""
+        codes = self.column("entity")
+        if rows is not None:
+            codes = codes[rows]
+        lookup = np.array(self.entities + [None], dtype=object)
+        return lookup[codes]
+
+    def close(self) -> None:
+        """Drop the memory maps (needed before the files can be removed on some platforms)"""
+        self._columns.clear()
+
+class ColumnStore:
+    """Results as typed NumPy columns in date partitions: `root/2024-06-30/seg-.../<column>.npy`
+
+    Every append writes a new segment directory under a temporary name and renames it
+    into place, so readers never see a partial segment and writers need no locks. Alerts
+    are stored as bitmasks over the segment's rule list, which lets a query such as "CAC
+    alerts last month" read two small columns per segment instead of parsing results.
+    """
+
+    def __init__(self, root: str, rules: Optional[RuleSet] = None):
+        self.root = root
+        self.rules = rules or DEFAULT_RULES
+        if len(self.rules) > MAX_RULES:
+            raise ValueError(f"At most {MAX_RULES} rules fit in the alert bitmask, got {len(self.rules)}")
+        os.makedirs(root, exist_ok=True)
+
+    def partitions(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """Partition dates (YYYY-MM-DD) present in the store, optionally within [start, end]"""
+        names = sorted(name for name in os.listdir(self.root)
+                       if os.path.isdir(os.path.join(self.root, name)) and not name.startswith("."))
+        return [name for name in names if (start is None or name >= start) and (end is None or name <= end)]
+
+    def segments(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Segment]:
+        """Segments of the partitions within [start, end], in date and write order"""
+        for partition in self.partitions(start, end):
+            directory = os.path.join(self.root, partition)
+            for name in sorted(os.listdir(directory)):
+                if name.startswith("seg-"):
+                    yield Segment(os.path.join(directory, name), partition)
+
+    def _write_segment(self, partition: str, columns: Dict[str, np.ndarray], entities: List[str]) -> str:
+        directory = os.path.join(self.root, partition)
+        os.makedirs(directory, exist_ok=True)
+        name = f"seg-{time.time_ns():020d}-{os.getpid()}"
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        os.makedirs(tmp_path)
+        try:
+            for column, values in columns.items():
+                np.save(os.path.join(tmp_path, f"{column}.npy"), values, allow_pickle=False)
+            meta = {"rows": len(columns["entity"]), "rules": [rule.rule_id for rule in self.rules.rules],
+                    "entities": entities, "columns": {column: values.dtype.str for column, values in columns.items()}}
+            with open(os.path.join(tmp_path, _META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            path = os.path.join(directory, name)
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return path
+
+    def append_batch(self, batch: ColumnarBatch, dates: Union[str, date, Sequence[Any], None] = None,
+                     entity_ids: Optional[Sequence[Any]] = None, validate: bool = True) -> int:
+        """Analyze a columnar batch and store it; returns the number of rows written
+
+        `dates` is one date for the whole batch or one per row (default: today); rows are
+        split into one segment per date. Entity ids come from `entity_ids` or an
+        "entity_id" column of the batch. With `validate` the columns go through the
+        DEFAULT_SCHEMA checks first and an invalid row raises ValueError before anything
+        is written.
+        """
+        inputs = validated_columns(batch) if validate else to_columns(batch)
+        size = len(inputs[REQUIRED_FIELDS[0]])
+        if not size:
+            return 0
+        metrics = compute_metrics_batch(inputs)
+        masks = self.rules.evaluate_batch(metrics)
+        alerts, alert_count, recommendation_count = _message_counts(masks, self.rules, size)
+
+        columns = {field: np.asarray(inputs[field]).astype(COLUMN_TYPES[field], copy=False) for field in REQUIRED_FIELDS}
+        columns.update(metrics)
+        columns["profit_positive"] = metrics["daily_profit"] > 0
+        columns["cac_alert"] = metrics["cac_change_percent"] > CAC_ALERT_THRESHOLD
+        columns["total_alerts"] = alert_count
+        columns["total_recommendations"] = recommendation_count
+        columns["fired"] = _rule_bits(masks, [rule.rule_id for rule in self.rules.rules], size)
+        columns["alerts"] = alerts
+
+        if entity_ids is None and "entity_id" in batch:
+            entity_ids = batch["entity_id"]
+        if entity_ids is None:
+            entity_ids = np.full(size, None, dtype=object)
+        entity_ids = np.asarray(entity_ids, dtype=object)
+
+        # Every partition date is checked before the first segment is written
+        if dates is None or isinstance(dates, (str, date)):
+            groups = [(_partition_name(dates or date.today().isoformat()), slice(None))]
+        else:
+            keys, inverse = np.unique(np.asarray([str(value) for value in dates]), return_inverse=True)
+            groups = [(_partition_name(key), inverse == index) for index, key in enumerate(keys.tolist())]
+
+        for partition, rows in groups:
+            part_entities = entity_ids[rows]
+            present = np.array([value is not None for value in part_entities.tolist()], dtype=bool)
+            names, codes = np.unique(part_entities[present].astype(str), return_inverse=True)
+            entity = np.full(len(part_entities), -1, dtype=np.int32)
+            entity[present] = codes
+            part_columns = {name: values[rows] for name, values in columns.items()}
+            part_columns["entity"] = entity
+            self._write_segment(partition, part_columns, names.tolist())
+        return size
+
+    def append_records(self, records: Sequence[Mapping[str, Any]], date_field: str = "date",
+                       default_date: Optional[str] = None, on_reject: Optional[RejectHandler] = None) -> int:
+        """Validate and store per-record dicts (date from `date_field`, else `default_date` or today)
+
+        Invalid records, including empty or malformed dates, go to `on_reject(record_number,
+        record, error)` and are skipped; without a handler the first one raises ValueError
+        and nothing is stored. Only records without a date get the default. Returns the
+        number of rows stored.
+        """
+        result = DEFAULT_SCHEMA.validate_records(records)
+        rejected = dict(result.rejected)
+        fallback = default_date or date.today().isoformat()
+        rows = np.flatnonzero(result.valid).tolist()
+        dates = []
+        keep = np.ones(len(rows), dtype=bool)
+        for position, row in enumerate(rows):
+            value = records[row].get(date_field)
+            try:
+                dates.append(fallback if value is None else _partition_name(value))
+            except ValueError as error:
+                dates.append(None)
+                rejected[row] = f"{date_field}: {error}"
+                keep[position] = False
+
+        for row in sorted(rejected):
+            if on_reject is None:
+                raise ValueError(f"Record {row + 1}: {rejected[row]}")
+            on_reject(row + 1, records[row], rejected[row])
+        rows = [row for row, kept in zip(rows, keep.tolist()) if kept]
+        if not rows:
+            return 0
+        return self.append_batch({field: column[keep] for field, column in result.columns.items()},
+                                 dates=[value for value, kept in zip(dates, keep.tolist()) if kept],
+                                 entity_ids=[records[row].get("entity_id") for row in rows], validate=False)
+
+    def _select(self, segment: Segment, where: Sequence[Tuple[str, Any, float]], alerts: Sequence[str],
+                fired: Sequence[str], entities: Optional[set]) -> Optional[np.ndarray]:
+        """Row mask of a segment (None when nothing can match)"""
+        mask = np.ones(len(segment), dtype=bool)
+        for rule_id in alerts:
+            mask &= segment.alerted(rule_id)
+        for rule_id in fired:
+            mask &= segment.fired(rule_id)
+        if entities is not None:
+            codes = [code for code, name in enumerate(segment.entities) if name in entities]
+            if not codes:
+                return None
+            mask &= np.isin(segment.column("entity"), codes)
+        for column, op, value in where:
+            if not mask.any():
+                return None
+            mask &= op(segment.column(column), value)
+        return mask
+
+    def count(self, start: Optional[str] = None, end: Optional[str] = None, where: Sequence[Condition] = (),
+              alerts: Sequence[str] = (), fired: Sequence[str] = (),
+              entities: Optional[Sequence[str]] = None) -> int:
+        """Number of stored results matching a query, without materializing any rows"""
+        conditions = [_parse_condition(condition) for condition in where]
+        wanted = set(entities) if entities is not None else None
+        total = 0
+        for segment in self.segments(start, end):
+            mask = self._select(segment, conditions, alerts, fired, wanted)
+            if mask is not None:
+                total += int(np.count_nonzero(mask))
+        return total
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, where: Sequence[Condition] = (),
+              alerts: Sequence[str] = (), fired: Sequence[str] = (), entities: Optional[Sequence[str]] = None,
+              columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Matching results as concatenated columns, plus "date" and "entity_id"
+
+        Filters combine with AND: dates within [start, end] (inclusive, ISO strings), numeric
+        `where` conditions such as "cac_change_percent > 20" or ("daily_profit", "<", 0),
+        rule ids that raised an `alerts` or whose condition `fired`, and entity ids. Only
+        the requested `columns` (default: all) are copied out, and only for matching rows.
+        """
+        conditions = [_parse_condition(condition) for condition in where]
+        wanted = set(entities) if entities is not None else None
+        names = list(columns) if columns is not None else [name for name in COLUMN_TYPES if name != "entity"]
+        unknown = [name for name in names if name not in COLUMN_TYPES and name not in ("date", "entity_id")]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}")
+
+        rule_ids = [rule.rule_id for rule in self.rules.rules]
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in ["date", "entity_id"] + names}
+        for segment in self.segments(start, end):
+            mask = self._select(segment, conditions, alerts, fired, wanted)
+            if mask is None:
+                continue
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                continue
+            parts["date"].append(np.full(len(rows), segment.date, dtype=object))
+            parts["entity_id"].append(segment.entity_ids(rows))
+            for name in names:
+                if name in ("fired", "alerts"):
+                    # Segments written under other rules are re-encoded over the store's rule list
+                    parts[name].append(segment.bitmask(name, rule_ids)[rows])
+                elif name not in ("date", "entity_id"):
+                    parts[name].append(np.asarray(segment.column(name)[rows]))
+
+        result = {}
+        for name, chunks in parts.items():
+            if chunks:
+                result[name] = np.concatenate(chunks)
+            else:
+                result[name] = np.zeros(0, dtype=object if name in ("date", "entity_id") else COLUMN_TYPES[name])
+        return result
+
+    def rule_names(self, bits: int) -> List[str]:
+        """Rule ids encoded in one "alerts"/"fired" value returned by `query`"""
+        return [rule.rule_id for bit, rule in enumerate(self.rules.rules) if int(bits) >> bit & 1]
@@ -0,0 +1,282 @@
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime
+from typing_extensions import TypedDict
+import numpy as np
+import events
+from core import (CAC_ALERT_THRESHOLD, DEFAULT_RULES, METRIC_TABLE, NUMERIC_METRICS, evaluate_metrics,
+                  profit_status)
+from batch import ColumnarBatch, compute_metrics_batch, to_columns, validated_columns
+from rules import RuleSet
+from schema import DEFAULT_SCHEMA
+
+# Metric fields, in the order of CompactMetrics slots and RECORD_DTYPE columns
+METRIC_FIELDS = NUMERIC_METRICS
+
+# Every metric name of calculate_metrics; profit_status is derived from daily_profit
+METRIC_NAMES = tuple(METRIC_TABLE)
+
+# One row per record: the metrics plus a bitmask of fired rules (bit i = rule i)
+RECORD_DTYPE = np.dtype([(field, np.float64) for field in METRIC_FIELDS] + [("fired", np.uint64)])
+
+# Message translations keyed by the English text (or template) they replace
+TRANSLATIONS: Dict[str, Dict[str, str]] = {
+    "en": {},
+    "fa": {
+        "⚠️ Daily profit is negative": "⚠️ سود روزانه منفی است",
+        "🚨 CAC increased by {cac_change_percent:.1f}% (>20% threshold)":
+            "🚨 هزینه جذب مشتری {cac_change_percent:.1f}% افزایش یافته است (بیش از آستانه ۲۰٪)",
+        "📉 Revenue declined significantly": "📉 درآمد به‌طور قابل توجهی کاهش یافته است",
+        "💰 Costs increased significantly": "💰 هزینه‌ها به‌طور قابل توجهی افزایش یافته‌اند",
+        "Reduce operational costs to improve profitability": "هزینه‌های عملیاتی را برای بهبود سودآوری کاهش دهید",
+        "✅ Maintain current profitable operations": "✅ عملیات سودآور فعلی را ادامه دهید",
+        "Review marketing campaigns and optimize customer acquisition strategies":
+            "کمپین‌های بازاریابی را بازبینی و استراتژی جذب مشتری را بهینه کنید",
+        "📈 Strong revenue growth detected - consider increasing advertising budget":
+            "📈 رشد قوی درآمد - افزایش بودجه تبلیغات را در نظر بگیرید",
+        "Investigate market conditions and adjust sales strategy": "شرایط بازار را بررسی و استراتژی فروش را تنظیم کنید",
+        "Review and optimize cost structure": "ساختار هزینه‌ها را بازبینی و بهینه کنید",
+        "🎯 Business is growing profitably - consider scaling operations":
+            "🎯 کسب‌وکار با سودآوری در حال رشد است - گسترش عملیات را در نظر بگیرید",
+    },
+}
+
+class CompactMetrics:
+    """Fixed-layout metrics of one record (no per-record dict)
+
+    Supports `metrics["name"]` and `**metrics`, so rule sets and message templates
+    accept it wherever they accept the metrics dict.
+    """
+
+    __slots__ = METRIC_FIELDS
+
+    def __init__(self, daily_profit: float, current_cac: float, previous_cac: float,
+                 revenue_change_percent: float, cost_change_percent: float, cac_change_percent: float):
+        self.daily_profit = daily_profit
+        self.current_cac = current_cac
+        self.previous_cac = previous_cac
+        self.revenue_change_percent = revenue_change_percent
+        self.cost_change_percent = cost_change_percent
+        self.cac_change_percent = cac_change_percent
+
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> "CompactMetrics":
+        """Metrics of one record from core.METRIC_TABLE, so values match calculate_metrics bit for bit"""
+        return cls(**evaluate_metrics(data, metrics=METRIC_FIELDS))
+
+    def __getitem__(self, name: str) -> float:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    @property
+    def profit_status(self) -> str:
+        return profit_status(self.daily_profit)
+
+    def keys(self) -> Tuple[str, ...]:
+        return METRIC_NAMES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in METRIC_NAMES}
+
+def fired_mask(rules: RuleSet, metrics: Any) -> int:
+    """Bitmask of the rules whose condition holds (bit i = rule i)"""
+    mask = 0
+    for index, matched in enumerate(rules.fired(metrics)):
+        if matched:
+            mask |= 1 << index
+    return mask
+
+class MessageCatalog:
+    """Localized alert and recommendation templates of a rule set, indexed by rule
+
+    Built once per (rule set, locale); rendering a record then only formats the messages
+    of the rules its bitmask selects.
+    """
+
+    def __init__(self, rules: RuleSet, locale: str = "en"):
+        if locale not in TRANSLATIONS:
+            raise ValueError(f"Unknown locale: {locale} (expected one of {sorted(TRANSLATIONS)})")
+        translate = TRANSLATIONS[locale]
+
+        def localize(text: Optional[str]) -> Optional[str]:
+            return translate.get(text, text) if text else None
+
+        self.locale = locale
+        # Per rule: ((alert, recommendation) when fired, (alert, recommendation) otherwise)
+        self.entries = []
+        for rule in rules.rules:
+            otherwise = rule.otherwise
+            self.entries.append((
+                (localize(rule.then.alert), localize(rule.then.recommendation)),
+                (localize(otherwise.alert), localize(otherwise.recommendation)) if otherwise else (None, None)
+            ))
+
+    def render(self, mask: int, metrics: Any) -> Tuple[List[str], List[str]]:
+        """Alert and recommendation texts for a fired-rules bitmask, in rule order"""
+        alerts: List[str] = []
+        recommendations: List[str] = []
+        for index, branches in enumerate(self.entries):
+            alert, recommendation = branches[0] if mask >> index & 1 else branches[1]
+            if alert:
+                alerts.append(alert.format(**metrics) if "{" in alert else alert)
+            if recommendation:
+                recommendations.append(recommendation.format(**metrics) if "{" in recommendation else recommendation)
+        return alerts, recommendations
+
+def render_output(metrics: Any, mask: int, catalog: MessageCatalog, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """Output dict for one compact record, in the same shape as output_node (without input_data)"""
+    now = timestamp or datetime.now()
+    alerts, recommendations = catalog.render(mask, metrics)
+    daily_profit = metrics["daily_profit"]
+    cac_change = metrics["cac_change_percent"]
+    return {
+        "analysis_timestamp": now.isoformat(),
+        "profit_loss_status": {
+            "daily_profit": daily_profit,
+            "status": profit_status(daily_profit),
+            "revenue_change_percent": round(metrics["revenue_change_percent"], 2),
+            "cost_change_percent": round(metrics["cost_change_percent"], 2)
+        },
+        "customer_acquisition": {
+            "current_cac": round(metrics["current_cac"], 2),
+            "previous_cac": round(metrics["previous_cac"], 2),
+            "cac_change_percent": round(cac_change, 2),
+            "cac_alert": cac_change > CAC_ALERT_THRESHOLD
+        },
+        "alerts": alerts,
+        "recommendations": recommendations,
+        "summary": {
+            "total_alerts": len(alerts),
+            "total_recommendations": len(recommendations),
+            "analysis_date": now.strftime("%Y-%m-%d"),
+            "agent_version": "1.0.0"
+        }
+    }
+
+class CompactState(TypedDict):
+    """Pipeline state in compact mode: slotted metrics and a fired-rules bitmask instead of text lists"""
+    input_data: Dict[str, Any]
+    metrics: Optional[CompactMetrics]
+    fired: int
+    output: Dict[str, Any]
+
+def compact_input_node(state: CompactState) -> CompactState:
+    """Validate the input record (numeric strings are parsed into a copy of the caller's dict)"""
+    data = dict(state.get("input_data", {}))
+    error = DEFAULT_SCHEMA.check(data)
+    if error is not None:
+        raise ValueError(error)
+    state["input_data"] = data
+    return state
+
+def compact_processing_node(state: CompactState) -> CompactState:
+    """Calculate metrics into a slotted object"""
+    state["metrics"] = CompactMetrics.from_record(state["input_data"])
+    if events.is_enabled(events.DEBUG):
+        events.emit("payload", events.DEBUG, node="processing", data=state["metrics"].to_dict())
+    return state
+
+def make_compact_recommendation_node(rules: RuleSet):
+    """Build a node that records which rules fired as a bitmask"""
+    def compact_recommendation_node(state: CompactState) -> CompactState:
+        """Evaluate the rules without rendering any text"""
+        state["fired"] = fired_mask(rules, state["metrics"])
+        return state
+
+    return compact_recommendation_node
+
+def make_compact_output_node(rules: RuleSet, locale: str = "en"):
+    """Build a node that renders the bitmask to localized text (input_data is not copied)"""
+    catalog = MessageCatalog(rules, locale)
+
+    def compact_output_node(state: CompactState) -> CompactState:
+        """Format final output"""
+        state["output"] = render_output(state["metrics"], state["fired"], catalog)
+        return state
+
+    return compact_output_node
+
+def compact_nodes(rules: Optional[RuleSet] = None, locale: str = "en") -> Dict[str, Any]:
+    """Graph nodes of the compact pipeline, keyed like create_business_agent's nodes"""
+    rules = rules or DEFAULT_RULES
+    return {
+        "input": compact_input_node,
+        "processing": compact_processing_node,
+        "recommendation": make_compact_recommendation_node(rules),
+        "output": make_compact_output_node(rules, locale)
+    }
+
+class CompactBatch:
+    """Analysis results of a batch as one structured array (56 bytes per record)
+
+    Messages are kept as the fired-rules bitmask and only rendered, in any locale,
+    when outputs are requested.
+    """
+
+    def __init__(self, records: np.ndarray, rules: RuleSet):
+        self.records = records
+        self.rules = rules
+        self._catalogs: Dict[str, MessageCatalog] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def catalog(self, locale: str = "en") -> MessageCatalog:
+        """Message catalog of this batch's rules for a locale (built once)"""
+        catalog = self._catalogs.get(locale)
+        if catalog is None:
+            catalog = self._catalogs[locale] = MessageCatalog(self.rules, locale)
+        return catalog
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes
+
+    def fired(self, rule_id: str) -> np.ndarray:
+        """Boolean mask of the rows where a rule fired"""
+        for index, rule in enumerate(self.rules.rules):
+            if rule.rule_id == rule_id:
+                return (self.records["fired"] >> np.uint64(index)) & np.uint64(1) == 1
+        raise KeyError(rule_id)
+
+    def output(self, index: int, locale: str = "en") -> Dict[str, Any]:
+        """Rendered output of one row"""
+        row = self.records[index]
+        metrics = {field: float(row[field]) for field in METRIC_FIELDS}
+        metrics["profit_status"] = profit_status(metrics["daily_profit"])
+        return render_output(metrics, int(row["fired"]), self.catalog(locale))
+
+    def outputs(self, locale: str = "en", start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Rendered outputs of a row range, produced lazily"""
+        catalog = self.catalog(locale)
+        now = datetime.now()
+        rows = self.records[start:stop]
+        columns = [rows[field].tolist() for field in METRIC_FIELDS]
+        masks = rows["fired"].tolist()
+        for i, mask in enumerate(masks):
+            metrics = {field: column[i] for field, column in zip(METRIC_FIELDS, columns)}
+            metrics["profit_status"] = profit_status(metrics["daily_profit"])
+            yield render_output(metrics, mask, catalog, now)
+
+def analyze_batch_compact(batch: ColumnarBatch, rules: Optional[RuleSet] = None,
+                          validate: bool = True) -> CompactBatch:
+    """Vectorized analysis into a CompactBatch instead of one output dict per row
+
+    Rows are checked against the input schema as in run_business_analysis_batch (the first
+    invalid row raises ValueError) unless `validate=False`.
+    """
+    rules = rules or DEFAULT_RULES
+    if len(rules) > 64:
+        raise ValueError(f"Compact batches hold at most 64 rules in their bitmask, got {len(rules)}")
+    metrics = compute_metrics_batch(validated_columns(batch) if validate else to_columns(batch))
+    masks = rules.evaluate_batch(metrics)
+
+    records = np.empty(len(metrics["daily_profit"]), dtype=RECORD_DTYPE)
+    for field in METRIC_FIELDS:
+        records[field] = metrics[field]
+    fired = np.zeros(len(records), dtype=np.uint64)
+    for index, rule in enumerate(rules.rules):
+        fired |= masks[rule.rule_id].astype(np.uint64) << np.uint64(index)
+    records["fired"] = fired
+    return CompactBatch(records, rules)
@@ -0,0 +1,110 @@
+from typing import Dict, Any, Callable, Mapping, Sequence
+import operator
+from rules import compile_rules
+
+# Fields every input record must provide
+REQUIRED_FIELDS = ["daily_revenue", "daily_cost", "number_of_customers",
+                   "previous_day_revenue", "previous_day_cost", "previous_day_customers"]
+
+# Alert thresholds (percent change versus previous day)
+CAC_ALERT_THRESHOLD = 20
+REVENUE_GROWTH_THRESHOLD = 10
+REVENUE_DECLINE_THRESHOLD = -10
+COST_INCREASE_THRESHOLD = 15
+
+# Alert and recommendation texts
+ALERT_NEGATIVE_PROFIT = "⚠️ Daily profit is negative"
+ALERT_CAC_INCREASE = "🚨 CAC increased by {cac_change_percent:.1f}% (>20% threshold)"
+ALERT_REVENUE_DECLINE = "📉 Revenue declined significantly"
+ALERT_COST_INCREASE = "💰 Costs increased significantly"
+REC_REDUCE_COSTS = "Reduce operational costs to improve profitability"
+REC_MAINTAIN_OPERATIONS = "✅ Maintain current profitable operations"
+REC_REVIEW_MARKETING = "Review marketing campaigns and optimize customer acquisition strategies"
+REC_INCREASE_ADVERTISING = "📈 Strong revenue growth detected - consider increasing advertising budget"
+REC_INVESTIGATE_MARKET = "Investigate market conditions and adjust sales strategy"
+REC_OPTIMIZE_COSTS = "Review and optimize cost structure"
+REC_SCALE_OPERATIONS = "🎯 Business is growing profitably - consider scaling operations"
+
+# Output shapes: "full" (agent.py) and "minimal" (simple_agent.py, without timestamp,
+# previous CAC, agent version and input echo)
+OUTPUT_PROFILES = ("full", "minimal")
+
+# Fields a record needs when previous-day values come from a HistoryStore
+HISTORY_REQUIRED_FIELDS = ["entity_id", "date", "daily_revenue", "daily_cost", "number_of_customers"]
+
+def safe_divide(numerator: float, denominator: float) -> float:
+    """numerator / denominator, 0 when the denominator is not positive"""
+    return numerator / denominator if denominator > 0 else 0
+
+def percent_change(current: float, previous: float) -> float:
+    """Percent change versus previous, 0 when previous is not positive"""
+    return ((current - previous) / previous * 100) if previous > 0 else 0
+
+def profit_status(daily_profit: float) -> str:
+    return "positive" if daily_profit > 0 else "negative"
+
+# Every metric as (operation, inputs), where inputs are input fields or metrics listed
+# before it. This is the single definition of the metric math: calculate_metrics applies
+# it to one record and batch.compute_metrics_batch to whole columns, each with its own
+# implementation of the operations
+METRIC_TABLE = {
+    "daily_profit": ("subtract", ("daily_revenue", "daily_cost")),
+    "current_cac": ("divide", ("daily_cost", "number_of_customers")),
+    "previous_cac": ("divide", ("previous_day_cost", "previous_day_customers")),
+    "revenue_change_percent": ("percent_change", ("daily_revenue", "previous_day_revenue")),
+    "cost_change_percent": ("percent_change", ("daily_cost", "previous_day_cost")),
+    "cac_change_percent": ("percent_change", ("current_cac", "previous_cac")),
+    "profit_status": ("profit_status", ("daily_profit",)),
+}
+
+# Per-record implementations of the METRIC_TABLE operations
+SCALAR_OPERATIONS = {
+    "subtract": operator.sub,
+    "divide": safe_divide,
+    "percent_change": percent_change,
+    "profit_status": profit_status,
+}
+
+# Inputs of each metric, used to recompute only what a corrected field affects
+METRIC_DEPENDENCIES = {metric: inputs for metric, (_, inputs) in METRIC_TABLE.items()}
+
+# Numeric metrics in table order (all but the derived profit_status label)
+NUMERIC_METRICS = tuple(metric for metric, (operation, _) in METRIC_TABLE.items() if operation != "profit_status")
+
+def evaluate_metric(metric: str, values: Mapping[str, Any], operations: Mapping[str, Callable] = SCALAR_OPERATIONS) -> Any:
+    """One metric of METRIC_TABLE over `values` (inputs and the metrics it reads)"""
+    operation, inputs = METRIC_TABLE[metric]
+    return operations[operation](*[values[name] for name in inputs])
+
+def evaluate_metrics(values: Mapping[str, Any], operations: Mapping[str, Callable] = SCALAR_OPERATIONS,
+                     metrics: Sequence[str] = tuple(METRIC_TABLE)) -> Dict[str, Any]:
+    """The given metrics of METRIC_TABLE (in table order, with every metric they read) over a record or columns"""
+    scope = dict(values)
+    results = {}
+    for metric in metrics:
+        results[metric] = scope[metric] = evaluate_metric(metric, scope, operations)
+    return results
+
+def calculate_metrics(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Calculate key business metrics for one record"""
+    return evaluate_metrics(data)
+
+# The built-in thresholds expressed as rules; tenants can load their own with rules.load_rules
+DEFAULT_RULE_SPECS = [
+    {"id": "negative_profit", "when": {"metric": "daily_profit", "op": "<", "value": 0},
+     "then": {"alert": ALERT_NEGATIVE_PROFIT, "recommendation": REC_REDUCE_COSTS},
+     "else": {"recommendation": REC_MAINTAIN_OPERATIONS}},
+    {"id": "cac_increase", "when": {"metric": "cac_change_percent", "op": ">", "value": CAC_ALERT_THRESHOLD},
+     "then": {"alert": ALERT_CAC_INCREASE, "recommendation": REC_REVIEW_MARKETING}},
+    {"id": "revenue_growth", "when": {"metric": "revenue_change_percent", "op": ">", "value": REVENUE_GROWTH_THRESHOLD},
+     "then": {"recommendation": REC_INCREASE_ADVERTISING}},
+    {"id": "revenue_decline", "when": {"metric": "revenue_change_percent", "op": "<", "value": REVENUE_DECLINE_THRESHOLD},
+     "then": {"alert": ALERT_REVENUE_DECLINE, "recommendation": REC_INVESTIGATE_MARKET}},
+    {"id": "cost_increase", "when": {"metric": "cost_change_percent", "op": ">", "value": COST_INCREASE_THRESHOLD},
+     "then": {"alert": ALERT_COST_INCREASE, "recommendation": REC_OPTIMIZE_COSTS}},
+    {"id": "profitable_growth", "when": {"all": [{"metric": "revenue_change_percent", "op": ">", "value": 0},
+                                                 {"metric": "daily_profit", "op": ">", "value": 0}]},
+     "then": {"recommendation": REC_SCALE_OPERATIONS}},
+]
+
+DEFAULT_RULES = compile_rules(DEFAULT_RULE_SPECS)
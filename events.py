@@ -0,0 +1,142 @@
+from typing import Dict, Any, Callable, Iterator, List, Optional, TextIO
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import json
+import sys
+import time
+
+# Event levels (same numbers as the logging module)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+# Lowest level any installed observer wants; above every level when nobody listens,
+# so the disabled path is a single integer comparison
+_DISABLED = sys.maxsize
+_observer: Optional["Observer"] = None
+_min_level = _DISABLED
+
+class Observer(ABC):
+    """Receives structured events at or above its level; subclasses implement on_event"""
+
+    def __init__(self, level: int = INFO):
+        self.level = level
+
+    @abstractmethod
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Handle one event dict ("event", "level", "time" plus the emitted fields)"""
+
+class CollectingObserver(Observer):
+    """Keeps every event in memory (handy for tests and ad-hoc inspection)"""
+
+    def __init__(self, level: int = DEBUG):
+        super().__init__(level)
+        self.events: List[Dict[str, Any]] = []
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+
+    def named(self, name: str) -> List[Dict[str, Any]]:
+        """Events with the given name, in emission order"""
+        return [event for event in self.events if event["event"] == name]
+
+class JsonLinesObserver(Observer):
+    """Writes each event as one JSON line (for log shippers)"""
+
+    def __init__(self, stream: Optional[TextIO] = None, level: int = INFO):
+        super().__init__(level)
+        self.stream = stream or sys.stderr
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        self.stream.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+# Console rendering of node completions, keyed by node name
+_NODE_MESSAGES = {
+    "input": "✅ Input data validated",
+    "processing": "📊 Metrics calculated",
+    "recommendation": "💡 Generated {alerts} alerts and {recommendations} recommendations",
+    "output": "📋 Final output generated",
+    "analysis": "📋 Analysis generated with {alerts} alerts and {recommendations} recommendations",
+}
+
+class ConsoleObserver(Observer):
+    """Human-readable console output, as printed by the CLI"""
+
+    def __init__(self, stream: Optional[TextIO] = None, level: int = INFO):
+        super().__init__(level)
+        self.stream = stream
+
+    def _write(self, message: str) -> None:
+        print(message, file=self.stream or sys.stdout)
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        name = event["event"]
+        if name == "node_completed":
+            template = _NODE_MESSAGES.get(event["node"], "✔️ Node {node} completed")
+            message = template.format(node=event["node"], **event.get("counts", {}))
+            self._write(f"{message} ({event['duration_ms']:.2f} ms)")
+        elif name == "payload":
+            self._write(f"🔎 {event['node']}: {json.dumps(event['data'], indent=2, ensure_ascii=False, default=str)}")
+        elif name == "analysis_started":
+            self._write("🚀 Starting business analysis...")
+        elif name == "analysis_completed":
+            self._write(f"✅ Analysis completed! ({event['duration_ms']:.2f} ms)")
+        elif name == "results_saved":
+            self._write(f"💾 Results saved to {event['path']}")
+        elif name == "save_failed":
+            self._write(f"❌ Error saving to {event['path']}: {event['error']}")
+        elif "message" in event:
+            self._write(event["message"])
+
+def set_observer(observer: Optional[Observer]) -> Optional[Observer]:
+    """Install the process-wide observer (None disables events) and return the previous one"""
+    global _observer, _min_level
+    previous = _observer
+    _observer = observer
+    _min_level = observer.level if observer is not None else _DISABLED
+    return previous
+
+def get_observer() -> Optional[Observer]:
+    """The currently installed observer, if any"""
+    return _observer
+
+def is_enabled(level: int = INFO) -> bool:
+    """Whether an event at `level` would be delivered; guard expensive payloads with this"""
+    return level >= _min_level
+
+def emit(name: str, level: int = INFO, **fields: Any) -> None:
+    """Deliver a structured event to the observer, if one listens at this level"""
+    if level < _min_level:
+        return
+    event = {"event": name, "level": level, "time": time.time()}
+    event.update(fields)
+    _observer.on_event(event)
+
+@contextmanager
+def observing(observer: Optional[Observer]) -> Iterator[Optional[Observer]]:
+    """Temporarily install an observer"""
+    previous = set_observer(observer)
+    try:
+        yield observer
+    finally:
+        set_observer(previous)
+
+def _state_counts(state: Dict[str, Any]) -> Dict[str, int]:
+    """Sizes of the collection fields of a pipeline state"""
+    return {key: len(value) for key, value in state.items() if isinstance(value, (list, dict))}
+
+def observed_node(name: str, node: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Wrap a graph node so it reports its duration and state counts when events are enabled"""
+    def wrapped(state: Any) -> Any:
+        if INFO < _min_level:
+            return node(state)
+        start = time.perf_counter()
+        result = node(state)
+        emit("node_completed", node=name, duration_ms=(time.perf_counter() - start) * 1000,
+             counts=_state_counts(result))
+        return result
+
+    wrapped.__name__ = getattr(node, "__name__", name)
+    wrapped.__doc__ = node.__doc__
+    return wrapped
@@ -0,0 +1,174 @@
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Sequence
+import numpy as np
+from core import REQUIRED_FIELDS, DEFAULT_RULES
+from batch import ColumnarBatch, build_outputs, compute_metrics_batch, to_columns, validated_columns
+from rules import RuleSet
+
+class Hierarchy:
+    """Entity tree (e.g. store -> region -> company) laid out as arrays for vectorized roll-ups
+
+    Nodes are numbered so that every level can be folded into its parents with one
+    scatter-add; parents that are referenced but not declared become roots.
+    """
+
+    def __init__(self, parents: Mapping[Any, Optional[Any]]):
+        ids: List[str] = []
+        index: Dict[str, int] = {}
+
+        def intern(entity_id: Any) -> int:
+            key = str(entity_id)
+            position = index.get(key)
+            if position is None:
+                position = index[key] = len(ids)
+                ids.append(key)
+            return position
+
+        pairs = [(intern(child), intern(parent) if parent is not None and parent != "" else -1)
+                 for child, parent in parents.items()]
+        parent = np.full(len(ids), -1, dtype=np.int64)
+        for child, parent_index in pairs:
+            if child == parent_index:
+                raise ValueError(f"Entity {ids[child]} cannot be its own parent")
+            parent[child] = parent_index
+
+        self.ids = ids
+        self.index = index
+        self.parent = parent
+        self.level = self._levels(parent, ids)
+        # Child-to-parent edges grouped by level, deepest first
+        self._folds = [np.flatnonzero(self.level == depth) for depth in range(int(self.level.max(initial=0)), 0, -1)]
+
+    @staticmethod
+    def _levels(parent: np.ndarray, ids: List[str]) -> np.ndarray:
+        """Depth of every node (roots are level 0); raises on cycles"""
+        level = np.full(len(parent), -1, dtype=np.int64)
+        level[parent < 0] = 0
+        pending = np.flatnonzero(level < 0)
+        while len(pending):
+            parent_level = level[parent[pending]]
+            ready = parent_level >= 0
+            if not ready.any():
+                raise ValueError(f"Cycle in entity hierarchy involving {ids[int(pending[0])]}")
+            level[pending[ready]] = parent_level[ready] + 1
+            pending = pending[~ready]
+        return level
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]], entity_field: str = "entity_id",
+                     parent_field: str = "parent_id", parents: Optional[Mapping[Any, Optional[Any]]] = None) -> "Hierarchy":
+        """Build the tree from records carrying entity and parent ids
+
+        Upper levels that have no records of their own (region -> company) come from `parents`.
+        """
+        edges = dict(parents or {})
+        for record in records:
+            entity_id = record[entity_field]
+            edges[entity_id] = record.get(parent_field, edges.get(entity_id))
+        return cls(edges)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def indices(self, entity_ids: Sequence[Any]) -> np.ndarray:
+        """Node index of each entity id"""
+        try:
+            return np.fromiter((self.index[str(entity_id)] for entity_id in entity_ids), dtype=np.int64,
+                               count=len(entity_ids))
+        except KeyError as e:
+            raise ValueError(f"Unknown entity: {e.args[0]}") from None
+
+    def fold(self, totals: np.ndarray) -> np.ndarray:
+        """Add every node's totals into all of its ancestors, in place (totals is nodes x fields)"""
+        for nodes in self._folds:
+            np.add.at(totals, self.parent[nodes], totals[nodes])
+        return totals
+
+class RollupAccumulator:
+    """Streaming sums of the additive input fields per entity, rolled up on `result()`
+
+    Feed it record chunks with `add`; memory is one row per entity regardless of how
+    many records are streamed through.
+    """
+
+    def __init__(self, hierarchy: Hierarchy):
+        self.hierarchy = hierarchy
+        self.totals = np.zeros((len(hierarchy), len(REQUIRED_FIELDS)), dtype=np.float64)
+        self.record_counts = np.zeros(len(hierarchy), dtype=np.int64)
+
+    def add(self, entity_ids: Sequence[Any], batch: ColumnarBatch, validate: bool = True) -> None:
+        """Accumulate a columnar chunk whose rows belong to `entity_ids`
+
+        Rows are checked against the input schema first (the first invalid row raises
+        ValueError and nothing is added) unless `validate=False`.
+        """
+        columns = validated_columns(batch) if validate else to_columns(batch)
+        if len(entity_ids) != len(columns[REQUIRED_FIELDS[0]]):
+            raise ValueError(f"Got {len(entity_ids)} entity ids for {len(columns[REQUIRED_FIELDS[0]])} rows")
+        nodes = self.hierarchy.indices(entity_ids)
+        values = np.column_stack([columns[field] for field in REQUIRED_FIELDS]).astype(np.float64, copy=False)
+        np.add.at(self.totals, nodes, values)
+        np.add.at(self.record_counts, nodes, 1)
+
+    def add_records(self, records: Sequence[Mapping[str, Any]], entity_field: str = "entity_id") -> None:
+        """Accumulate per-record dicts"""
+        self.add([record[entity_field] for record in records],
+                 {field: [record[field] for record in records] for field in REQUIRED_FIELDS})
+
+    def result(self, rules: Optional[RuleSet] = None) -> "Rollup":
+        """Roll the sums up the tree and compute metrics for every level"""
+        totals = self.hierarchy.fold(self.totals.copy())
+        counts = self.hierarchy.fold(self.record_counts.astype(np.float64)[:, None])[:, 0].astype(np.int64)
+        return Rollup(self.hierarchy, totals, counts, rules or DEFAULT_RULES)
+
+class Rollup:
+    """Rolled-up sums and metrics of every entity (leaves and every ancestor level)
+
+    Profit and percentage changes come from the summed revenue and cost; CAC is blended,
+    i.e. summed cost over summed customers, not an average of the children's CAC.
+    """
+
+    def __init__(self, hierarchy: Hierarchy, totals: np.ndarray, record_counts: np.ndarray, rules: RuleSet):
+        self.hierarchy = hierarchy
+        self.rules = rules
+        self.record_counts = record_counts
+        self.columns = {field: totals[:, i] for i, field in enumerate(REQUIRED_FIELDS)}
+        self.metrics = compute_metrics_batch(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.hierarchy)
+
+    def metric(self, entity_id: Any, name: str) -> float:
+        """One metric (or summed input field) of one entity"""
+        position = self.hierarchy.index[str(entity_id)]
+        source = self.metrics if name in self.metrics else self.columns
+        return float(source[name][position])
+
+    def outputs(self, level: Optional[int] = None, include_input: bool = True) -> List[Dict[str, Any]]:
+        """Analysis output per entity, shaped like run_business_analysis plus entity_id, parent_id and level
+
+        `input_data` holds the rolled-up sums. Pass `level` to only render one level
+        (0 is the top of the tree).
+        """
+        hierarchy = self.hierarchy
+        rows = np.arange(len(hierarchy)) if level is None else np.flatnonzero(hierarchy.level == level)
+        columns = {field: column[rows] for field, column in self.columns.items()}
+        metrics = {name: values[rows] for name, values in self.metrics.items()}
+        outputs = build_outputs(columns, metrics, self.rules, include_input)
+        for row, output in zip(rows.tolist(), outputs):
+            parent = hierarchy.parent[row]
+            output["entity_id"] = hierarchy.ids[row]
+            output["parent_id"] = hierarchy.ids[parent] if parent >= 0 else None
+            output["level"] = int(hierarchy.level[row])
+            output["record_count"] = int(self.record_counts[row])
+        return outputs
+
+def rollup_records(records: Sequence[Mapping[str, Any]], parents: Optional[Mapping[Any, Optional[Any]]] = None,
+                   rules: Optional[RuleSet] = None, entity_field: str = "entity_id",
+                   parent_field: str = "parent_id") -> Rollup:
+    """Roll up records tagged with entity and parent ids in one call
+
+    `parents` adds the edges of upper levels, e.g. {"north": "acme", "south": "acme"}.
+    """
+    accumulator = RollupAccumulator(Hierarchy.from_records(records, entity_field, parent_field, parents))
+    accumulator.add_records(records, entity_field)
+    return accumulator.result(rules)
@@ -0,0 +1,168 @@
+from typing import Dict, Any, Hashable, Iterable, Optional, Tuple, Union
+from datetime import date, datetime
+import numpy as np
+from core import percent_change, safe_divide
+
+DateLike = Union[date, datetime, str, int]
+
+# Value columns kept per day
+REVENUE, COST, CUSTOMERS = 0, 1, 2
+
+def to_ordinal(value: DateLike) -> int:
+    """Convert a date, ISO date string or proleptic ordinal into an ordinal day number"""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10]).toordinal()
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    raise TypeError(f"Unsupported date value: {value!r}")
+
+class HistoryStore:
+    """Bounded, array-backed per-entity daily time series
+
+    Each entity owns one row of fixed-size ring buffers indexed by `ordinal % retention_days`,
+    so a lookup by (entity, date) is a single slot check and old days are evicted simply by
+    being overwritten. Rolling-window sums are maintained incrementally: appending the next
+    consecutive day costs O(1) regardless of how much history is kept.
+    """
+
+    def __init__(self, retention_days: int = 28, rolling_days: int = 7, initial_entities: int = 1024):
+        if retention_days <= 7:
+            raise ValueError("retention_days must be greater than 7 to support week-over-week metrics")
+        if not 1 <= rolling_days <= retention_days:
+            raise ValueError("rolling_days must be between 1 and retention_days")
+
+        self.retention_days = retention_days
+        self.rolling_days = rolling_days
+        capacity = max(1, initial_entities)
+        self._index: Dict[Hashable, int] = {}
+        self._dates = np.full((capacity, retention_days), -1, dtype=np.int64)
+        self._values = np.zeros((capacity, retention_days, 3), dtype=np.float64)
+        self._last = np.full(capacity, -1, dtype=np.int64)
+        self._window_sums = np.zeros((capacity, 3), dtype=np.float64)
+        self._window_counts = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, entity_id: Hashable) -> bool:
+        return entity_id in self._index
+
+    def _grow(self) -> None:
+        """Double the entity capacity of every backing array"""
+        capacity = len(self._last) * 2
+        extra = capacity - len(self._last)
+        self._dates = np.concatenate([self._dates, np.full((extra, self.retention_days), -1, dtype=np.int64)])
+        self._values = np.concatenate([self._values, np.zeros((extra, self.retention_days, 3))])
+        self._last = np.concatenate([self._last, np.full(extra, -1, dtype=np.int64)])
+        self._window_sums = np.concatenate([self._window_sums, np.zeros((extra, 3))])
+        self._window_counts = np.concatenate([self._window_counts, np.zeros(extra, dtype=np.int64)])
+
+    def _row(self, entity_id: Hashable) -> int:
+        """Row of an entity, allocating one on first sight"""
+        row = self._index.get(entity_id)
+        if row is None:
+            row = len(self._index)
+            if row == len(self._last):
+                self._grow()
+            self._index[entity_id] = row
+        return row
+
+    def _lookup(self, row: int, ordinal: int) -> Optional[np.ndarray]:
+        """Values stored for an ordinal day, or None when that day is missing or evicted"""
+        slot = ordinal % self.retention_days
+        if self._dates[row, slot] != ordinal:
+            return None
+        return self._values[row, slot]
+
+    def get(self, entity_id: Hashable, day: DateLike) -> Optional[Dict[str, float]]:
+        """Return the stored record of an entity for a day, or None"""
+        row = self._index.get(entity_id)
+        if row is None:
+            return None
+        values = self._lookup(row, to_ordinal(day))
+        if values is None:
+            return None
+        return {"daily_revenue": float(values[REVENUE]), "daily_cost": float(values[COST]),
+                "number_of_customers": float(values[CUSTOMERS])}
+
+    def _slide_window(self, row: int, last: int, ordinal: int) -> None:
+        """Remove the days that fall out of the rolling window when moving from `last` to `ordinal`"""
+        if last < 0:
+            return
+        if ordinal - self.rolling_days >= last:
+            # The whole previous window has expired
+            self._window_sums[row] = 0
+            self._window_counts[row] = 0
+            return
+        # Days last-W+1 .. ordinal-W leave the window: exactly one for consecutive days
+        for day in range(last - self.rolling_days + 1, ordinal - self.rolling_days + 1):
+            values = self._lookup(row, day)
+            if values is not None:
+                self._window_sums[row] -= values
+                self._window_counts[row] -= 1
+
+    def append(self, entity_id: Hashable, day: DateLike, daily_revenue: float, daily_cost: float,
+               number_of_customers: float) -> Dict[str, Any]:
+        """Record one day for an entity and return its comparison data
+
+        Appending the latest day again replaces it (late corrections). Returns the
+        `previous_day_*` fields expected by processing_node plus a `trends` dict with
+        week-over-week and rolling-window metrics.
+        """
+        row = self._row(entity_id)
+        ordinal = to_ordinal(day)
+        last = int(self._last[row])
+        if ordinal < last:
+            raise ValueError(f"Out-of-order day for entity {entity_id!r}: {day} is before the latest recorded day")
+
+        slot = ordinal % self.retention_days
+        values = (daily_revenue, daily_cost, number_of_customers)
+        if ordinal == last:
+            self._window_sums[row] -= self._values[row, slot]
+        else:
+            self._slide_window(row, last, ordinal)
+            self._window_counts[row] += 1
+            self._dates[row, slot] = ordinal
+            self._last[row] = ordinal
+        self._values[row, slot] = values
+        self._window_sums[row] += values
+
+        return self._comparison(row, ordinal, values)
+
+    def _comparison(self, row: int, ordinal: int, values: Tuple[float, float, float]) -> Dict[str, Any]:
+        """Build previous-day fields and trend metrics for the day just appended"""
+        revenue, cost, _ = values
+        previous = self._lookup(row, ordinal - 1)
+        week_ago = self._lookup(row, ordinal - 7)
+        sums = self._window_sums[row]
+        count = int(self._window_counts[row])
+
+        prev_revenue, prev_cost, prev_customers = (float(v) for v in previous) if previous is not None else (0, 0, 0)
+        week_revenue, week_cost = (float(week_ago[REVENUE]), float(week_ago[COST])) if week_ago is not None else (0, 0)
+        window_revenue, window_cost, window_customers = (float(v) for v in sums)
+
+        return {
+            "previous_day_revenue": prev_revenue,
+            "previous_day_cost": prev_cost,
+            "previous_day_customers": prev_customers,
+            "trends": {
+                "week_over_week_revenue_percent": percent_change(revenue, week_revenue),
+                "week_over_week_cost_percent": percent_change(cost, week_cost),
+                "rolling_window_days": self.rolling_days,
+                "rolling_days_observed": count,
+                "rolling_revenue_avg": window_revenue / count if count else 0,
+                "rolling_cost_avg": window_cost / count if count else 0,
+                "rolling_profit_avg": (window_revenue - window_cost) / count if count else 0,
+                "rolling_cac": safe_divide(window_cost, window_customers)
+            }
+        }
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append many records carrying entity_id, date and the three daily fields"""
+        for record in records:
+            self.append(record["entity_id"], record["date"], record["daily_revenue"],
+                        record["daily_cost"], record["number_of_customers"])
@@ -0,0 +1,188 @@
+from typing import Dict, Any, Callable, Hashable, List, Mapping, Optional, Set, Tuple
+from core import (CAC_ALERT_THRESHOLD, DEFAULT_RULES, METRIC_DEPENDENCIES, OUTPUT_PROFILES,
+                  calculate_metrics, evaluate_metric)
+from rules import RuleSet
+from schema import DEFAULT_SCHEMA
+
+# Output fields rebuilt from metrics: (path, metrics read, value), formatted as output_node does
+OUTPUT_FIELDS: List[Tuple[Tuple[str, str], Tuple[str, ...], Callable[[Mapping[str, Any]], Any]]] = [
+    (("profit_loss_status", "daily_profit"), ("daily_profit",), lambda m: m["daily_profit"]),
+    (("profit_loss_status", "status"), ("profit_status",), lambda m: m["profit_status"]),
+    (("profit_loss_status", "revenue_change_percent"), ("revenue_change_percent",),
+     lambda m: round(m["revenue_change_percent"], 2)),
+    (("profit_loss_status", "cost_change_percent"), ("cost_change_percent",),
+     lambda m: round(m["cost_change_percent"], 2)),
+    (("customer_acquisition", "current_cac"), ("current_cac",), lambda m: round(m["current_cac"], 2)),
+    (("customer_acquisition", "previous_cac"), ("previous_cac",), lambda m: round(m["previous_cac"], 2)),
+    (("customer_acquisition", "cac_change_percent"), ("cac_change_percent",),
+     lambda m: round(m["cac_change_percent"], 2)),
+    (("customer_acquisition", "cac_alert"), ("cac_change_percent",),
+     lambda m: m["cac_change_percent"] > CAC_ALERT_THRESHOLD),
+]
+
+def _affected_metrics(fields: Set[str]) -> List[str]:
+    """Metrics downstream of the given input fields, in evaluation order"""
+    affected: Set[str] = set()
+    ordered = []
+    for metric, inputs in METRIC_DEPENDENCIES.items():
+        if any(name in fields or name in affected for name in inputs):
+            affected.add(metric)
+            ordered.append(metric)
+    return ordered
+
+class IncrementalAnalysis:
+    """One analyzed record that keeps its metrics and rule outcomes, so corrections are cheap
+
+    `update` follows the dependency graph from input fields to the metrics of
+    processing_node (core.METRIC_DEPENDENCIES), then to the rules reading those metrics
+    (RuleSet.dependencies), and recomputes only that part. Propagation stops at any metric
+    whose value did not change. The output is patched in place, and the return value is
+    the diff. The analysis timestamp of the original output is kept.
+    """
+
+    def __init__(self, record: Mapping[str, Any], rules: Optional[RuleSet] = None, profile: str = "full"):
+        from agent import minimal_output_node, output_node
+
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {profile} (expected one of {OUTPUT_PROFILES})")
+        data = dict(record)
+        error = DEFAULT_SCHEMA.check(data)
+        if error:
+            raise ValueError(error)
+        self.rules = rules or DEFAULT_RULES
+        self.profile = profile
+        self.input_data = data
+        self.metrics = calculate_metrics(data)
+
+        # Per-rule outcome (alert, recommendation) so lists can be reassembled after a change
+        self.fired = self.rules.fired(self.metrics)
+        self.outcomes = [self._render(position, fired) for position, fired in enumerate(self.fired)]
+        alerts, recommendations = self._messages()
+
+        node = output_node if profile == "full" else minimal_output_node
+        state = {"input_data": data, "metrics": self.metrics, "alerts": alerts,
+                 "recommendations": recommendations, "output": {}}
+        self.output = node(state)["output"]
+
+        # Rules per metric, to find the rules a changed metric can flip
+        self._rules_by_metric: Dict[str, List[int]] = {}
+        dependencies = self.rules.dependencies()
+        for position, rule in enumerate(self.rules.rules):
+            for metric in dependencies[rule.rule_id]:
+                self._rules_by_metric.setdefault(metric, []).append(position)
+
+    def _render(self, position: int, fired: bool) -> Tuple[Optional[str], Optional[str]]:
+        rule = self.rules.rules[position]
+        outcome = rule.then if fired else rule.otherwise
+        return outcome.render(self.metrics) if outcome is not None else (None, None)
+
+    def _messages(self) -> Tuple[List[str], List[str]]:
+        alerts = [alert for alert, _ in self.outcomes if alert]
+        recommendations = [recommendation for _, recommendation in self.outcomes if recommendation]
+        return alerts, recommendations
+
+    def update(self, changes: Mapping[str, Any]) -> Dict[str, Any]:
+        """Apply corrected input values and return what changed
+
+        The diff lists the changed input `fields`, the `metrics` whose values changed, the
+        `rules` whose outcome changed, and `changes`: {"customer_acquisition.current_cac":
+        {"old": ..., "new": ...}, "alerts": {...}, ...} for every output field that differs.
+        Invalid corrections raise ValueError and leave the analysis untouched.
+        """
+        candidate = {**self.input_data, **changes}
+        error = DEFAULT_SCHEMA.check(candidate)
+        if error:
+            raise ValueError(error)
+        fields = {name for name in changes if candidate[name] != self.input_data.get(name)}
+        diff: Dict[str, Any] = {"fields": sorted(fields), "metrics": [], "rules": [], "changes": {}}
+        if not fields:
+            return diff
+        old_input = {name: self.input_data.get(name) for name in fields}
+        self.input_data = candidate
+
+        # Metrics: recompute downstream of the changed fields, cut off where values are equal
+        values = dict(candidate)
+        values.update(self.metrics)
+        changed: Set[str] = set(fields)
+        for metric in _affected_metrics(fields):
+            if not any(name in changed for name in METRIC_DEPENDENCIES[metric]):
+                continue
+            value = evaluate_metric(metric, values)
+            if value != self.metrics[metric]:
+                self.metrics[metric] = values[metric] = value
+                changed.add(metric)
+                diff["metrics"].append(metric)
+
+        # Rules: only those reading a changed metric
+        positions = sorted({position for metric in diff["metrics"]
+                            for position in self._rules_by_metric.get(metric, ())})
+        if positions:
+            for position, fired in zip(positions, self.rules.fired_subset(self.metrics, positions)):
+                self.fired[position] = fired
+                outcome = self._render(position, fired)
+                if outcome != self.outcomes[position]:
+                    self.outcomes[position] = outcome
+                    diff["rules"].append(self.rules.rules[position].rule_id)
+
+        self._patch(diff, changed, old_input)
+        return diff
+
+    def _set(self, diff: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+        target = self.output
+        for key in path[:-1]:
+            target = target[key]
+        old = target[path[-1]]
+        if old != value:
+            target[path[-1]] = value
+            diff["changes"][".".join(path)] = {"old": old, "new": value}
+
+    def _patch(self, diff: Dict[str, Any], changed: Set[str], old_input: Dict[str, Any]) -> None:
+        """Rewrite only the output fields that depend on something that changed"""
+        output = self.output
+        for path, metrics, value in OUTPUT_FIELDS:
+            if path[1] in output[path[0]] and any(metric in changed for metric in metrics):
+                self._set(diff, path, value(self.metrics))
+
+        if diff["rules"]:
+            alerts, recommendations = self._messages()
+            for key, new in (("alerts", alerts), ("recommendations", recommendations)):
+                old = output[key]
+                if old != new:
+                    output[key] = new
+                    diff["changes"][key] = {"old": old, "new": new,
+                                            "added": [message for message in new if message not in old],
+                                            "removed": [message for message in old if message not in new]}
+            self._set(diff, ("summary", "total_alerts"), len(alerts))
+            self._set(diff, ("summary", "total_recommendations"), len(recommendations))
+
+        if "input_data" in output:
+            output["input_data"] = self.input_data
+            for name, old in old_input.items():
+                diff["changes"][f"input_data.{name}"] = {"old": old, "new": self.input_data[name]}
+
+class IncrementalAnalyzer:
+    """Incremental analyses of many records by key (e.g. (entity_id, date)) for streams of corrections"""
+
+    def __init__(self, rules: Optional[RuleSet] = None, profile: str = "full"):
+        self.rules = rules or DEFAULT_RULES
+        self.profile = profile
+        self.analyses: Dict[Hashable, IncrementalAnalysis] = {}
+
+    def __len__(self) -> int:
+        return len(self.analyses)
+
+    def analyze(self, key: Hashable, record: Mapping[str, Any]) -> Dict[str, Any]:
+        """Analyze a record from scratch (replacing any earlier one under `key`) and return its output"""
+        analysis = IncrementalAnalysis(record, self.rules, self.profile)
+        self.analyses[key] = analysis
+        return analysis.output
+
+    def correct(self, key: Hashable, changes: Mapping[str, Any]) -> Dict[str, Any]:
+        """Apply a correction to the record under `key` and return the diff (KeyError if unknown)"""
+        return self.analyses[key].update(changes)
+
+    def output(self, key: Hashable) -> Dict[str, Any]:
+        return self.analyses[key].output
+
+    def forget(self, key: Hashable) -> None:
+        self.analyses.pop(key, None)
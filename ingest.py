@@ -0,0 +1,149 @@
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+import csv
+import io
+import sys
+import time
+import numpy as np
+import orjson
+from schema import DEFAULT_SCHEMA, Schema
+from batch import run_business_analysis_batch
+from persistence import ResultsLog, encode_records
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+RejectHandler = Callable[[int, Dict[str, Any], str], None]
+
+def detect_format(path: str) -> str:
+    """Guess the record format (csv or jsonl) from a file name"""
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    raise ValueError(f"Cannot detect format of {path!r}, pass fmt='csv' or fmt='jsonl'")
+
+def _open_text(path: str) -> io.TextIOBase:
+    """Open a path for streaming text reads ('-' means stdin)"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records one at a time from a CSV or JSONL file without loading it into memory"""
+    fmt = fmt or detect_format(path)
+    with _open_text(path) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+        else:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+def raw_chunks(records: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Raw (unvalidated) records in lists of chunk_size"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def chunk_key_columns(chunk: List[Dict[str, Any]], valid: np.ndarray, first_number: int) -> Dict[str, List[Any]]:
+    """Join keys of a chunk's valid rows: source record numbers, plus entity_id/date when records have them"""
+    rows = np.flatnonzero(valid)
+    keys: Dict[str, List[Any]] = {"record_number": (rows + first_number).tolist()}
+    for field in ("entity_id", "date"):
+        if any(field in record for record in chunk):
+            keys[field] = [chunk[row].get(field) for row in rows.tolist()]
+    return keys
+
+def iter_chunks(records: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                on_reject: Optional[RejectHandler] = None,
+                schema: Optional[Schema] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """Validate records column-wise in chunks of chunk_size rows and yield the valid rows as columns
+
+    Each chunk also carries the join keys of its rows (see chunk_key_columns), so every
+    result names the input record it came from even when rejected rows are skipped. Invalid
+    rows are passed to `on_reject(record_number, record, error)`; without a handler the
+    first invalid row raises ValueError, like input_node does.
+    """
+    schema = schema or DEFAULT_SCHEMA
+    first_number = 1
+    for chunk in raw_chunks(records, chunk_size):
+        result = schema.validate_records(chunk)
+        for row, error in result.rejected:
+            if on_reject is None:
+                raise ValueError(f"Record {first_number + row}: {error}")
+            on_reject(first_number + row, chunk[row], error)
+        if len(result):
+            yield {**result.columns, **chunk_key_columns(chunk, result.valid, first_number)}
+        first_number += len(chunk)
+
+def stream_analysis(path: str, fmt: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    on_reject: Optional[RejectHandler] = None,
+                    include_input: bool = True) -> Iterator[Dict[str, Any]]:
+    """Analyze a CSV/JSONL file chunk by chunk, yielding one result per valid record"""
+    for chunk in iter_chunks(iter_records(path, fmt), chunk_size, on_reject):
+        yield from run_business_analysis_batch(chunk, include_input=include_input, validate=False)
+
+def _encode_chunk(task: Tuple[Dict[str, np.ndarray], bool, str]) -> Tuple[bytes, int]:
+    """Analyze one chunk and encode its results (module-level so process pools can pickle it)"""
+    chunk, include_input, fmt = task
+    results = run_business_analysis_batch(chunk, include_input=include_input, validate=False)
+    return encode_records(results, fmt), len(results)
+
+def _ordered_map(executor: Executor, fn: Callable[[Any], Any], tasks: Iterable[Any], window: int) -> Iterator[Any]:
+    """Like executor.map, but with at most `window` tasks in flight so the input stays streamed"""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def ingest_file(path: str, destination: str, fmt: Optional[str] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, on_reject: Optional[RejectHandler] = None,
+                include_input: bool = True, output_format: Optional[str] = None,
+                workers: int = 1) -> Dict[str, Any]:
+    """Stream a CSV/JSONL file through the analysis into a results log ('-' for stdout)
+
+    The log is JSON lines, or msgpack for `output_format='msgpack'` / .msgpack destinations.
+    With `workers` > 1, chunks are analyzed and encoded in a process pool while this
+    process parses input and writes output; results keep the input order.
+    """
+    start = time.perf_counter()
+    rejected = 0
+
+    def count_reject(record_number: int, record: Dict[str, Any], error: str) -> None:
+        nonlocal rejected
+        rejected += 1
+        if on_reject is not None:
+            on_reject(record_number, record, error)
+
+    target = sys.stdout.buffer if destination == "-" else destination
+    # One buffered write per chunk keeps syscalls low while memory stays bounded by chunk_size
+    with ResultsLog(target, output_format, buffer_records=chunk_size, append=False) as log:
+        chunks = iter_chunks(iter_records(path, fmt), chunk_size, count_reject)
+        if workers > 1:
+            tasks = ((chunk, include_input, log.format) for chunk in chunks)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for block, count in _ordered_map(executor, _encode_chunk, tasks, workers * 2):
+                    log.write_encoded(block, count)
+        else:
+            for chunk in chunks:
+                log.write_many(run_business_analysis_batch(chunk, include_input=include_input, validate=False))
+    written = log.records_written
+
+    elapsed = time.perf_counter() - start
+    return {
+        "records_written": written,
+        "records_rejected": rejected,
+        "elapsed_seconds": elapsed,
+        "records_per_second": written / elapsed if elapsed > 0 else 0.0
+    }
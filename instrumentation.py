@@ -0,0 +1,153 @@
+from typing import Dict, Any, Callable, Iterable, Optional, Sequence
+import bisect
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+
+# Histogram bucket upper bounds in milliseconds
+DEFAULT_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, sum, min and max"""
+
+    __slots__ = ("bounds", "buckets", "count", "total_ms", "min_ms", "max_ms")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        # One extra bucket collects everything above the last bound
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float) -> None:
+        """Record one duration"""
+        self.buckets[bisect.bisect_left(self.bounds, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms < self.min_ms:
+            self.min_ms = duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) by interpolating inside the matching bucket"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max_ms
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                # Never report outside the observed range
+                return min(max(estimate, self.min_ms), self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary statistics plus raw bucket counts"""
+        return {
+            "calls": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {str(bound): count for bound, count in zip(self.bounds + ("+Inf",), self.buckets)}
+        }
+
+class Instrumentation:
+    """Per-node wall time, call counts and latency histograms for a compiled agent
+
+    Pass an instance to `create_business_agent(instrumentation=...)`; every node is then
+    timed and the numbers can be exported as JSON or Prometheus text.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: str, duration_ms: float) -> None:
+        """Record one node execution"""
+        with self._lock:
+            histogram = self._histograms.get(node)
+            if histogram is None:
+                histogram = self._histograms[node] = LatencyHistogram(self.buckets_ms)
+            histogram.observe(duration_ms)
+
+    def wrap(self, name: str, node: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Return a timed version of a graph node"""
+        def timed(state: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return node(state)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+
+        timed.__name__ = getattr(node, "__name__", name)
+        timed.__doc__ = node.__doc__
+        return timed
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics per node"""
+        with self._lock:
+            return {node: histogram.to_dict() for node, histogram in self._histograms.items()}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Statistics per node as a JSON document"""
+        return json.dumps({"nodes": self.snapshot()}, indent=indent)
+
+    def to_prometheus(self, prefix: str = "business_agent") -> str:
+        """Statistics in the Prometheus text exposition format (durations in seconds)"""
+        name = f"{prefix}_node_duration_seconds"
+        lines = [f"# HELP {name} Wall time spent in each graph node.", f"# TYPE {name} histogram"]
+        with self._lock:
+            for node, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{node="{node}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{node="{node}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{node="{node}"}} {histogram.total_ms / 1000:.9f}')
+                lines.append(f'{name}_count{{node="{node}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+def profile_batch(records: Iterable[Dict[str, Any]], output_path: str,
+                  analyze: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                  sort: str = "cumulative", limit: int = 30) -> str:
+    """Run a batch of analyses under cProfile, dump the raw stats to `output_path` and return a text report
+
+    The dump can be opened with `python -m pstats` or snakeviz.
+    """
+    if analyze is None:
+        from agent import run_business_analysis
+
+        def analyze(record: Dict[str, Any]) -> Any:
+            return run_business_analysis(record, save_to_file=False)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        for record in records:
+            analyze(record)
+    finally:
+        profiler.disable()
+    profiler.dump_stats(output_path)
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+    return report.getvalue()
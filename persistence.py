@@ -0,0 +1,144 @@
+from typing import Dict, Any, BinaryIO, Iterable, Iterator, Optional, Union
+import os
+import struct
+import threading
+import orjson
+import ormsgpack
+
+RESULT_FORMATS = ("jsonl", "msgpack")
+
+# msgpack records are framed with a 4-byte big-endian length so the log can be streamed back
+_FRAME = struct.Struct(">I")
+
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def dumps(data: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes with orjson (compact unless `pretty`)"""
+    return orjson.dumps(data, option=_JSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0))
+
+def write_json_atomic(data: Any, path: str, pretty: bool = False, fsync: bool = False) -> None:
+    """Write JSON to `path` atomically: readers see either the old file or the complete new one
+
+    The data is written to a temporary file in the same directory and renamed over the
+    target. With `fsync`, the bytes are flushed to disk before the rename.
+    """
+    payload = dumps(data, pretty)
+    # Same directory as the target so the rename never crosses filesystems
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def encode_record(record: Any, fmt: str) -> bytes:
+    """One record in results-log framing (a JSON line, or a length-prefixed msgpack frame)"""
+    if fmt == "jsonl":
+        return orjson.dumps(record, option=_JSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+    payload = ormsgpack.packb(record, option=ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS)
+    return _FRAME.pack(len(payload)) + payload
+
+def encode_records(records: Iterable[Any], fmt: str) -> bytes:
+    """Many records as one block that can be appended to a results log as is"""
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"Unsupported results format: {fmt} (expected one of {RESULT_FORMATS})")
+    return b"".join(encode_record(record, fmt) for record in records)
+
+def detect_results_format(path: str) -> str:
+    """Results log format from a file name (.msgpack/.mpk, otherwise jsonl)"""
+    return "msgpack" if path.lower().endswith((".msgpack", ".mpk")) else "jsonl"
+
+class ResultsLog:
+    """Append-only log of analysis results, as JSON lines or length-framed msgpack
+
+    Records are buffered and written in blocks, so bulk jobs write one file instead of
+    thousands of small pretty-printed ones. Accepts a path or an open binary stream.
+    """
+
+    def __init__(self, destination: Union[str, BinaryIO], fmt: Optional[str] = None, buffer_records: int = 1000,
+                 append: bool = True):
+        is_path = isinstance(destination, str)
+        fmt = fmt or (detect_results_format(destination) if is_path else "jsonl")
+        if fmt not in RESULT_FORMATS:
+            raise ValueError(f"Unsupported results format: {fmt} (expected one of {RESULT_FORMATS})")
+        if is_path:
+            self._stream = open(destination, "ab" if append else "wb")
+            self._owns_stream = True
+        else:
+            self._stream = destination
+            self._owns_stream = False
+        self.format = fmt
+        self.buffer_records = buffer_records
+        self.records_written = 0
+        self._buffer = []
+
+    def write(self, record: Any) -> None:
+        """Append one record"""
+        self._buffer.append(encode_record(record, self.format))
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def write_encoded(self, block: bytes, count: int) -> None:
+        """Append `count` records already encoded with encode_records (e.g. by a worker process)"""
+        self.flush()
+        self._stream.write(block)
+        self.records_written += count
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        """Append many records"""
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """Write buffered records to the underlying stream"""
+        if self._buffer:
+            self._stream.write(b"".join(self._buffer))
+            self.records_written += len(self._buffer)
+            self._buffer.clear()
+        self._stream.flush()
+
+    def tell(self) -> int:
+        """Byte offset of the stream, i.e. the end of everything flushed so far"""
+        return self._stream.tell()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_stream:
+            self._stream.close()
+
+    def __enter__(self) -> "ResultsLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+def read_results(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream records back from a results log"""
+    fmt = fmt or detect_results_format(path)
+    with open(path, "rb") as f:
+        if fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+        elif fmt == "msgpack":
+            while True:
+                header = f.read(_FRAME.size)
+                if not header:
+                    break
+                if len(header) < _FRAME.size:
+                    raise ValueError(f"Truncated record header in {path}")
+                (size,) = _FRAME.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size:
+                    raise ValueError(f"Truncated record in {path}")
+                yield ormsgpack.unpackb(payload)
+        else:
+            raise ValueError(f"Unsupported results format: {fmt}")
@@ -0,0 +1,78 @@
+from typing import Any, Callable, Hashable, Optional, Tuple
+from collections import OrderedDict
+import threading
+
+# Compiled agents kept at most; configs holding per-call objects (stores, detectors,
+# instrumentation) get an entry each, and the graph keeps those objects alive
+DEFAULT_CAPACITY = 32
+
+# Process-wide LRU cache of compiled agents, keyed by (variant, frozen config)
+_agents: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+_capacity = DEFAULT_CAPACITY
+_lock = threading.Lock()
+
+def _freeze(value: Any) -> Hashable:
+    """Turn a config value into a stable, hashable registry key component"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        # Unhashable config objects are keyed by identity
+        return ("id", id(value))
+    return value
+
+def set_capacity(capacity: int) -> int:
+    """Change how many compiled agents are kept (least recently used go first); returns the old value"""
+    global _capacity
+    if capacity < 1:
+        raise ValueError("capacity must be at least 1")
+    with _lock:
+        previous = _capacity
+        _capacity = capacity
+        _evict()
+    return previous
+
+def _evict() -> None:
+    """Drop least recently used agents beyond the capacity (caller holds the lock)"""
+    while len(_agents) > _capacity:
+        _agents.popitem(last=False)
+
+def get_compiled_agent(variant: str, builder: Callable[..., Any], **config: Any) -> Any:
+    """Return the compiled agent for a graph variant, building it on first use
+
+    At most `set_capacity` agents are kept; the least recently used one is dropped first,
+    so per-call objects in configs (and their graphs) do not live for the whole process.
+    """
+    key = (variant, _freeze(config))
+    with _lock:
+        agent = _agents.get(key)
+        if agent is not None:
+            _agents.move_to_end(key)
+            return agent
+        agent = builder(**config)
+        _agents[key] = agent
+        _evict()
+    return agent
+
+def invalidate(variant: Optional[str] = None) -> int:
+    """Drop compiled agents (all of them, or only one variant) and return how many were removed"""
+    with _lock:
+        if variant is None:
+            removed = len(_agents)
+            _agents.clear()
+            return removed
+
+        keys = [key for key in _agents if key[0] == variant]
+        for key in keys:
+            del _agents[key]
+        return len(keys)
+
+def compiled_count(variant: Optional[str] = None) -> int:
+    """Number of compiled agents currently held by the registry"""
+    with _lock:
+        if variant is None:
+            return len(_agents)
+        return sum(1 for key in _agents if key[0] == variant)
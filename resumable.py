@@ -0,0 +1,159 @@
+from typing import Dict, Any, Iterable, Optional
+from itertools import islice
+import os
+import sqlite3
+import time
+from batch import run_business_analysis_batch
+from core import DEFAULT_RULES
+from ingest import DEFAULT_CHUNK_SIZE, RejectHandler, chunk_key_columns, raw_chunks
+from schema import DEFAULT_SCHEMA
+from persistence import ResultsLog
+from rules import RuleSet
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    job_id TEXT PRIMARY KEY,
+    records_done INTEGER NOT NULL DEFAULT 0,
+    records_written INTEGER NOT NULL DEFAULT 0,
+    records_rejected INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    output_offset INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'running',
+    rules_fingerprint TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+class BatchCheckpoint:
+    """SQLite progress store for resumable batch jobs
+
+    Progress is one row per job, updated once per chunk in a single transaction that
+    records how many input records are done and how many output bytes belong to them.
+    Each job also keeps the fingerprint of the rules it started with, so a resume with
+    different rules is refused. WAL mode with synchronous=NORMAL keeps each commit cheap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        # Checkpoint files created before rules were recorded
+        if "rules_fingerprint" not in {row[1] for row in self._conn.execute("PRAGMA table_info(batch_jobs)")}:
+            self._conn.execute("ALTER TABLE batch_jobs ADD COLUMN rules_fingerprint TEXT")
+        self._conn.commit()
+
+    def load(self, job_id: str, rules_fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """Progress of a job, creating it on first use
+
+        Raises ValueError when the job was started with rules of another fingerprint.
+        """
+        row = self._conn.execute(
+            "SELECT records_done, records_written, records_rejected, chunks_done, output_offset, status, "
+            "rules_fingerprint FROM batch_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            now = time.time()
+            with self._conn:
+                self._conn.execute("INSERT INTO batch_jobs (job_id, rules_fingerprint, created_at, updated_at) "
+                                   "VALUES (?, ?, ?, ?)", (job_id, rules_fingerprint, now, now))
+            row = (0, 0, 0, 0, 0, "running", rules_fingerprint)
+        elif rules_fingerprint is not None and row[6] is not None and row[6] != rules_fingerprint:
+            raise ValueError(f"Job {job_id!r} was started with different rules; "
+                             f"use a new job id or reset the checkpoint to rerun it")
+        keys = ("records_done", "records_written", "records_rejected", "chunks_done", "output_offset", "status",
+                "rules_fingerprint")
+        return dict(zip(keys, row))
+
+    def commit_chunk(self, job_id: str, records_done: int, records_written: int, records_rejected: int,
+                     output_offset: int) -> None:
+        """Record that everything up to `records_done` input records is safely written"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE batch_jobs SET records_done = ?, records_written = ?, records_rejected = ?, "
+                "chunks_done = chunks_done + 1, output_offset = ?, updated_at = ? WHERE job_id = ?",
+                (records_done, records_written, records_rejected, output_offset, time.time(), job_id))
+
+    def mark_complete(self, job_id: str) -> None:
+        with self._conn:
+            self._conn.execute("UPDATE batch_jobs SET status = 'complete', updated_at = ? WHERE job_id = ?",
+                               (time.time(), job_id))
+
+    def reset(self, job_id: str) -> None:
+        """Forget a job so it starts from scratch next time"""
+        with self._conn:
+            self._conn.execute("DELETE FROM batch_jobs WHERE job_id = ?", (job_id,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+def run_resumable_batch(records: Iterable[Dict[str, Any]], output_path: str, checkpoint_path: str,
+                        job_id: str = "default", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        output_format: Optional[str] = None, rules: Optional[RuleSet] = None,
+                        on_reject: Optional[RejectHandler] = None, include_input: bool = True) -> Dict[str, Any]:
+    """Analyze a large, re-iterable record stream with crash recovery
+
+    Results are appended to `output_path` and progress is committed to a SQLite checkpoint
+    after every chunk. On restart with the same job id, records already done are skipped and
+    the output file is truncated back to the last committed chunk, so each record appears in
+    the output exactly once even if the previous run died mid-chunk. `records` must yield
+    the same records in the same order on every run (e.g. ingest.iter_records(path)).
+
+    Resuming with other `rules` than the job started with raises ValueError. When the
+    output file is missing or shorter than the committed progress, the job starts over.
+    """
+    fingerprint = (rules or DEFAULT_RULES).fingerprint
+    checkpoint = BatchCheckpoint(checkpoint_path)
+    try:
+        progress = checkpoint.load(job_id, fingerprint)
+        restarted = False
+        output_size = os.path.getsize(output_path) if os.path.exists(output_path) else None
+        if progress["records_done"] and (output_size is None or output_size < progress["output_offset"]):
+            # The output the checkpoint vouches for is gone, so nothing can be skipped
+            checkpoint.reset(job_id)
+            progress = checkpoint.load(job_id, fingerprint)
+            restarted = True
+        done = progress["records_done"]
+        written = progress["records_written"]
+        rejected = progress["records_rejected"]
+        if progress["status"] == "complete":
+            return {"job_id": job_id, "records_done": done, "records_written": written,
+                    "records_rejected": rejected, "records_skipped": done, "resumed": True,
+                    "restarted": False, "elapsed_seconds": 0.0, "records_per_second": 0.0}
+
+        # Drop output written after the last commit (a crash between write and commit)
+        if output_size is not None:
+            with open(output_path, "r+b") as f:
+                f.truncate(progress["output_offset"])
+
+        start = time.perf_counter()
+        skipped = done
+        iterator = islice(iter(records), done, None)
+        with ResultsLog(output_path, output_format, buffer_records=chunk_size) as log:
+            for chunk in raw_chunks(iterator, chunk_size):
+                validated = DEFAULT_SCHEMA.validate_records(chunk)
+                rejected += len(validated.rejected)
+                if on_reject is not None:
+                    for row, error in validated.rejected:
+                        on_reject(done + row + 1, chunk[row], error)
+
+                if len(validated):
+                    columns = {**validated.columns, **chunk_key_columns(chunk, validated.valid, done + 1)}
+                    results = run_business_analysis_batch(columns, include_input=include_input, rules=rules,
+                                                          validate=False)
+                    log.write_many(results)
+                    written += len(results)
+                log.flush()
+
+                done += len(chunk)
+                checkpoint.commit_chunk(job_id, done, written, rejected, log.tell())
+
+        checkpoint.mark_complete(job_id)
+        elapsed = time.perf_counter() - start
+        processed = done - skipped
+        return {"job_id": job_id, "records_done": done, "records_written": written,
+                "records_rejected": rejected, "records_skipped": skipped, "resumed": skipped > 0,
+                "restarted": restarted, "elapsed_seconds": elapsed, "records_per_second": processed / elapsed if elapsed > 0 else 0.0}
+    finally:
+        checkpoint.close()
@@ -0,0 +1,351 @@
+from typing import Dict, Any, Callable, FrozenSet, List, Mapping, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass
+import hashlib
+import json
+import operator
+import re
+import string
+import numpy as np
+
+# Comparison operators allowed in rule conditions
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Shorthand leaf conditions such as "cac_change_percent > 20"
+_LEAF_PATTERN = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(<=|>=|==|!=|<|>)\s*(-?[0-9.eE+-]+)\s*$")
+
+def parse_comparison(condition: Union[str, Sequence[Any]]) -> Tuple[str, Callable[[Any, Any], Any], float]:
+    """A single comparison as (name, operator function, threshold)
+
+    Accepts the shorthand text of rule leaves ("cac_change_percent > 20") or a
+    (name, op, value) tuple; raises ValueError when it is malformed.
+    """
+    if isinstance(condition, str):
+        match = _LEAF_PATTERN.match(condition)
+        if not match:
+            raise ValueError(f"Invalid condition: {condition!r} (expected e.g. 'cac_change_percent > 20')")
+        name, op, value = match.groups()
+    else:
+        name, op, value = condition
+    if op not in _OPERATORS:
+        raise ValueError(f"Unknown operator in condition: {op}")
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Threshold must be a number, got {value!r}") from None
+    return name, _OPERATORS[op], threshold
+
+# Metrics of core.calculate_metrics rules may reference: numeric ones in conditions,
+# all of them as message placeholders
+CONDITION_METRICS = frozenset({"daily_profit", "current_cac", "previous_cac",
+                               "revenue_change_percent", "cost_change_percent", "cac_change_percent"})
+MESSAGE_METRICS = CONDITION_METRICS | {"profit_status"}
+
+# Plan node kinds
+LEAF, ALL, ANY, NOT = 0, 1, 2, 3
+
+@dataclass(frozen=True)
+class Outcome:
+    """Messages emitted by one branch of a rule"""
+    alert: Optional[str] = None
+    recommendation: Optional[str] = None
+
+    @property
+    def templated(self) -> bool:
+        """Whether any message has metric placeholders to fill in"""
+        return "{" in (self.alert or "") or "{" in (self.recommendation or "")
+
+    def render(self, metrics: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """Fill metric placeholders (e.g. {cac_change_percent:.1f}) into the messages"""
+        alert = self.alert.format(**metrics) if self.alert and "{" in self.alert else self.alert
+        recommendation = (self.recommendation.format(**metrics)
+                          if self.recommendation and "{" in self.recommendation else self.recommendation)
+        return alert, recommendation
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A rule whose condition points into the shared evaluation plan"""
+    rule_id: str
+    condition: int
+    then: Outcome
+    otherwise: Optional[Outcome] = None
+
+class RuleSet:
+    """Rules compiled once into a shared, short-circuiting evaluation plan
+
+    Identical conditions (leaves and composites) across rules are interned into one plan
+    node, so each is evaluated at most once per record, and only when some rule needs it.
+    """
+
+    def __init__(self, nodes: List[Tuple], rules: List[CompiledRule], fingerprint: str = ""):
+        self.nodes = nodes
+        self.rules = rules
+        # Stable digest of the source definitions (used e.g. in result cache keys)
+        self.fingerprint = fingerprint
+        self.metrics = sorted({node[1] for node in nodes if node[0] == LEAF})
+        self._dependencies: Optional[Dict[str, FrozenSet[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _evaluate_node(self, node_id: int, metrics: Mapping[str, Any], memo: List[Optional[bool]]) -> bool:
+        """Evaluate one plan node for a record, reusing results already in `memo`"""
+        value = memo[node_id]
+        if value is not None:
+            return value
+
+        kind, arg, op, threshold = self.nodes[node_id]
+        if kind == LEAF:
+            value = bool(op(metrics[arg], threshold))
+        elif kind == ALL:
+            value = True
+            for child in arg:
+                if not self._evaluate_node(child, metrics, memo):
+                    value = False
+                    break
+        elif kind == ANY:
+            value = False
+            for child in arg:
+                if self._evaluate_node(child, metrics, memo):
+                    value = True
+                    break
+        else:
+            value = not self._evaluate_node(arg, metrics, memo)
+
+        memo[node_id] = value
+        return value
+
+    def fired(self, metrics: Mapping[str, Any]) -> List[bool]:
+        """Whether each rule's condition holds for one record"""
+        memo: List[Optional[bool]] = [None] * len(self.nodes)
+        return [self._evaluate_node(rule.condition, metrics, memo) for rule in self.rules]
+
+    def fired_subset(self, metrics: Mapping[str, Any], positions: Sequence[int]) -> List[bool]:
+        """Whether the conditions of the rules at `positions` hold (shared subexpressions still evaluated once)"""
+        memo: List[Optional[bool]] = [None] * len(self.nodes)
+        return [self._evaluate_node(self.rules[position].condition, metrics, memo) for position in positions]
+
+    def _node_metrics(self, node_id: int) -> FrozenSet[str]:
+        kind, arg, _, _ = self.nodes[node_id]
+        if kind == LEAF:
+            return frozenset((arg,))
+        if kind == NOT:
+            return self._node_metrics(arg)
+        return frozenset().union(*(self._node_metrics(child) for child in arg))
+
+    def dependencies(self) -> Dict[str, FrozenSet[str]]:
+        """Metrics each rule reads, in its condition or as message placeholders, by rule id"""
+        if self._dependencies is None:
+            dependencies = {}
+            for rule in self.rules:
+                metrics = set(self._node_metrics(rule.condition))
+                for outcome in (rule.then, rule.otherwise):
+                    for message in (outcome.alert, outcome.recommendation) if outcome else ():
+                        if message and "{" in message:
+                            metrics.update(_placeholders(message, rule.rule_id))
+                dependencies[rule.rule_id] = frozenset(metrics)
+            self._dependencies = dependencies
+        return self._dependencies
+
+    def evaluate(self, metrics: Mapping[str, Any]) -> Tuple[List[str], List[str]]:
+        """Alerts and recommendations for one record, in rule order"""
+        alerts: List[str] = []
+        recommendations: List[str] = []
+        for rule, matched in zip(self.rules, self.fired(metrics)):
+            outcome = rule.then if matched else rule.otherwise
+            if outcome is None:
+                continue
+            alert, recommendation = outcome.render(metrics)
+            if alert:
+                alerts.append(alert)
+            if recommendation:
+                recommendations.append(recommendation)
+        return alerts, recommendations
+
+    def _evaluate_node_batch(self, node_id: int, metrics: Mapping[str, np.ndarray],
+                             memo: Dict[int, np.ndarray]) -> np.ndarray:
+        """Evaluate one plan node over whole columns, reusing masks already in `memo`"""
+        mask = memo.get(node_id)
+        if mask is not None:
+            return mask
+
+        kind, arg, op, threshold = self.nodes[node_id]
+        if kind == LEAF:
+            mask = np.asarray(op(np.asarray(metrics[arg]), threshold), dtype=bool)
+        elif kind == ALL:
+            mask = self._evaluate_node_batch(arg[0], metrics, memo)
+            for child in arg[1:]:
+                if not mask.any():
+                    break
+                mask = mask & self._evaluate_node_batch(child, metrics, memo)
+        elif kind == ANY:
+            mask = self._evaluate_node_batch(arg[0], metrics, memo)
+            for child in arg[1:]:
+                if mask.all():
+                    break
+                mask = mask | self._evaluate_node_batch(child, metrics, memo)
+        else:
+            mask = ~self._evaluate_node_batch(arg, metrics, memo)
+
+        memo[node_id] = mask
+        return mask
+
+    def evaluate_batch(self, metrics: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Boolean mask per rule id over a columnar batch of metrics"""
+        memo: Dict[int, np.ndarray] = {}
+        return {rule.rule_id: self._evaluate_node_batch(rule.condition, metrics, memo) for rule in self.rules}
+
+    def render_batch(self, masks: Mapping[str, np.ndarray],
+                     metrics: Mapping[str, Sequence[Any]]) -> Tuple[List[List[str]], List[List[str]]]:
+        """Per-row alert and recommendation lists for masks from `evaluate_batch`
+
+        `metrics` holds per-row Python values (lists); rows are only materialized as dicts
+        for messages with placeholders.
+        """
+        size = len(next(iter(masks.values()))) if masks else 0
+        alerts: List[List[str]] = [[] for _ in range(size)]
+        recommendations: List[List[str]] = [[] for _ in range(size)]
+
+        # Outer loop over rules keeps each row's messages in rule order; inner loops
+        # only touch the rows where a branch actually fired
+        for rule in self.rules:
+            mask = masks[rule.rule_id]
+            branches = [(rule.then, np.flatnonzero(mask))]
+            if rule.otherwise is not None:
+                branches.append((rule.otherwise, np.flatnonzero(~mask)))
+            for outcome, rows in branches:
+                templated = outcome.templated
+                for i in rows.tolist():
+                    if templated:
+                        alert, recommendation = outcome.render({name: values[i] for name, values in metrics.items()})
+                    else:
+                        alert, recommendation = outcome.alert, outcome.recommendation
+                    if alert:
+                        alerts[i].append(alert)
+                    if recommendation:
+                        recommendations[i].append(recommendation)
+        return alerts, recommendations
+
+class _PlanBuilder:
+    """Interns conditions into plan nodes so equal subexpressions share one node"""
+
+    def __init__(self):
+        self.nodes: List[Tuple] = []
+        self._index: Dict[Tuple, int] = {}
+
+    def _intern(self, key: Tuple, node: Tuple) -> int:
+        node_id = self._index.get(key)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.nodes.append(node)
+            self._index[key] = node_id
+        return node_id
+
+    def add(self, condition: Union[str, Mapping[str, Any]], rule_id: str) -> int:
+        """Compile a condition and return its node id"""
+        if isinstance(condition, str):
+            match = _LEAF_PATTERN.match(condition)
+            if not match:
+                raise ValueError(f"Rule {rule_id}: cannot parse condition {condition!r}")
+            condition = {"metric": match.group(1), "op": match.group(2), "value": float(match.group(3))}
+
+        if not isinstance(condition, Mapping):
+            raise ValueError(f"Rule {rule_id}: condition must be a string or mapping, got {condition!r}")
+
+        if "metric" in condition:
+            op = condition.get("op")
+            if op not in _OPERATORS:
+                raise ValueError(f"Rule {rule_id}: unknown operator {op!r}")
+            value = condition.get("value")
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError(f"Rule {rule_id}: threshold must be a number, got {value!r}")
+            metric = condition["metric"]
+            if metric not in CONDITION_METRICS:
+                raise ValueError(f"Rule {rule_id}: unknown metric {metric!r} in condition "
+                                 f"(expected one of {sorted(CONDITION_METRICS)})")
+            return self._intern((LEAF, metric, op, float(value)), (LEAF, metric, _OPERATORS[op], value))
+
+        for kind, key in ((ALL, "all"), (ANY, "any")):
+            if key in condition:
+                children = condition[key]
+                if not isinstance(children, list) or not children:
+                    raise ValueError(f"Rule {rule_id}: '{key}' needs a non-empty list of conditions")
+                ids = tuple(self.add(child, rule_id) for child in children)
+                return self._intern((kind, ids), (kind, ids, None, None))
+
+        if "not" in condition:
+            child = self.add(condition["not"], rule_id)
+            return self._intern((NOT, child), (NOT, child, None, None))
+
+        raise ValueError(f"Rule {rule_id}: condition needs 'metric', 'all', 'any' or 'not'")
+
+def _placeholders(message: str, rule_id: str) -> List[str]:
+    """Metric names a message template reads (ValueError if it cannot be parsed)"""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(message) if field is not None]
+    except ValueError as error:
+        raise ValueError(f"Rule {rule_id}: malformed message template {message!r}: {error}") from None
+    return [field.split(".")[0].split("[")[0] for field in fields]
+
+def _outcome(spec: Optional[Mapping[str, Any]], rule_id: str, branch: str) -> Optional[Outcome]:
+    """Parse a then/else branch"""
+    if spec is None:
+        return None
+    unknown = set(spec) - {"alert", "recommendation"}
+    if unknown:
+        raise ValueError(f"Rule {rule_id}: unknown keys in '{branch}': {sorted(unknown)}")
+    for key in ("alert", "recommendation"):
+        message = spec.get(key)
+        if message and "{" in message:
+            for name in _placeholders(message, rule_id):
+                if name not in MESSAGE_METRICS:
+                    raise ValueError(f"Rule {rule_id}: unknown placeholder {{{name}}} in '{branch}' {key} "
+                                     f"(expected one of {sorted(MESSAGE_METRICS)})")
+    return Outcome(alert=spec.get("alert"), recommendation=spec.get("recommendation"))
+
+def compile_rules(spec: Union[Sequence[Mapping[str, Any]], Mapping[str, Any]]) -> RuleSet:
+    """Compile rule definitions (a list, or a mapping with a 'rules' list) into a RuleSet
+
+    Each rule has an `id`, a `when` condition and a `then` branch with an optional `alert`
+    and `recommendation`; an optional `else` branch applies when the condition is false.
+    Conditions are leaves (`{"metric": ..., "op": ">", "value": 20}` or the shorthand
+    `"cac_change_percent > 20"`) combined with `all`, `any` and `not`. Messages may use
+    metric placeholders such as `{cac_change_percent:.1f}`. Unknown metric names in
+    conditions or placeholders raise ValueError naming the rule.
+    """
+    rule_specs = spec["rules"] if isinstance(spec, Mapping) else spec
+    builder = _PlanBuilder()
+    rules = []
+    seen = set()
+    for position, rule_spec in enumerate(rule_specs):
+        rule_id = str(rule_spec.get("id", f"rule_{position}"))
+        if rule_id in seen:
+            raise ValueError(f"Duplicate rule id: {rule_id}")
+        seen.add(rule_id)
+        if "when" not in rule_spec or "then" not in rule_spec:
+            raise ValueError(f"Rule {rule_id}: 'when' and 'then' are required")
+        rules.append(CompiledRule(
+            rule_id=rule_id,
+            condition=builder.add(rule_spec["when"], rule_id),
+            then=_outcome(rule_spec["then"], rule_id, "then"),
+            otherwise=_outcome(rule_spec.get("else"), rule_id, "else")
+        ))
+    fingerprint = hashlib.blake2b(json.dumps(rule_specs, sort_keys=True, default=str).encode("utf-8"),
+                                  digest_size=16).hexdigest()
+    return RuleSet(builder.nodes, rules, fingerprint)
+
+def load_rules(path: str) -> RuleSet:
+    """Load and compile rules from a YAML (.yaml/.yml) or JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return compile_rules(spec)
@@ -0,0 +1,183 @@
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from core import REQUIRED_FIELDS, DEFAULT_RULES
+from batch import build_outputs, compute_metrics_batch
+from rules import RuleSet
+
+# Fields that hold counts; relative variations of them are rounded to whole customers
+COUNT_FIELDS = ("number_of_customers", "previous_day_customers")
+
+def relative_steps(low: float, high: float, step: float) -> np.ndarray:
+    """Relative changes from `low` to `high` inclusive, e.g. (-0.3, 0.3, 0.01) for ±30% in 1% steps"""
+    if step <= 0 or high < low:
+        raise ValueError(f"Invalid range {low}..{high} step {step}")
+    return np.linspace(low, high, int(round((high - low) / step)) + 1)
+
+def _scale(field: str, base: float, changes: np.ndarray) -> np.ndarray:
+    values = base * (1 + np.asarray(changes, dtype=np.float64))
+    return np.maximum(np.round(values), 0) if field in COUNT_FIELDS else values
+
+def _base_values(base: Mapping[str, Any]) -> Dict[str, float]:
+    missing = [field for field in REQUIRED_FIELDS if field not in base]
+    if missing:
+        raise ValueError(f"Base scenario is missing fields: {missing}")
+    return {field: float(base[field]) for field in REQUIRED_FIELDS}
+
+def _check_fields(fields: Iterable[str]) -> None:
+    unknown = [field for field in fields if field not in REQUIRED_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}")
+
+class ScenarioSet:
+    """Many what-if variants of a base record, stored as broadcastable columns
+
+    Each field is an array that only spans the dimensions it varies along (a field that
+    is not varied is a single value), so expressions over the fields are evaluated once
+    per distinct combination of their inputs, not once per scenario.
+    """
+
+    def __init__(self, fields: Mapping[str, np.ndarray], shape: Tuple[int, ...], varied: Sequence[str]):
+        self.fields = dict(fields)
+        self.shape = tuple(shape)
+        self.varied = list(varied)
+
+    @classmethod
+    def grid(cls, base: Mapping[str, Any], axes: Mapping[str, Sequence[float]]) -> "ScenarioSet":
+        """Full cross product of absolute values per field; the other fields keep their base values"""
+        values = _base_values(base)
+        _check_fields(axes)
+        shape = tuple(len(axis) for axis in axes.values())
+        if not all(shape):
+            raise ValueError("Every axis needs at least one value")
+        fields = {field: np.full((1,) * len(shape), value) for field, value in values.items()}
+        for dimension, (field, axis) in enumerate(axes.items()):
+            view = [1] * len(shape)
+            view[dimension] = len(axis)
+            fields[field] = np.asarray(axis, dtype=np.float64).reshape(view)
+        return cls(fields, shape, list(axes))
+
+    @classmethod
+    def relative_grid(cls, base: Mapping[str, Any],
+                      ranges: Mapping[str, Tuple[float, float, float]]) -> "ScenarioSet":
+        """Grid of relative changes, e.g. {"daily_cost": (-0.3, 0.3, 0.01), "number_of_customers": (-0.5, 0.5, 0.1)}"""
+        values = _base_values(base)
+        _check_fields(ranges)
+        return cls.grid(values, {field: _scale(field, values[field], relative_steps(*spec))
+                                 for field, spec in ranges.items()})
+
+    @classmethod
+    def random(cls, base: Mapping[str, Any], ranges: Mapping[str, Tuple[float, float]], count: int,
+               seed: Optional[int] = None) -> "ScenarioSet":
+        """`count` scenarios with independent uniform relative changes per field, e.g. {"daily_cost": (-0.3, 0.3)}"""
+        values = _base_values(base)
+        rng = np.random.default_rng(seed)
+        fields = {field: np.full(1, value) for field, value in values.items()}
+        _check_fields(ranges)
+        for field, (low, high) in ranges.items():
+            fields[field] = _scale(field, values[field], rng.uniform(low, high, count))
+        return cls(fields, (count,), list(ranges))
+
+    def __len__(self) -> int:
+        return int(np.prod(self.shape))
+
+    def column(self, field: str) -> np.ndarray:
+        """One field for every scenario, flattened in C order"""
+        return np.broadcast_to(self.fields[field], self.shape).ravel()
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Flat columnar batch of all scenarios (for run_business_analysis_batch)"""
+        return {field: self.column(field) for field in REQUIRED_FIELDS}
+
+    def evaluate(self, rules: Optional[RuleSet] = None) -> "ScenarioResult":
+        """Metrics and rule masks for every scenario in one vectorized pass
+
+        Previous-day terms (previous CAC, the denominators of every change) are computed at
+        the size of the previous-day fields, i.e. once when they are not varied, and each
+        rule condition only over the dimensions its metrics depend on.
+        """
+        metrics = compute_metrics_batch(self.fields)
+        rules = rules or DEFAULT_RULES
+        return ScenarioResult(self, metrics, rules.evaluate_batch(metrics), rules)
+
+class ScenarioResult:
+    """Metrics and fired rules of a ScenarioSet, with a summary of where alerts fire"""
+
+    def __init__(self, scenarios: ScenarioSet, metrics: Dict[str, np.ndarray], masks: Dict[str, np.ndarray],
+                 rules: RuleSet):
+        self.scenarios = scenarios
+        self.metrics = metrics
+        self.masks = masks
+        self.rules = rules
+        # Rules that raise an alert when they fire (the else-branch only recommends)
+        self.alert_rules = [rule.rule_id for rule in rules.rules if rule.then.alert]
+
+    def __len__(self) -> int:
+        return len(self.scenarios)
+
+    def metric(self, name: str) -> np.ndarray:
+        """One metric for every scenario, flattened like ScenarioSet.column"""
+        return np.broadcast_to(self.metrics[name], self.scenarios.shape).ravel()
+
+    def fired(self, rule_id: str) -> np.ndarray:
+        """Whether a rule fired, per scenario"""
+        return np.broadcast_to(self.masks[rule_id], self.scenarios.shape).ravel()
+
+    def regions(self) -> List[Dict[str, Any]]:
+        """Groups of scenarios that raise the same set of alerts, largest first
+
+        Each row has the alert rule ids, the number and share of scenarios, and the
+        min/max of every varied field within the group.
+        """
+        shape = self.scenarios.shape
+        codes = np.zeros(shape, dtype=np.int64)
+        for bit, rule_id in enumerate(self.alert_rules):
+            codes |= self.masks[rule_id].astype(np.int64) << bit
+        counts = np.bincount(codes.ravel())
+
+        regions = []
+        for code in np.argsort(-counts, kind="stable").tolist():
+            if not counts[code]:
+                break
+            members = codes == code
+            ranges = {}
+            for field in self.scenarios.varied:
+                values = self.scenarios.fields[field]
+                # Reduce membership over the dimensions the field does not vary along, so
+                # only its own values are scanned
+                others = tuple(dim for dim, size in enumerate(values.shape) if size == 1 and shape[dim] > 1)
+                present = members.any(axis=others, keepdims=True) if others else members
+                inside = np.broadcast_to(values, present.shape)[present]
+                ranges[field] = (float(inside.min()), float(inside.max()))
+            regions.append({
+                "alerts": [rule_id for bit, rule_id in enumerate(self.alert_rules) if code >> bit & 1],
+                "scenarios": int(counts[code]),
+                "share": float(counts[code]) / len(self),
+                "ranges": ranges
+            })
+        return regions
+
+    def format_regions(self) -> str:
+        """The regions as a plain-text table"""
+        varied = self.scenarios.varied
+        header = ["alerts", "scenarios", "share"] + varied
+        rows = [[", ".join(region["alerts"]) or "(none)", str(region["scenarios"]), f"{region['share']:.1%}"]
+                + [f"{low:g} .. {high:g}" for low, high in (region["ranges"][field] for field in varied)]
+                for region in self.regions()]
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+                         for row in [header] + rows)
+
+    def outputs(self, start: int = 0, stop: Optional[int] = None, include_input: bool = True) -> List[Dict[str, Any]]:
+        """Full analysis outputs (as run_business_analysis) for a slice of the scenarios"""
+        shape = self.scenarios.shape
+        # Index the broadcast views directly so only the requested rows are materialized
+        rows = range(len(self))[start:stop]
+        position = np.unravel_index(np.arange(rows.start, rows.stop), shape)
+        columns = {field: np.broadcast_to(self.scenarios.fields[field], shape)[position] for field in REQUIRED_FIELDS}
+        metrics = {name: np.broadcast_to(values, shape)[position] for name, values in self.metrics.items()}
+        return build_outputs(columns, metrics, self.rules, include_input)
+
+def sweep(base: Mapping[str, Any], ranges: Mapping[str, Tuple[float, float, float]],
+          rules: Optional[RuleSet] = None) -> ScenarioResult:
+    """Evaluate a relative grid around `base` in one call, e.g. sweep(record, {"daily_cost": (-0.3, 0.3, 0.01)})"""
+    return ScenarioSet.relative_grid(base, ranges).evaluate(rules)
@@ -0,0 +1,230 @@
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from decimal import Decimal
+import math
+import numbers
+import numpy as np
+
+@dataclass(frozen=True)
+class FieldRule:
+    """Constraints on one numeric input field"""
+    name: str
+    minimum: Optional[float] = 0.0
+    integer: bool = False
+
+DEFAULT_FIELD_RULES = (
+    FieldRule("daily_revenue"),
+    FieldRule("daily_cost"),
+    FieldRule("number_of_customers", integer=True),
+    FieldRule("previous_day_revenue"),
+    FieldRule("previous_day_cost"),
+    FieldRule("previous_day_customers", integer=True),
+)
+
+# Failure kinds, in the order they are checked per field
+UNPARSED, NON_FINITE, BELOW_MINIMUM, FRACTIONAL = 1, 2, 3, 4
+
+def _error(kind: int, rule: FieldRule, value: Any) -> str:
+    """Error text of one failed check (the same wording for records and batches)"""
+    if kind == UNPARSED:
+        if value is None or value == "":
+            return f"Missing required field: {rule.name}"
+        return f"Invalid number for field {rule.name}: {value!r}"
+    if kind == NON_FINITE:
+        return f"Non-finite value for field {rule.name}: {value!r}"
+    if kind == BELOW_MINIMUM:
+        return f"Value below {rule.minimum:g} for field {rule.name}: {value!r}"
+    return f"Non-integer value for field {rule.name}: {value!r}"
+
+def _parse_number(value: Any) -> Any:
+    """int/float as is, other real numbers (NumPy scalars, Decimal) as int/float, numeric strings
+    parsed (as int when possible); raises ValueError otherwise"""
+    if isinstance(value, (bool, np.bool_)):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, (numbers.Real, Decimal)):
+        return int(value) if isinstance(value, numbers.Integral) else float(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    raise ValueError(f"not a number: {value!r}")
+
+def _whole_numbers_as_int(parsed: np.ndarray) -> np.ndarray:
+    """Parsed text as int64 when every value is whole (as int() would parse customer counts), else as is"""
+    if np.isfinite(parsed).all() and (np.floor(parsed) == parsed).all() and (np.abs(parsed) < 2 ** 53).all():
+        return parsed.astype(np.int64)
+    return parsed
+
+def _parse_column(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """A column as an int64 or float64 array plus the mask of rows that did not parse
+
+    Numeric arrays and lists convert in one NumPy call, and so do strings (CSV), which are
+    kept as integers when every value is whole; only columns with unparseable values fall
+    back to per-row parsing.
+    """
+    if isinstance(values, list) and values and isinstance(values[0], str):
+        # Text columns (CSV) parse fastest straight from the list
+        try:
+            parsed = np.array(values, dtype=np.float64)
+        except (ValueError, TypeError):
+            parsed = None
+        # NaN may come from a None among the strings; the general path tells the two apart
+        if parsed is not None and not np.isnan(parsed).any():
+            return _whole_numbers_as_int(parsed), np.zeros(len(values), dtype=bool)
+    array = np.asarray(values)
+    kind = array.dtype.kind
+    if kind in "iu":
+        return array.astype(np.int64, copy=False), np.zeros(len(array), dtype=bool)
+    if kind == "f":
+        return array.astype(np.float64, copy=False), np.zeros(len(array), dtype=bool)
+    if kind in "UO":
+        try:
+            parsed = array.astype(np.float64)
+        except (ValueError, TypeError):
+            parsed = None
+        if parsed is not None:
+            unparsed = np.zeros(len(array), dtype=bool)
+            if kind == "U":
+                return _whole_numbers_as_int(parsed), unparsed
+            else:
+                # None converts to NaN; report it as missing rather than as NaN
+                for i in np.flatnonzero(np.isnan(parsed)).tolist():
+                    unparsed[i] = array[i] is None
+            return parsed, unparsed
+
+    parsed = np.full(len(array), np.nan)
+    unparsed = np.zeros(len(array), dtype=bool)
+    for i, value in enumerate(array.tolist()):
+        try:
+            parsed[i] = _parse_number(value)
+        except (ValueError, TypeError, OverflowError):
+            unparsed[i] = True
+    return parsed, unparsed
+
+class RejectedRows:
+    """Rows that failed validation: position in the batch and the first error of each"""
+
+    def __init__(self, rows: np.ndarray, errors: List[str]):
+        self.rows = rows
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return iter(zip(self.rows.tolist(), self.errors))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """The report as [{"row": ..., "error": ...}] (e.g. for a JSON response)"""
+        return [{"row": row, "error": error} for row, error in self]
+
+class ValidationResult:
+    """Valid rows of a batch as clean NumPy columns, plus the rejected-rows report"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], valid: np.ndarray, rejected: RejectedRows):
+        self.columns = columns
+        self.valid = valid
+        self.rejected = rejected
+
+    def __len__(self) -> int:
+        """Number of valid rows"""
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+class Schema:
+    """Input schema compiled into column-wise checks
+
+    `validate` checks a whole batch with a few vectorized operations per field and reports
+    bad rows instead of raising, so valid rows never go through per-row checks; `check`
+    is the per-record equivalent used by the graph's input node.
+    """
+
+    def __init__(self, rules: Sequence[FieldRule] = DEFAULT_FIELD_RULES):
+        self.rules = tuple(rules)
+        self.fields = tuple(rule.name for rule in self.rules)
+
+    def check(self, record: Dict[str, Any]) -> Optional[str]:
+        """First error of one record, or None; numeric strings are parsed in place"""
+        for rule in self.rules:
+            value = record.get(rule.name)
+            try:
+                number = _parse_number(value)
+            except (ValueError, TypeError, OverflowError):
+                return _error(UNPARSED, rule, value)
+            if number is not value:
+                record[rule.name] = number
+            if isinstance(number, float):
+                if not math.isfinite(number):
+                    return _error(NON_FINITE, rule, value)
+                if rule.integer and not number.is_integer():
+                    return _error(FRACTIONAL, rule, value)
+            if rule.minimum is not None and number < rule.minimum:
+                return _error(BELOW_MINIMUM, rule, value)
+        return None
+
+    def validate(self, batch: Mapping[str, Any]) -> ValidationResult:
+        """Validate a columnar batch (NumPy arrays or lists per field) in one pass
+
+        Missing columns and columns of different lengths are structural errors and raise
+        ValueError; everything row-level ends up in the rejected-rows report.
+        """
+        for field in self.fields:
+            if field not in batch:
+                raise ValueError(f"Missing required field: {field}")
+        lengths = {len(batch[field]) for field in self.fields}
+        if len(lengths) > 1:
+            raise ValueError(f"All fields must have the same length, got lengths {sorted(lengths)}")
+        size = lengths.pop() if lengths else 0
+
+        columns = {}
+        failed_field = np.full(size, -1, dtype=np.int64)
+        failed_kind = np.zeros(size, dtype=np.int8)
+        invalid = np.zeros(size, dtype=bool)
+        for position, rule in enumerate(self.rules):
+            column, unparsed = _parse_column(batch[rule.name])
+            checks = [(UNPARSED, unparsed)]
+            if column.dtype.kind == "f":
+                finite = np.isfinite(column)
+                checks.append((NON_FINITE, ~finite & ~unparsed))
+                if rule.integer:
+                    checks.append((FRACTIONAL, finite & (np.floor(column) != column)))
+            if rule.minimum is not None:
+                checks.append((BELOW_MINIMUM, column < rule.minimum))
+            for kind, mask in checks:
+                if mask.any():
+                    new = mask & ~invalid
+                    failed_field[new] = position
+                    failed_kind[new] = kind
+                    invalid |= new
+            columns[rule.name] = column
+
+        rows = np.flatnonzero(invalid)
+        if not len(rows):
+            return ValidationResult(columns, ~invalid, RejectedRows(rows, []))
+
+        # Messages are only built for the rejected rows
+        errors = []
+        for row in rows.tolist():
+            rule = self.rules[failed_field[row]]
+            errors.append(_error(int(failed_kind[row]), rule, _item(batch[rule.name][row])))
+        valid = ~invalid
+        return ValidationResult({field: column[valid] for field, column in columns.items()}, valid,
+                                RejectedRows(rows, errors))
+
+    def validate_records(self, records: Sequence[Mapping[str, Any]]) -> ValidationResult:
+        """Validate per-record dicts (a missing key counts as a missing value)"""
+        return self.validate({field: [record.get(field) for record in records] for field in self.fields})
+
+def _item(value: Any) -> Any:
+    """NumPy scalars as plain Python values, for error messages"""
+    return value.item() if isinstance(value, np.generic) else value
+
+DEFAULT_SCHEMA = Schema()
+
+# The current-day fields alone, for history-backed records (previous-day values come from the HistoryStore)
+CURRENT_DAY_SCHEMA = Schema(tuple(rule for rule in DEFAULT_FIELD_RULES if not rule.name.startswith("previous_day_")))
@@ -0,0 +1,375 @@
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import os
+import sys
+import threading
+import orjson
+from batch import run_business_analysis_batch
+from schema import DEFAULT_SCHEMA
+from persistence import read_results
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# How long an idle event stream waits before sending a keep-alive comment
+KEEPALIVE_SECONDS = 15.0
+
+DASHBOARD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "business_dashboard.html")
+
+def metrics_row(seq: int, entity_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flat metrics view of one stored result"""
+    profit = result["profit_loss_status"]
+    acquisition = result["customer_acquisition"]
+    return {
+        "seq": seq,
+        "entity_id": entity_id,
+        "analysis_timestamp": result.get("analysis_timestamp"),
+        "daily_profit": profit["daily_profit"],
+        "status": profit["status"],
+        "revenue_change_percent": profit["revenue_change_percent"],
+        "cost_change_percent": profit["cost_change_percent"],
+        "current_cac": acquisition["current_cac"],
+        "cac_change_percent": acquisition["cac_change_percent"],
+        "total_alerts": len(result.get("alerts", [])),
+    }
+
+class ResultStore:
+    """Bounded in-memory history of analysis results with a monotonically increasing sequence number
+
+    The sequence number doubles as the Server-Sent Events id, so a reconnecting dashboard
+    only receives what it has not seen yet. The latest result per entity is kept even after
+    older history has been evicted, for up to `max_entities` entities; the ones updated least
+    recently are dropped first.
+    """
+
+    def __init__(self, max_results: int = 100_000, max_entities: int = 100_000):
+        self.max_results = max_results
+        self.max_entities = max_entities
+        self._results: "deque[Tuple[int, str, Dict[str, Any]]]" = deque(maxlen=max_results)
+        self._latest: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._seq = 0
+        self._closed = False
+        self._changed = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest result still held (last_seq + 1 when empty)"""
+        with self._changed:
+            return self._results[0][0] if self._results else self._seq + 1
+
+    def add(self, result: Dict[str, Any], entity_id: Optional[str] = None) -> int:
+        """Store one result and wake up waiting event streams; returns its sequence number"""
+        return self.add_many([(result, entity_id)])[-1]
+
+    def add_many(self, items: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> List[int]:
+        """Store several results under one lock and notify once"""
+        seqs = []
+        with self._changed:
+            for result, entity_id in items:
+                self._seq += 1
+                if entity_id is not None:
+                    entity = str(entity_id)
+                    self._latest[entity] = (self._seq, result)
+                    self._latest.move_to_end(entity)
+                    if len(self._latest) > self.max_entities:
+                        self._latest.popitem(last=False)
+                else:
+                    entity = f"record-{self._seq}"
+                self._results.append((self._seq, entity, result))
+                seqs.append(self._seq)
+            self._changed.notify_all()
+        return seqs
+
+    def _snapshot(self, since: int = 0) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Results with seq > since, oldest first"""
+        with self._changed:
+            if not self._results or since >= self._seq:
+                return []
+            start = max(since - self._results[0][0] + 1, 0)
+            return list(islice(self._results, start, None))
+
+    def wait_for(self, since: int, timeout: Optional[float] = None) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Block until results newer than `since` exist (or timeout/close) and return them"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._seq > since or self._closed, timeout)
+        return self._snapshot(since)
+
+    def close(self) -> None:
+        """Release every waiting event stream"""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def results(self, entity: Optional[str] = None, status: Optional[str] = None,
+                has_alerts: Optional[bool] = None, since: int = 0) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Stored results matching the filters, oldest first"""
+        rows = []
+        for seq, entity_id, result in self._snapshot(since):
+            if entity is not None and entity_id != entity:
+                continue
+            if status is not None and result["profit_loss_status"]["status"] != status:
+                continue
+            if has_alerts is not None and bool(result.get("alerts")) != has_alerts:
+                continue
+            rows.append((seq, entity_id, result))
+        return rows
+
+    def alerts(self, entity: Optional[str] = None, contains: Optional[str] = None,
+               since: int = 0) -> List[Dict[str, Any]]:
+        """One row per alert message, oldest first"""
+        rows = []
+        for seq, entity_id, result in self.results(entity=entity, has_alerts=True, since=since):
+            for alert in result["alerts"]:
+                if contains is None or contains.lower() in alert.lower():
+                    rows.append({"seq": seq, "entity_id": entity_id, "alert": alert,
+                                 "analysis_timestamp": result.get("analysis_timestamp")})
+        return rows
+
+    def metrics(self, entity: Optional[str] = None, status: Optional[str] = None,
+                since: int = 0) -> List[Dict[str, Any]]:
+        """Flat metrics rows, oldest first"""
+        return [metrics_row(seq, entity_id, result)
+                for seq, entity_id, result in self.results(entity=entity, status=status, since=since)]
+
+    def entities(self, status: Optional[str] = None, ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Latest metrics row per entity (only the requested `ids`, when given), ordered by entity id"""
+        with self._changed:
+            if ids is None:
+                latest = sorted(self._latest.items())
+            else:
+                latest = [(entity_id, self._latest[entity_id]) for entity_id in sorted(set(ids))
+                          if entity_id in self._latest]
+        return [metrics_row(seq, entity_id, result) for entity_id, (seq, result) in latest
+                if status is None or result["profit_loss_status"]["status"] == status]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            return {"results": len(self._results), "entities": len(self._latest),
+                    "first_seq": self._results[0][0] if self._results else self._seq + 1,
+                    "last_seq": self._seq, "max_results": self.max_results, "max_entities": self.max_entities}
+
+def paginate(rows: List[Any], offset: int = 0, limit: int = DEFAULT_PAGE_SIZE, newest_first: bool = False) -> Dict[str, Any]:
+    """Slice a filtered row list into one page"""
+    if newest_first:
+        rows = rows[::-1]
+    limit = max(0, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    return {"total": len(rows), "offset": offset, "limit": limit, "items": rows[offset:offset + limit]}
+
+def analyze_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Validate posted records and analyze them in one vectorized batch (entity_id is copied into each output)"""
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Record {position}: expected an object")
+    validated = DEFAULT_SCHEMA.validate_records(records)
+    for position, error in validated.rejected:
+        raise ValueError(f"Record {position}: {error}")
+    columns = dict(validated.columns)
+    if any("entity_id" in record for record in records):
+        columns["entity_id"] = [record.get("entity_id") for record in records]
+    return run_business_analysis_batch(columns, validate=False)
+
+def sse_message(seq: int, entity_id: str, result: Dict[str, Any]) -> bytes:
+    """One Server-Sent Events frame carrying a single new result"""
+    payload = orjson.dumps({"seq": seq, "entity_id": entity_id, "result": result}, option=orjson.OPT_SERIALIZE_NUMPY)
+    return b"id: %d\nevent: result\ndata: %s\n\n" % (seq, payload)
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """JSON API, event stream and static dashboard page"""
+
+    server: "DashboardServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: Any, status: int = 200) -> None:
+        self._send(status, orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+
+    def _error(self, status: int, message: str) -> None:
+        self._send_json({"error": message}, status)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path in ("/", "/business_dashboard.html"):
+                with open(self.server.dashboard_file, "rb") as f:
+                    self._send(200, f.read(), "text/html; charset=utf-8")
+            elif url.path == "/api/events":
+                self._stream_events(query)
+            elif url.path in self.server.routes:
+                self._send_json(self.server.routes[url.path](query))
+            else:
+                self._error(404, f"Not found: {url.path}")
+        except ValueError as e:
+            self._error(400, str(e))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/api/analyze":
+            self._error(404, f"Not found: {url.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = orjson.loads(self.rfile.read(length))
+            records = body if isinstance(body, list) else [body]
+            results = analyze_records(records)
+            entity_ids = [result.get("entity_id") for result in results]
+            seqs = self.server.store.add_many(zip(results, entity_ids))
+        except (ValueError, orjson.JSONDecodeError) as e:
+            self._error(400, str(e))
+            return
+        self._send_json({"seqs": seqs, "results": results})
+
+    def _stream_events(self, query: Dict[str, str]) -> None:
+        """Push every result newer than Last-Event-ID (or ?since=) as it arrives"""
+        store = self.server.store
+        last_id = self.headers.get("Last-Event-ID") or query.get("since")
+        since = int(last_id) if last_id is not None else store.last_seq
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        # The client fell behind past what the store still holds: tell it to reload a page
+        if since + 1 < store.first_seq:
+            self.wfile.write(b"event: reset\ndata: {}\n\n")
+            since = store.first_seq - 1
+        self.wfile.write(b"retry: 2000\n\n")
+        self.wfile.flush()
+
+        while not store.closed:
+            items = store.wait_for(since, self.server.keepalive)
+            if items:
+                self.wfile.write(b"".join(sse_message(*item) for item in items))
+                since = items[-1][0]
+            else:
+                self.wfile.write(b": keep-alive\n\n")
+            self.wfile.flush()
+
+def _int(query: Dict[str, str], name: str, default: int) -> int:
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise ValueError(f"Query parameter {name} must be an integer")
+
+def _flag(query: Dict[str, str], name: str) -> Optional[bool]:
+    if name not in query:
+        return None
+    return query[name].lower() in ("1", "true", "yes")
+
+def _page(query: Dict[str, str], rows: List[Any]) -> Dict[str, Any]:
+    return paginate(rows, _int(query, "offset", 0), _int(query, "limit", DEFAULT_PAGE_SIZE),
+                    query.get("order", "desc") == "desc")
+
+class DashboardServer(ThreadingHTTPServer):
+    """Local server that keeps results in memory and feeds the dashboard incrementally
+
+    GET endpoints (paginated with offset/limit, newest first unless order=asc):
+    /api/results, /api/alerts, /api/metrics, /api/entities and /api/stats.
+    GET /api/events is a Server-Sent Events stream with one event per new result.
+    POST /api/analyze takes a record or a list of records, analyzes and publishes them.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 8000), store: Optional[ResultStore] = None,
+                 dashboard_file: str = DASHBOARD_FILE, keepalive: float = KEEPALIVE_SECONDS, quiet: bool = False):
+        self.store = store if store is not None else ResultStore()
+        self.dashboard_file = dashboard_file
+        self.keepalive = keepalive
+        self.quiet = quiet
+        self.routes: Dict[str, Callable[[Dict[str, str]], Any]] = {
+            "/api/stats": lambda query: self.store.stats(),
+            "/api/results": lambda query: _page(query, [
+                {"seq": seq, "entity_id": entity_id, "result": result}
+                for seq, entity_id, result in self.store.results(
+                    query.get("entity"), query.get("status"), _flag(query, "has_alerts"), _int(query, "since", 0))]),
+            "/api/alerts": lambda query: _page(query, self.store.alerts(
+                query.get("entity"), query.get("q"), _int(query, "since", 0))),
+            "/api/metrics": lambda query: _page(query, self.store.metrics(
+                query.get("entity"), query.get("status"), _int(query, "since", 0))),
+            "/api/entities": lambda query: paginate(
+                self.store.entities(query.get("status"), query["entity"].split(",") if "entity" in query else None),
+                _int(query, "offset", 0), _int(query, "limit", DEFAULT_PAGE_SIZE)),
+        }
+        super().__init__(address, DashboardHandler)
+
+    def publish(self, result: Dict[str, Any], entity_id: Optional[str] = None) -> int:
+        """Add a result produced in-process (e.g. by run_business_analysis)"""
+        return self.store.add(result, entity_id)
+
+    def server_close(self) -> None:
+        self.store.close()
+        super().server_close()
+
+def preload(store: ResultStore, path: str) -> int:
+    """Load a results log (or a single JSON result file) into the store"""
+    if path.lower().endswith(".json"):
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        results = data if isinstance(data, list) else [data]
+    else:
+        results = read_results(path)
+    entries = [(result, result.get("entity_id", result.get("input_data", {}).get("entity_id"))) for result in results]
+    store.add_many(entries)
+    return len(entries)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: serve the dashboard with a live results feed"""
+    parser = argparse.ArgumentParser(description="Serve the business dashboard with a live results feed")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--max-results", type=int, default=100_000, help="results kept in memory")
+    parser.add_argument("--max-entities", type=int, default=100_000, help="entities whose latest result is kept")
+    parser.add_argument("--preload", action="append", default=[],
+                        help="results log or JSON result file to load at start (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.max_results, args.max_entities)
+    for path in args.preload:
+        print(f"📂 Loaded {preload(store, path)} results from {path}", file=sys.stderr)
+
+    server = DashboardServer((args.host, args.port), store, quiet=args.quiet)
+    print(f"🌐 Dashboard at http://{args.host}:{server.server_address[1]}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
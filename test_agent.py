@@ -1,8 +1,17 @@
 import unittest
 import json
+from datetime import date
+import agent
+import events
+from batch import run_business_analysis_batch
+from instrumentation import Instrumentation
 from simple_agent import run_business_analysis, create_business_agent, BusinessState
 
 class TestBusinessAgent(unittest.TestCase):
+    """Behaviour of the minimal output profile (simple_agent)"""
+    
+    def analyze(self, data):
+        return run_business_analysis(data)
     
     def setUp(self):
         """Set up test fixtures"""
@@ -38,7 +47,7 @@ class TestBusinessAgent(unittest.TestCase):
 
     def test_profitable_scenario(self):
         """Test agent with profitable business scenario"""
-        result = run_business_analysis(self.sample_data_profitable)
+        result = self.analyze(self.sample_data_profitable)
         
         # Test profit status
         self.assertEqual(result["profit_loss_status"]["status"], "positive")
@@ -58,7 +67,7 @@ class TestBusinessAgent(unittest.TestCase):
 
     def test_loss_scenario(self):
         """Test agent with loss scenario"""
-        result = run_business_analysis(self.sample_data_loss)
+        result = self.analyze(self.sample_data_loss)
         
         # Test profit status
         self.assertEqual(result["profit_loss_status"]["status"], "negative")
@@ -76,7 +85,7 @@ class TestBusinessAgent(unittest.TestCase):
 
     def test_high_cac_scenario(self):
         """Test agent with high CAC increase scenario"""
-        result = run_business_analysis(self.sample_data_high_cac)
+        result = self.analyze(self.sample_data_high_cac)
         
         # Should detect CAC increase
         cac_change = result["customer_acquisition"]["cac_change_percent"]
@@ -95,7 +104,7 @@ class TestBusinessAgent(unittest.TestCase):
 
     def test_metrics_calculation_accuracy(self):
         """Test accuracy of metric calculations"""
-        result = run_business_analysis(self.sample_data_profitable)
+        result = self.analyze(self.sample_data_profitable)
         
         # Manual calculations for verification
         expected_profit = 5000 - 3000  # 2000
@@ -114,12 +123,12 @@ class TestBusinessAgent(unittest.TestCase):
         """Test recommendation generation logic"""
         
         # Test profitable case recommendations
-        result_profit = run_business_analysis(self.sample_data_profitable)
+        result_profit = self.analyze(self.sample_data_profitable)
         profit_recs = " ".join(result_profit["recommendations"]).lower()
         self.assertIn("maintain", profit_recs)  # Should maintain profitable operations
         
         # Test loss case recommendations  
-        result_loss = run_business_analysis(self.sample_data_loss)
+        result_loss = self.analyze(self.sample_data_loss)
         loss_recs = " ".join(result_loss["recommendations"]).lower()
         self.assertIn("reduce", loss_recs)  # Should reduce costs
         
@@ -133,7 +142,7 @@ class TestBusinessAgent(unittest.TestCase):
         }
         
         with self.assertRaises(ValueError):
-            run_business_analysis(invalid_data)
+            self.analyze(invalid_data)
             
         print("✅ Input validation test passed")
 
@@ -149,7 +158,7 @@ class TestBusinessAgent(unittest.TestCase):
         }
         
         # Should handle zero customers without crashing
-        result = run_business_analysis(edge_case_data)
+        result = self.analyze(edge_case_data)
         self.assertIsInstance(result, dict)
         self.assertEqual(result["customer_acquisition"]["current_cac"], 0)
         
@@ -157,7 +166,7 @@ class TestBusinessAgent(unittest.TestCase):
 
     def test_output_format(self):
         """Test output format compliance"""
-        result = run_business_analysis(self.sample_data_profitable)
+        result = self.analyze(self.sample_data_profitable)
         
         # Required output structure
         required_keys = ["profit_loss_status", "customer_acquisition", "alerts", "recommendations", "summary"]
@@ -180,6 +189,70 @@ class TestBusinessAgent(unittest.TestCase):
         
         print("✅ Output format test passed")
 
+class TestFullProfileAgent(TestBusinessAgent):
+    """The same behaviour through the full output profile (agent.py)"""
+    
+    def analyze(self, data):
+        return agent.run_business_analysis(data, save_to_file=False)
+    
+    def setUp(self):
+        super().setUp()
+        self.agent = agent.create_business_agent()
+
+class TestOutputProfiles(unittest.TestCase):
+    
+    sample = {
+        "daily_revenue": 2000,
+        "daily_cost": 3000,
+        "number_of_customers": 40,
+        "previous_day_revenue": 2500,
+        "previous_day_cost": 2000,
+        "previous_day_customers": 50
+    }
+    
+    def test_minimal_is_the_full_output_minus_extras(self):
+        """Both profiles share one kernel; minimal only leaves fields out"""
+        full = agent.run_business_analysis(self.sample, save_to_file=False)
+        minimal = agent.run_business_analysis(self.sample, save_to_file=False, profile="minimal")
+        for key in ("analysis_timestamp", "input_data"):
+            self.assertNotIn(key, minimal)
+        self.assertNotIn("previous_cac", minimal["customer_acquisition"])
+        self.assertNotIn("agent_version", minimal["summary"])
+        self.assertEqual(minimal["summary"]["analysis_date"], date.today().isoformat())
+        self.assertEqual(minimal["alerts"], full["alerts"])
+        self.assertEqual(minimal["recommendations"], full["recommendations"])
+        self.assertEqual(minimal["profit_loss_status"], full["profit_loss_status"])
+        full["customer_acquisition"].pop("previous_cac")
+        self.assertEqual(minimal["customer_acquisition"], full["customer_acquisition"])
+        self.assertEqual(run_business_analysis(self.sample), minimal)
+    
+    def test_batch_minimal_profile(self):
+        """The vectorized path renders the minimal profile exactly like the graph"""
+        columns = {field: [value] * 3 for field, value in self.sample.items()}
+        outputs = run_business_analysis_batch(columns, profile="minimal")
+        self.assertEqual(outputs, [run_business_analysis(self.sample)] * 3)
+        with self.assertRaises(ValueError):
+            run_business_analysis_batch(columns, profile="tiny")
+    
+    def test_minimal_profile_runs_as_one_node(self):
+        """The minimal graph is a single node, yet every step still reports events and timings"""
+        graph = agent.create_business_agent(profile="minimal")
+        self.assertEqual([name for name in graph.get_graph().nodes if not name.startswith("__")], ["analysis"])
+        steps = ["input", "processing", "recommendation", "output"]
+        instrumentation = Instrumentation()
+        with events.observing(events.CollectingObserver(level=events.INFO)) as observer:
+            run_business_analysis(self.sample)
+        self.assertEqual([event["node"] for event in observer.named("node_completed")], steps)
+        agent.run_business_analysis(self.sample, save_to_file=False, profile="minimal",
+                                    instrumentation=instrumentation)
+        self.assertEqual(sorted(instrumentation.snapshot()), sorted(steps))
+    
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            agent.create_business_agent(profile="tiny")
+        with self.assertRaises(ValueError):
+            agent.create_business_agent(compact=True, profile="minimal")
+
 def run_comprehensive_test():
     """Run comprehensive test with detailed output"""
     print("🧪 RUNNING COMPREHENSIVE BUSINESS AGENT TESTS")
@@ -187,7 +260,8 @@ def run_comprehensive_test():
     
     # Create test suite
     loader = unittest.TestLoader()
-    suite = loader.loadTestsFromTestCase(TestBusinessAgent)
+    suite = unittest.TestSuite(loader.loadTestsFromTestCase(case)
+                               for case in (TestBusinessAgent, TestFullProfileAgent, TestOutputProfiles))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
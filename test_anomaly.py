@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from agent import run_business_analysis, REQUIRED_FIELDS
+from anomaly import AnomalyDetector
+from batch import run_business_analysis_batch
+
+def _record(entity_id, revenue, cost=600, customers=10):
+    return {"entity_id": entity_id, "daily_revenue": revenue, "daily_cost": cost, "number_of_customers": customers,
+            "previous_day_revenue": 1000, "previous_day_cost": 600, "previous_day_customers": 10}
+
+STEADY = [1000, 1010, 990, 1005, 995, 1000, 1008, 992, 1003, 997]
+
+class TestAnomalyDetector(unittest.TestCase):
+
+    def test_spike_is_flagged_after_warmup(self):
+        detector = AnomalyDetector(alpha=0.2, threshold=3.0, warmup=5)
+        early = detector.observe("s1", 5000, 600, 60)
+        self.assertEqual(early["flagged"], [])
+        detector = AnomalyDetector(alpha=0.2, threshold=3.0, warmup=5)
+        for revenue in STEADY:
+            self.assertEqual(detector.observe("s1", revenue, 600, 60)["flagged"], [])
+        spike = detector.observe("s1", 2000, 600, 60)
+        self.assertEqual(spike["flagged"], ["revenue"])
+        self.assertGreater(spike["z_scores"]["revenue"], 3)
+        self.assertEqual(spike["observations"], len(STEADY) + 1)
+
+    def test_equal_weights_match_population_variance(self):
+        """alpha=None is Welford's running mean and variance"""
+        detector = AnomalyDetector(alpha=None)
+        for revenue in STEADY:
+            detector.observe("s1", revenue, 600, 60)
+        stats = detector.get("s1")
+        self.assertAlmostEqual(stats["mean"]["revenue"], np.mean(STEADY))
+        self.assertAlmostEqual(stats["std"]["revenue"], np.std(STEADY))
+
+    def test_batch_matches_sequential_updates(self):
+        """Repeated entities inside one batch are applied in order"""
+        rng = np.random.default_rng(1)
+        ids = rng.integers(0, 5, 200).tolist()
+        revenue = rng.normal(1000, 50, 200)
+        cost = rng.normal(600, 20, 200)
+        cac = rng.normal(60, 5, 200)
+
+        batched = AnomalyDetector(warmup=3).score_batch(ids, revenue, cost, cac)
+        sequential = AnomalyDetector(warmup=3)
+        for i, entity_id in enumerate(ids):
+            result = sequential.observe(entity_id, revenue[i], cost[i], cac[i])
+            self.assertAlmostEqual(result["z_scores"]["cost"], batched["cost"][i])
+            self.assertEqual(result["observations"], batched["observations"][i])
+
+    def test_snapshot_round_trip(self):
+        detector = AnomalyDetector(alpha=None, warmup=3)
+        for revenue in STEADY:
+            detector.observe("s1", revenue, 600, 60)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "anomaly.npz")
+            detector.save(path)
+            restored = AnomalyDetector.load(path)
+        self.assertIsNone(restored.alpha)
+        self.assertEqual(restored.get("s1"), detector.get("s1"))
+        self.assertEqual(restored.observe("s1", 1500, 600, 60), detector.observe("s1", 1500, 600, 60))
+
+    def test_graph_and_batch_paths_add_alerts(self):
+        detector = AnomalyDetector(alpha=0.2, warmup=5)
+        for revenue in STEADY:
+            run_business_analysis(_record("s1", revenue), save_to_file=False, anomaly_detector=detector)
+        output = run_business_analysis(_record("s1", 2500), save_to_file=False, anomaly_detector=detector)
+        self.assertEqual(output["anomalies"]["flagged"], ["revenue"])
+        self.assertTrue(output["alerts"][-1].startswith("🔍 Revenue is unusual"))
+        self.assertEqual(output["summary"]["total_alerts"], len(output["alerts"]))
+
+        detector = AnomalyDetector(alpha=0.2, warmup=5)
+        records = [_record("s1", revenue) for revenue in STEADY] + [_record("s1", 2500)]
+        columns = {field: [record[field] for record in records] for field in REQUIRED_FIELDS + ["entity_id"]}
+        outputs = run_business_analysis_batch(columns, anomaly_detector=detector)
+        self.assertEqual(outputs[-1]["anomalies"], output["anomalies"])
+        self.assertEqual(outputs[-1]["alerts"], output["alerts"])
+        with self.assertRaises(ValueError):
+            run_business_analysis_batch({field: columns[field] for field in REQUIRED_FIELDS},
+                                        anomaly_detector=detector)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import asyncio
+import contextlib
+import io
+import unittest
+from agent import arun_business_analysis, arun_business_analysis_batch, run_business_analysis, DEFAULT_SCENARIOS
+
+class TestAsyncAnalysis(unittest.TestCase):
+
+    def _run(self, coroutine):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(coroutine)
+
+    def test_matches_sync_result(self):
+        """The async entry point produces the same analysis as the sync one"""
+        data = DEFAULT_SCENARIOS["loss_scenario"]
+        result = self._run(arun_business_analysis(data, save_to_file=False))
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = run_business_analysis(data, save_to_file=False)
+        self.assertEqual(result["alerts"], expected["alerts"])
+        self.assertEqual(result["profit_loss_status"], expected["profit_loss_status"])
+
+    def test_batch_preserves_order(self):
+        """Concurrent batch results come back in input order"""
+        base = DEFAULT_SCENARIOS["profitable_growth"]
+        records = [{**base, "daily_revenue": 5000 + i} for i in range(50)]
+        results = self._run(arun_business_analysis_batch(records, concurrency=8))
+        self.assertEqual([r["input_data"]["daily_revenue"] for r in results], [5000 + i for i in range(50)])
+
+    def test_batch_return_exceptions(self):
+        """A bad record can be reported without failing the batch"""
+        records = [DEFAULT_SCENARIOS["profitable_growth"], {"daily_revenue": 1}]
+        results = self._run(arun_business_analysis_batch(records, return_exceptions=True))
+        self.assertIsInstance(results[0], dict)
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_invalid_concurrency(self):
+        """Concurrency must be positive"""
+        with self.assertRaises(ValueError):
+            self._run(arun_business_analysis_batch([], concurrency=0))
+
+if __name__ == "__main__":
+    unittest.main()
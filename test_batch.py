@@ -0,0 +1,72 @@
+import contextlib
+import io
+import unittest
+import numpy as np
+from agent import run_business_analysis
+from batch import run_business_analysis_batch
+
+RECORDS = [
+    # Profitable growth
+    {"daily_revenue": 8000, "daily_cost": 5000, "number_of_customers": 80,
+     "previous_day_revenue": 7000, "previous_day_cost": 4500, "previous_day_customers": 75},
+    # Loss with revenue decline
+    {"daily_revenue": 3000, "daily_cost": 4500, "number_of_customers": 30,
+     "previous_day_revenue": 4000, "previous_day_cost": 3500, "previous_day_customers": 40},
+    # High CAC
+    {"daily_revenue": 6000, "daily_cost": 5000, "number_of_customers": 25,
+     "previous_day_revenue": 6000, "previous_day_cost": 3000, "previous_day_customers": 60},
+    # Zero customers today
+    {"daily_revenue": 1000, "daily_cost": 500, "number_of_customers": 0,
+     "previous_day_revenue": 1000, "previous_day_cost": 500, "previous_day_customers": 1},
+    # Zero denominators on every previous-day field
+    {"daily_revenue": 1200.5, "daily_cost": 700.25, "number_of_customers": 7,
+     "previous_day_revenue": 0, "previous_day_cost": 0, "previous_day_customers": 0},
+]
+
+def _strip_timestamps(output):
+    output = dict(output)
+    output.pop("analysis_timestamp")
+    output["summary"] = {k: v for k, v in output["summary"].items() if k != "analysis_date"}
+    return output
+
+class TestBatchAnalysis(unittest.TestCase):
+
+    def _columns(self, as_numpy=False):
+        columns = {field: [record[field] for record in RECORDS] for field in RECORDS[0]}
+        if as_numpy:
+            columns = {field: np.array(values, dtype=np.float64) for field, values in columns.items()}
+        return columns
+
+    def test_matches_per_record_path(self):
+        """Batch results equal run_business_analysis row by row"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = [run_business_analysis(record, save_to_file=False) for record in RECORDS]
+        for as_numpy in (False, True):
+            results = run_business_analysis_batch(self._columns(as_numpy))
+            self.assertEqual(len(results), len(RECORDS))
+            for got, want in zip(results, expected):
+                self.assertEqual(_strip_timestamps(got), _strip_timestamps(want))
+
+    def test_zero_denominators(self):
+        """Zero customers and zero previous values yield 0 instead of failing"""
+        results = run_business_analysis_batch(self._columns())
+        self.assertEqual(results[3]["customer_acquisition"]["current_cac"], 0)
+        self.assertEqual(results[4]["profit_loss_status"]["revenue_change_percent"], 0)
+        self.assertEqual(results[4]["customer_acquisition"]["cac_change_percent"], 0)
+
+    def test_missing_field(self):
+        """Missing columns raise the same error as input_node"""
+        columns = self._columns()
+        del columns["daily_cost"]
+        with self.assertRaises(ValueError):
+            run_business_analysis_batch(columns)
+
+    def test_unequal_lengths(self):
+        """Columns of different lengths are rejected"""
+        columns = self._columns()
+        columns["daily_cost"] = columns["daily_cost"][:-1]
+        with self.assertRaises(ValueError):
+            run_business_analysis_batch(columns)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from agent import REQUIRED_FIELDS
+from benchmarks.suite import compare_to_baseline, synthetic_columns
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_synthetic_columns_are_valid_records(self):
+        """Synthetic data has every required field, positive customer counts and is reproducible"""
+        columns = synthetic_columns(500, seed=3)
+        self.assertEqual(set(columns), set(REQUIRED_FIELDS))
+        self.assertTrue((columns["number_of_customers"] >= 1).all())
+        self.assertEqual(columns["daily_revenue"].tolist(), synthetic_columns(500, seed=3)["daily_revenue"].tolist())
+
+    def test_regressions_respect_direction_and_tolerance(self):
+        """Slower latency and lower throughput beyond the tolerance are reported, improvements are not"""
+        baseline = {
+            "latency_ms": {"value": 1.0, "unit": "ms", "better": "lower"},
+            "throughput": {"value": 1000.0, "unit": "records/s", "better": "higher"},
+        }
+        results = {
+            "latency_ms": {"value": 1.6, "unit": "ms", "better": "lower"},
+            "throughput": {"value": 2000.0, "unit": "records/s", "better": "higher"},
+            "new_benchmark": {"value": 5.0, "unit": "ms", "better": "lower"},
+        }
+        regressions = compare_to_baseline(results, baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("latency_ms"))
+
+        results["throughput"]["value"] = 400.0
+        self.assertEqual(len(compare_to_baseline(results, baseline, tolerance=0.5)), 2)
+
+if __name__ == "__main__":
+    unittest.main()
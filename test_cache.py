@@ -0,0 +1,108 @@
+import tempfile
+import time
+import unittest
+from agent import run_business_analysis, DEFAULT_SCENARIOS, DEFAULT_RULE_SPECS
+from cache import AnalysisCache, MemoryBackend, DiskBackend
+from history import HistoryStore
+from instrumentation import Instrumentation
+from rules import compile_rules
+
+DATA = DEFAULT_SCENARIOS["profitable_growth"]
+
+class TestAnalysisCache(unittest.TestCase):
+
+    def test_hit_skips_graph(self):
+        """A repeated input is served from the cache without running the nodes"""
+        cache = AnalysisCache()
+        instrumentation = Instrumentation()
+        first = run_business_analysis(DATA, save_to_file=False, cache=cache, instrumentation=instrumentation)
+        second = run_business_analysis(dict(reversed(list(DATA.items()))), save_to_file=False, cache=cache,
+                                       instrumentation=instrumentation)
+        self.assertEqual(instrumentation.snapshot()["input"]["calls"], 1)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        first.pop("analysis_timestamp")
+        second.pop("analysis_timestamp")
+        self.assertEqual(first, second)
+
+    def test_timestamps_filled_on_read(self):
+        """Cached outputs carry read-time timestamps"""
+        cache = AnalysisCache()
+        first = run_business_analysis(DATA, save_to_file=False, cache=cache)
+        time.sleep(0.01)
+        second = run_business_analysis(DATA, save_to_file=False, cache=cache)
+        self.assertGreater(second["analysis_timestamp"], first["analysis_timestamp"])
+
+    def test_stored_without_timestamps(self):
+        """The stored payload has blank timestamps and input_data; both are filled in on read"""
+        cache = AnalysisCache()
+        key = cache.key({"daily_revenue": 5000, "daily_cost": 3000})
+        self.assertNotEqual(key, cache.key({"daily_revenue": 5000.0, "daily_cost": 3000.0}))
+        cache.put(key, {"analysis_timestamp": "2024-01-01T00:00:00", "summary": {"analysis_date": "2024-01-01"},
+                        "input_data": {"note": "caller"}})
+        stored = cache.backend._entries[key][0]
+        self.assertNotIn(b"2024-01-01", stored)
+        self.assertNotIn(b"caller", stored)
+        cached = cache.get(key, {"note": "reader"})
+        self.assertNotEqual(cached["summary"]["analysis_date"], "2024-01-01")
+        self.assertEqual(cached["input_data"], {"note": "reader"})
+
+    def test_key_uses_parsed_record(self):
+        """Numeric strings hit the entry of the parsed value; output types match a fresh run"""
+        cache = AnalysisCache()
+        run_business_analysis(dict(DATA, daily_revenue=str(DATA["daily_revenue"])), save_to_file=False, cache=cache)
+        cached = run_business_analysis(DATA, save_to_file=False, cache=cache)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        self.assertEqual(cached["input_data"], DATA)
+
+        as_float = {name: float(value) for name, value in DATA.items()}
+        fresh = run_business_analysis(as_float, save_to_file=False)
+        cached = run_business_analysis(as_float, save_to_file=False, cache=cache)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertIs(type(cached["profit_loss_status"]["daily_profit"]), type(fresh["profit_loss_status"]["daily_profit"]))
+        cached = run_business_analysis(as_float, save_to_file=False, cache=cache)
+        self.assertIs(type(cached["profit_loss_status"]["daily_profit"]), float)
+        self.assertEqual(cached["input_data"], as_float)
+
+    def test_rules_are_part_of_key(self):
+        """Different rule sets do not share cached outputs"""
+        cache = AnalysisCache()
+        custom = compile_rules(DEFAULT_RULE_SPECS[:1])
+        run_business_analysis(DATA, save_to_file=False, cache=cache)
+        result = run_business_analysis(DATA, save_to_file=False, cache=cache, rules=custom)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertEqual(len(result["recommendations"]), 1)
+
+    def test_lru_size_and_ttl(self):
+        """Entries are evicted by count and expire after the TTL"""
+        cache = AnalysisCache(MemoryBackend(max_entries=2))
+        for revenue in (1, 2, 3):
+            cache.put(cache.key({"r": revenue}), {"value": revenue})
+        self.assertIsNone(cache.get(cache.key({"r": 1})))
+        self.assertEqual(cache.stats.evictions, 1)
+
+        cache = AnalysisCache(ttl=0.01)
+        cache.put("k", {"value": 1})
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats.expirations, 1)
+
+    def test_disk_backend_survives_restart(self):
+        """The disk backend finds earlier results after being reopened"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = AnalysisCache(DiskBackend(tmpdir, max_entries=10))
+            run_business_analysis(DATA, save_to_file=False, cache=cache)
+            reopened = AnalysisCache(DiskBackend(tmpdir))
+            self.assertEqual(len(reopened.backend), 1)
+            result = run_business_analysis(DATA, save_to_file=False, cache=reopened)
+            self.assertEqual(reopened.stats.hits, 1)
+            self.assertEqual(result["profit_loss_status"]["daily_profit"], 3000)
+
+    def test_history_not_cacheable(self):
+        """History-backed runs refuse a cache"""
+        with self.assertRaises(ValueError):
+            run_business_analysis({"entity_id": "a", "date": "2024-01-01", "daily_revenue": 1, "daily_cost": 1,
+                                   "number_of_customers": 1}, save_to_file=False, history=HistoryStore(),
+                                  cache=AnalysisCache())
+
+if __name__ == "__main__":
+    unittest.main()
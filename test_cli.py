@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import orjson
+from cli import main, SAMPLE_RECORD
+from ingest import ingest_file
+from persistence import read_results
+
+class TestCommandLine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmpdir.name, "daily.jsonl")
+        with open(self.input_path, "wb") as f:
+            for i in range(25):
+                f.write(orjson.dumps(dict(SAMPLE_RECORD, daily_revenue=1000 + 300 * i)) + b"\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_analyze_record_to_file(self):
+        """A record given as JSON text is analyzed into the requested file without prompting"""
+        output = self._path("result.json")
+        record = dict(SAMPLE_RECORD, daily_cost=6000)
+        self.assertEqual(main(["analyze", orjson.dumps(record).decode(), "-o", output, "-q"]), 0)
+        with open(output, "rb") as f:
+            result = orjson.loads(f.read())
+        self.assertEqual(result["profit_loss_status"]["status"], "negative")
+
+    def test_stream_matches_ingest_with_workers(self):
+        """Streaming through worker processes writes the same results in input order"""
+        parallel = self._path("parallel.msgpack")
+        self.assertEqual(main(["stream", self.input_path, "-o", parallel, "--workers", "2",
+                               "--chunk-size", "4", "--no-input", "-q"]), 0)
+        serial = self._path("serial.msgpack")
+        ingest_file(self.input_path, serial, chunk_size=4, include_input=False)
+        strip = lambda results: [(r["profit_loss_status"], r["alerts"]) for r in results]
+        self.assertEqual(strip(read_results(parallel)), strip(read_results(serial)))
+        self.assertEqual(len(list(read_results(parallel))), 25)
+
+    def test_stream_rejects_json_document_output(self):
+        """Streams are written as jsonl or msgpack, never as one JSON document"""
+        self.assertEqual(main(["stream", self.input_path, "-o", self._path("out.json"), "-q"]), 2)
+
+    def test_errors_are_one_line_with_nonzero_exit(self):
+        """Invalid records and missing files print one line on stderr instead of a traceback"""
+        for argv in (["analyze", orjson.dumps(dict(SAMPLE_RECORD, daily_cost=-1)).decode(), "-q"],
+                     ["stream", self._path("missing.jsonl"), "-o", self._path("out.jsonl"), "-q"]):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(main(argv), 1)
+            self.assertEqual(len(stderr.getvalue().strip().splitlines()), 1)
+            self.assertTrue(stderr.getvalue().startswith("❌"))
+
+    def test_events_on_stderr_unless_quiet(self):
+        """Node events go to stderr at INFO by default, payload dumps only with -v, nothing with -q"""
+        record = orjson.dumps(SAMPLE_RECORD).decode()
+        output = self._path("result.json")
+        logs = {}
+        for flag in ("", "-v", "-q"):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(main(["analyze", record, "-o", output] + ([flag] if flag else [])), 0)
+            logs[flag] = stderr.getvalue()
+        self.assertIn("🚀 Starting business analysis", logs[""])
+        self.assertNotIn("🔎", logs[""])
+        self.assertIn("🔎 processing", logs["-v"])
+        self.assertEqual(logs["-q"], "")
+
+    def test_scenarios_to_jsonl(self):
+        """A scenario sweep writes one line per scenario and no langgraph_*.json files"""
+        scenarios_path = self._path("scenarios.json")
+        with open(scenarios_path, "wb") as f:
+            f.write(orjson.dumps({"a": SAMPLE_RECORD, "b": dict(SAMPLE_RECORD, daily_cost=9000)}))
+        output = self._path("sweep.jsonl")
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            self.assertEqual(main(["scenarios", "--scenarios", scenarios_path, "-o", output, "-q"]), 0)
+        finally:
+            os.chdir(cwd)
+        rows = list(read_results(output))
+        self.assertEqual([row["scenario"] for row in rows], ["a", "b"])
+        self.assertEqual(rows[1]["result"]["profit_loss_status"]["status"], "negative")
+        self.assertFalse([name for name in os.listdir(self.tmpdir.name) if name.startswith("langgraph")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from batch import run_business_analysis_batch
+from benchmarks.suite import synthetic_columns
+from cli import SAMPLE_RECORD, main
+from columnar import ColumnStore
+from rules import compile_rules
+from core import DEFAULT_RULE_SPECS
+
+class TestColumnStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "store")
+        self.store = ColumnStore(self.root)
+        self.columns = synthetic_columns(600, seed=7)
+        self.dates = [f"2024-05-{i % 3 + 1:02d}" for i in range(600)]
+        self.entities = [f"store-{i % 10}" for i in range(600)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_columns_match_batch_outputs(self):
+        """Stored flags, counts and alert bits agree with run_business_analysis_batch"""
+        self.store.append_batch(self.columns, dates="2024-06-01")
+        outputs = run_business_analysis_batch(self.columns, include_input=False)
+        result = self.store.query()
+        self.assertEqual(result["cac_alert"].tolist(),
+                         [output["customer_acquisition"]["cac_alert"] for output in outputs])
+        self.assertEqual(result["total_alerts"].tolist(), [output["summary"]["total_alerts"] for output in outputs])
+        self.assertEqual(result["total_recommendations"].tolist(),
+                         [output["summary"]["total_recommendations"] for output in outputs])
+        alerted = [len(self.store.rule_names(bits)) for bits in result["alerts"].tolist()]
+        self.assertEqual(alerted, result["total_alerts"].tolist())
+        self.assertTrue(np.array_equal(result["daily_profit"], self.columns["daily_revenue"] - self.columns["daily_cost"]))
+
+    def test_date_partitions_and_filters(self):
+        """Rows land in one partition per date and filters combine with AND"""
+        self.store.append_batch(self.columns, dates=self.dates, entity_ids=self.entities)
+        self.assertEqual(self.store.partitions(), ["2024-05-01", "2024-05-02", "2024-05-03"])
+
+        result = self.store.query("2024-05-02", "2024-05-03", where=["cac_alert == 1"], entities=["store-3"],
+                                  columns=["cac_change_percent"])
+        rows = [i for i in range(600) if self.dates[i] >= "2024-05-02" and self.entities[i] == "store-3"]
+        metrics = run_business_analysis_batch(self.columns, include_input=False)
+        expected = [i for i in rows if metrics[i]["customer_acquisition"]["cac_alert"]]
+        self.assertEqual(len(result["date"]), len(expected))
+        self.assertTrue((result["cac_change_percent"] > 20).all())
+        self.assertEqual(set(result["entity_id"].tolist()), {"store-3"} if expected else set())
+        self.assertEqual(self.store.count("2024-05-02", "2024-05-03", where=["cac_alert == 1"], entities=["store-3"]),
+                         len(expected))
+        self.assertEqual(self.store.count(alerts=["cac_increase"]), self.store.count(where=["cac_alert == 1"]))
+
+    def test_columns_are_memory_mapped(self):
+        """Readers get read-only memory maps of the segment files"""
+        self.store.append_batch(self.columns, dates="2024-06-01")
+        segment = next(self.store.segments())
+        column = segment.column("cac_change_percent")
+        self.assertIsInstance(column, np.memmap)
+        self.assertFalse(column.flags.writeable)
+        self.assertEqual(len(segment), 600)
+
+    def test_bitmasks_follow_the_store_rules(self):
+        """Segments written under another rule list are re-encoded over the reader's rules"""
+        self.store.append_batch(self.columns, dates="2024-06-01")
+        reversed_rules = compile_rules(list(reversed(DEFAULT_RULE_SPECS)))
+        reader = ColumnStore(self.root, rules=reversed_rules)
+        bits = reader.query(columns=["alerts"])["alerts"].tolist()
+        original = self.store.query(columns=["alerts"])["alerts"].tolist()
+        self.assertEqual([sorted(reader.rule_names(value)) for value in bits],
+                         [sorted(self.store.rule_names(value)) for value in original])
+
+    def test_bad_dates_write_nothing_or_are_rejected(self):
+        """A bad partition date fails the whole batch up front; per-record bad dates are rejected"""
+        dates = list(self.dates)
+        dates[-1] = "2024-13-01"
+        with self.assertRaisesRegex(ValueError, "2024-13-01"):
+            self.store.append_batch(self.columns, dates=dates)
+        self.assertEqual(self.store.partitions(), [])
+
+        record = {field: float(column[0]) for field, column in self.columns.items()}
+        records = [dict(record, date="2024-05-01"), dict(record, date=""), dict(record, date="20240501"), dict(record)]
+        rejects = []
+        written = self.store.append_records(records, default_date="2024-05-09",
+                                            on_reject=lambda number, record, error: rejects.append(number))
+        self.assertEqual(written, 2)
+        self.assertEqual(rejects, [2, 3])
+        self.assertEqual(self.store.partitions(), ["2024-05-01", "2024-05-09"])
+
+    def test_invalid_batch_writes_nothing(self):
+        """append_batch runs the schema checks before analysing or writing anything"""
+        columns = {field: column.copy() for field, column in self.columns.items()}
+        columns["number_of_customers"] = columns["number_of_customers"].astype(float)
+        columns["number_of_customers"][5] = 2.5
+        with self.assertRaisesRegex(ValueError, "Row 5"):
+            self.store.append_batch(columns, dates="2024-06-01")
+        columns["number_of_customers"][5] = 3
+        columns["daily_cost"][7] = np.nan
+        with self.assertRaisesRegex(ValueError, "Row 7"):
+            self.store.append_batch(columns, dates="2024-06-01")
+        self.assertEqual(self.store.partitions(), [])
+
+    def test_conditions_use_the_rules_parser(self):
+        """Text conditions share the rule leaf syntax; unknown columns and operators are refused"""
+        self.store.append_batch(self.columns, dates="2024-06-01")
+        self.assertEqual(self.store.query(where=["cac_change_percent > 20"])["cac_alert"].all(), True)
+        with self.assertRaisesRegex(ValueError, "Unknown column"):
+            self.store.query(where=["fired > 1"])
+        with self.assertRaisesRegex(ValueError, "Unknown operator"):
+            self.store.query(where=[("daily_profit", "=>", 0)])
+
+    def test_cli_store_and_query(self):
+        """`store` skips invalid records and `query --count` counts the matches"""
+        input_path = os.path.join(self.tmpdir.name, "daily.jsonl")
+        with open(input_path, "w") as f:
+            for i in range(20):
+                f.write(f'{{"entity_id": "s{i % 2}", "date": "2024-05-0{i % 2 + 1}", "daily_revenue": {1000 + i}, '
+                        f'"daily_cost": 3000, "number_of_customers": 50, "previous_day_revenue": 4500, '
+                        f'"previous_day_cost": 2500, "previous_day_customers": 45}}\n')
+            f.write('{"daily_revenue": 1}\n')
+        self.assertEqual(main(["store", input_path, "--store", self.root, "-q"]), 0)
+        output = os.path.join(self.tmpdir.name, "count.json")
+        self.assertEqual(main(["query", "--store", self.root, "--from", "2024-05-02", "--alert", "negative_profit",
+                               "--count", "-o", output, "-q"]), 0)
+        with open(output) as f:
+            self.assertIn('"count": 10', f.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from agent import run_business_analysis, calculate_metrics, DEFAULT_RULES, DEFAULT_SCENARIOS, REQUIRED_FIELDS
+from batch import run_business_analysis_batch
+from compact import CompactMetrics, MessageCatalog, analyze_batch_compact, fired_mask, RECORD_DTYPE
+
+def _strip(output):
+    output = dict(output)
+    output.pop("analysis_timestamp")
+    output.pop("input_data", None)
+    return output
+
+class TestCompactState(unittest.TestCase):
+
+    def test_metrics_match_calculate_metrics(self):
+        """Slotted metrics hold exactly the values of the dict-based calculation"""
+        for record in DEFAULT_SCENARIOS.values():
+            metrics = CompactMetrics.from_record(record)
+            expected = calculate_metrics(record)
+            self.assertEqual(metrics.to_dict(), expected)
+            self.assertFalse(hasattr(metrics, "__dict__"))
+
+    def test_graph_compact_mode_matches_full_output(self):
+        """Compact mode renders the same messages and omits input_data"""
+        for record in DEFAULT_SCENARIOS.values():
+            full = run_business_analysis(record, save_to_file=False)
+            compact = run_business_analysis(record, save_to_file=False, compact=True)
+            self.assertNotIn("input_data", compact)
+            self.assertEqual(_strip(compact), _strip(full))
+
+    def test_bitmask_renders_localized_text(self):
+        """The same fired-rules bitmask renders to English or Persian"""
+        metrics = CompactMetrics.from_record(DEFAULT_SCENARIOS["loss_scenario"])
+        mask = fired_mask(DEFAULT_RULES, metrics)
+        english, _ = MessageCatalog(DEFAULT_RULES, "en").render(mask, metrics)
+        persian, _ = MessageCatalog(DEFAULT_RULES, "fa").render(mask, metrics)
+        self.assertEqual(english, DEFAULT_RULES.evaluate(calculate_metrics(DEFAULT_SCENARIOS["loss_scenario"]))[0])
+        self.assertEqual(len(persian), len(english))
+        self.assertIn("سود روزانه منفی است", persian[0])
+        with self.assertRaises(ValueError):
+            MessageCatalog(DEFAULT_RULES, "xx")
+
+    def test_batch_matches_dict_outputs(self):
+        """A compact batch is 56 bytes per record and renders the same outputs on demand"""
+        records = list(DEFAULT_SCENARIOS.values()) * 4
+        columns = {field: [record[field] for record in records] for field in REQUIRED_FIELDS}
+        batch = analyze_batch_compact(columns)
+        self.assertEqual(len(batch), len(records))
+        self.assertEqual(batch.nbytes, len(records) * RECORD_DTYPE.itemsize)
+
+        expected = run_business_analysis_batch(columns, include_input=False)
+        self.assertEqual([_strip(output) for output in batch.outputs()], [_strip(output) for output in expected])
+        self.assertEqual(_strip(batch.output(1)), _strip(expected[1]))
+        self.assertEqual(batch.fired("negative_profit").tolist(), [False, True, False] * 4)
+
+if __name__ == "__main__":
+    unittest.main()
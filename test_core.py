@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import unittest
+import numpy as np
+from batch import compute_metrics_batch
+from compact import CompactMetrics
+from scenarios import ScenarioSet
+from core import calculate_metrics, evaluate_metric, DEFAULT_RULES, METRIC_TABLE, NUMERIC_METRICS, REQUIRED_FIELDS
+
+class TestCore(unittest.TestCase):
+
+    def test_zero_customers_and_zero_previous_values(self):
+        """Divisions by zero customers or zero previous values yield 0 instead of raising"""
+        data = dict.fromkeys(REQUIRED_FIELDS, 0)
+        data["daily_revenue"] = 100
+        metrics = calculate_metrics(data)
+        self.assertEqual(metrics["current_cac"], 0)
+        self.assertEqual(metrics["revenue_change_percent"], 0)
+        self.assertEqual(metrics["cac_change_percent"], 0)
+        alerts, recommendations = DEFAULT_RULES.evaluate(metrics)
+        self.assertEqual(alerts, [])
+
+    def test_one_metric_table_for_every_path(self):
+        """Per-record, compact, scenario and single-metric evaluation all agree bit for bit"""
+        record = {"daily_revenue": 5000, "daily_cost": 3000, "number_of_customers": 50,
+                  "previous_day_revenue": 4500, "previous_day_cost": 2500, "previous_day_customers": 45}
+        expected = calculate_metrics(record)
+        self.assertEqual(list(expected), list(METRIC_TABLE))
+        self.assertEqual(CompactMetrics.from_record(record).to_dict(), expected)
+        batch = compute_metrics_batch({field: np.array([value]) for field, value in record.items()})
+        self.assertEqual({name: column[0] for name, column in batch.items()},
+                         {name: expected[name] for name in NUMERIC_METRICS})
+        scenario = ScenarioSet.grid(record, {"daily_cost": [3000]}).evaluate()
+        self.assertEqual(float(scenario.metric("cac_change_percent")[0]), expected["cac_change_percent"])
+        for metric in METRIC_TABLE:
+            self.assertEqual(evaluate_metric(metric, {**record, **expected}), expected[metric])
+
+    def test_import_does_not_load_langgraph(self):
+        """The metric, batch and ingest paths start without LangGraph; building a graph loads it"""
+        code = ("import sys, core, batch, ingest, agent, simple_agent; "
+                "print('langgraph' in sys.modules); agent.get_business_agent(); print('langgraph' in sys.modules)")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ["False", "True"])
+
+    def test_agent_reexports_core(self):
+        import agent
+        self.assertIs(agent.calculate_metrics, calculate_metrics)
+        self.assertIs(agent.DEFAULT_RULES, DEFAULT_RULES)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import contextlib
+import io
+import unittest
+import events
+from agent import run_business_analysis, DEFAULT_SCENARIOS
+import simple_agent
+
+class TestEvents(unittest.TestCase):
+
+    def test_silent_by_default(self):
+        """Library calls print nothing when no observer is installed"""
+        self.assertIsNone(events.get_observer())
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_business_analysis(DEFAULT_SCENARIOS["loss_scenario"], save_to_file=False)
+            simple_agent.run_business_analysis(DEFAULT_SCENARIOS["loss_scenario"])
+        self.assertEqual(out.getvalue(), "")
+
+    def test_node_events(self):
+        """Each node reports its name, duration and state counts"""
+        with events.observing(events.CollectingObserver(level=events.INFO)) as observer:
+            run_business_analysis(DEFAULT_SCENARIOS["loss_scenario"], save_to_file=False)
+        nodes = observer.named("node_completed")
+        self.assertEqual([event["node"] for event in nodes], ["input", "processing", "recommendation", "output"])
+        self.assertTrue(all(event["duration_ms"] >= 0 for event in nodes))
+        self.assertEqual(nodes[2]["counts"]["alerts"], 4)
+        self.assertEqual(len(observer.named("analysis_completed")), 1)
+        # Payload dumps are DEBUG only
+        self.assertEqual(observer.named("payload"), [])
+
+    def test_debug_payloads(self):
+        """DEBUG observers also receive the input and metrics payloads"""
+        with events.observing(events.CollectingObserver(level=events.DEBUG)) as observer:
+            run_business_analysis(DEFAULT_SCENARIOS["profitable_growth"], save_to_file=False)
+        payloads = observer.named("payload")
+        self.assertEqual([event["node"] for event in payloads], ["input", "processing"])
+        self.assertEqual(payloads[1]["data"]["daily_profit"], 3000)
+
+    def test_console_observer(self):
+        """The console observer renders the familiar progress lines"""
+        out = io.StringIO()
+        with events.observing(events.ConsoleObserver(stream=out)):
+            run_business_analysis(DEFAULT_SCENARIOS["loss_scenario"], save_to_file=False)
+        text = out.getvalue()
+        self.assertIn("🚀 Starting business analysis...", text)
+        self.assertIn("💡 Generated 4 alerts and 4 recommendations", text)
+
+    def test_observing_restores_previous(self):
+        """The observing context manager restores the previous observer"""
+        outer = events.CollectingObserver()
+        with events.observing(outer):
+            with events.observing(None):
+                self.assertFalse(events.is_enabled(events.ERROR))
+            self.assertIs(events.get_observer(), outer)
+        self.assertIsNone(events.get_observer())
+
+    def test_observer_requires_on_event(self):
+        """The base Observer is abstract; subclasses must implement on_event"""
+        with self.assertRaises(TypeError):
+            events.Observer()
+
+if __name__ == "__main__":
+    unittest.main()
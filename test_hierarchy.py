@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from agent import calculate_metrics, run_business_analysis, REQUIRED_FIELDS
+from hierarchy import Hierarchy, RollupAccumulator, rollup_records
+
+def _store(entity_id, parent_id, revenue, cost, customers):
+    return {"entity_id": entity_id, "parent_id": parent_id, "daily_revenue": revenue, "daily_cost": cost,
+            "number_of_customers": customers, "previous_day_revenue": 1000, "previous_day_cost": 600,
+            "previous_day_customers": 10}
+
+STORES = [
+    _store("s1", "north", 1200, 500, 10),
+    _store("s2", "north", 800, 900, 4),
+    _store("s3", "south", 1500, 700, 20),
+]
+REGIONS = {"north": "acme", "south": "acme"}
+
+class TestHierarchy(unittest.TestCase):
+
+    def test_levels_and_unknown_parents_become_roots(self):
+        hierarchy = Hierarchy({"s1": "north", "north": "acme", "s2": None})
+        levels = {entity: int(hierarchy.level[hierarchy.index[entity]]) for entity in hierarchy.ids}
+        self.assertEqual(levels, {"s1": 2, "north": 1, "acme": 0, "s2": 0})
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Hierarchy({"a": "b", "b": "a"})
+        with self.assertRaises(ValueError):
+            Hierarchy({"a": "a"})
+
+    def test_rollup_sums_and_blended_cac(self):
+        """Every level gets summed inputs, with CAC blended as total cost over total customers"""
+        rollup = rollup_records(STORES, REGIONS)
+        self.assertEqual(rollup.metric("north", "daily_revenue"), 2000)
+        self.assertEqual(rollup.metric("acme", "number_of_customers"), 34)
+        self.assertAlmostEqual(rollup.metric("north", "current_cac"), 1400 / 14)
+        self.assertAlmostEqual(rollup.metric("acme", "daily_profit"), 3500 - 2100)
+
+        # The company row matches analyzing the summed record through the graph
+        summed = {field: sum(store[field] for store in STORES) for field in REQUIRED_FIELDS}
+        expected = run_business_analysis(summed, save_to_file=False)
+        (company,) = rollup.outputs(level=0)
+        self.assertEqual(company["entity_id"], "acme")
+        self.assertEqual(company["record_count"], 3)
+        self.assertEqual(company["alerts"], expected["alerts"])
+        self.assertEqual(company["customer_acquisition"], expected["customer_acquisition"])
+
+    def test_streaming_chunks_match_single_pass(self):
+        """Accumulating chunk by chunk gives the same sums as one call"""
+        accumulator = RollupAccumulator(Hierarchy.from_records(STORES, parents=REGIONS))
+        for store in STORES:
+            accumulator.add_records([store])
+        accumulator.add_records([STORES[0]])
+        streamed = accumulator.result()
+        self.assertEqual(streamed.metric("s1", "daily_revenue"), 2400)
+        self.assertEqual(streamed.metric("acme", "daily_revenue"), 4700)
+        self.assertEqual(int(streamed.record_counts[streamed.hierarchy.index["north"]]), 3)
+
+        with self.assertRaises(ValueError):
+            accumulator.add_records([_store("nowhere", None, 1, 1, 1)])
+
+    def test_store_metrics_match_per_record(self):
+        rollup = rollup_records(STORES, REGIONS)
+        for store in STORES:
+            expected = calculate_metrics(store)
+            self.assertTrue(np.isclose(rollup.metric(store["entity_id"], "cac_change_percent"),
+                                       expected["cac_change_percent"]))
+
+if __name__ == "__main__":
+    unittest.main()
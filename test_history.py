@@ -0,0 +1,96 @@
+import contextlib
+import io
+import unittest
+from datetime import date, timedelta
+from agent import run_business_analysis
+from history import HistoryStore
+
+START = date(2024, 1, 1)
+
+def _day(offset):
+    return (START + timedelta(days=offset)).isoformat()
+
+class TestHistoryStore(unittest.TestCase):
+
+    def test_previous_day_comparison(self):
+        """The second day is compared against the first"""
+        store = HistoryStore()
+        store.append("store-1", _day(0), 4500, 2500, 45)
+        comparison = store.append("store-1", _day(1), 5000, 3000, 50)
+        self.assertEqual(comparison["previous_day_revenue"], 4500)
+        self.assertEqual(comparison["previous_day_cost"], 2500)
+        self.assertEqual(comparison["previous_day_customers"], 45)
+
+    def test_missing_previous_day(self):
+        """A gap in history yields zero previous-day values"""
+        store = HistoryStore()
+        store.append("store-1", _day(0), 4500, 2500, 45)
+        comparison = store.append("store-1", _day(3), 5000, 3000, 50)
+        self.assertEqual(comparison["previous_day_revenue"], 0)
+
+    def test_week_over_week_and_rolling(self):
+        """Week-over-week and rolling metrics match a full rescan"""
+        store = HistoryStore(retention_days=14, rolling_days=7)
+        revenues = [1000 + 100 * i for i in range(20)]
+        for i, revenue in enumerate(revenues):
+            comparison = store.append("store-1", _day(i), revenue, 500, 10)
+        trends = comparison["trends"]
+        self.assertAlmostEqual(trends["week_over_week_revenue_percent"], (revenues[-1] - revenues[-8]) / revenues[-8] * 100)
+        self.assertAlmostEqual(trends["rolling_revenue_avg"], sum(revenues[-7:]) / 7)
+        self.assertEqual(trends["rolling_days_observed"], 7)
+        self.assertAlmostEqual(trends["rolling_cac"], 50)
+
+    def test_retention_window(self):
+        """Days older than the retention window are evicted"""
+        store = HistoryStore(retention_days=10)
+        for i in range(15):
+            store.append("store-1", _day(i), 100, 50, 5)
+        self.assertIsNone(store.get("store-1", _day(4)))
+        self.assertIsNotNone(store.get("store-1", _day(5)))
+
+    def test_correction_and_out_of_order(self):
+        """Re-appending the latest day replaces it; older days are rejected"""
+        store = HistoryStore()
+        store.append("store-1", _day(0), 100, 50, 5)
+        store.append("store-1", _day(1), 200, 50, 5)
+        comparison = store.append("store-1", _day(1), 300, 50, 5)
+        self.assertEqual(comparison["trends"]["rolling_revenue_avg"], 200)
+        with self.assertRaises(ValueError):
+            store.append("store-1", _day(0), 100, 50, 5)
+
+    def test_entities_are_independent(self):
+        """Many entities grow the store without mixing their series"""
+        store = HistoryStore(initial_entities=2)
+        for entity in range(10):
+            store.append(entity, _day(0), entity, 1, 1)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.get(7, _day(0))["daily_revenue"], 7)
+
+    def test_agent_reads_history(self):
+        """run_business_analysis fills previous-day fields from the store"""
+        store = HistoryStore()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_business_analysis({"entity_id": "s1", "date": _day(0), "daily_revenue": 4500,
+                                   "daily_cost": 2500, "number_of_customers": 45}, save_to_file=False, history=store)
+            result = run_business_analysis({"entity_id": "s1", "date": _day(1), "daily_revenue": 5000,
+                                            "daily_cost": 3000, "number_of_customers": 50}, save_to_file=False, history=store)
+        self.assertAlmostEqual(result["profit_loss_status"]["revenue_change_percent"], 11.11, places=2)
+        self.assertEqual(result["input_data"]["previous_day_cost"], 2500)
+        self.assertIn("rolling_revenue_avg", result["trends"])
+
+    def test_agent_rejects_invalid_current_day_values(self):
+        """History-backed records get the same value checks as input_node and never reach the store"""
+        store = HistoryStore()
+        base = {"entity_id": "s1", "date": _day(0), "daily_revenue": 4500, "daily_cost": 2500,
+                "number_of_customers": 45}
+        for field, value in (("daily_revenue", float("nan")), ("daily_cost", -1), ("number_of_customers", "many")):
+            with self.assertRaisesRegex(ValueError, field):
+                run_business_analysis(dict(base, **{field: value}), save_to_file=False, history=store)
+        self.assertEqual(len(store), 0)
+        record = dict(base, daily_revenue="4500")
+        result = run_business_analysis(record, save_to_file=False, history=store)
+        self.assertEqual(result["input_data"]["daily_revenue"], 4500)
+        self.assertEqual(record["daily_revenue"], "4500")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import random
+import unittest
+from agent import run_business_analysis
+from core import REQUIRED_FIELDS
+from incremental import IncrementalAnalysis, IncrementalAnalyzer
+from rules import compile_rules
+
+RECORD = {
+    "daily_revenue": 5000,
+    "daily_cost": 3000,
+    "number_of_customers": 50,
+    "previous_day_revenue": 4500,
+    "previous_day_cost": 2500,
+    "previous_day_customers": 45
+}
+
+def _without_timestamp(output):
+    return {key: value for key, value in output.items() if key != "analysis_timestamp"}
+
+class TestIncrementalAnalysis(unittest.TestCase):
+
+    def test_corrections_match_a_fresh_analysis(self):
+        """After any sequence of corrections the patched output equals a full rerun"""
+        rng = random.Random(5)
+        for profile in ("full", "minimal"):
+            for _ in range(50):
+                record = {field: rng.randint(0, 9000) for field in REQUIRED_FIELDS}
+                analysis = IncrementalAnalysis(record, profile=profile)
+                for _ in range(4):
+                    field = rng.choice(REQUIRED_FIELDS)
+                    record[field] = rng.randint(0, 9000)
+                    analysis.update({field: record[field]})
+                    fresh = run_business_analysis(dict(record), save_to_file=False, profile=profile)
+                    self.assertEqual(_without_timestamp(analysis.output), _without_timestamp(fresh))
+
+    def test_diff_covers_only_affected_metrics_and_rules(self):
+        """A cost correction touches cost-derived metrics and rules, never the previous-day CAC"""
+        analysis = IncrementalAnalysis(RECORD)
+        diff = analysis.update({"daily_cost": 6000})
+        self.assertEqual(diff["fields"], ["daily_cost"])
+        self.assertEqual(diff["metrics"], ["daily_profit", "current_cac", "cost_change_percent",
+                                           "cac_change_percent", "profit_status"])
+        self.assertEqual(diff["rules"], ["negative_profit", "cac_increase", "profitable_growth"])
+        self.assertEqual(diff["changes"]["profit_loss_status.status"], {"old": "positive", "new": "negative"})
+        self.assertIn("⚠️ Daily profit is negative", diff["changes"]["alerts"]["added"])
+        self.assertNotIn("customer_acquisition.previous_cac", diff["changes"])
+        self.assertEqual(diff["changes"]["input_data.daily_cost"], {"old": 3000, "new": 6000})
+
+    def test_unchanged_outcomes_stop_propagation(self):
+        """Same values give an empty diff; a small correction leaves alerts out of the diff"""
+        analysis = IncrementalAnalysis(RECORD)
+        self.assertEqual(analysis.update({"daily_cost": 3000})["changes"], {})
+        diff = analysis.update({"previous_day_revenue": 4400})
+        self.assertEqual(diff["metrics"], ["revenue_change_percent"])
+        self.assertEqual(diff["rules"], [])
+        self.assertNotIn("alerts", diff["changes"])
+
+    def test_templated_messages_are_rerendered(self):
+        """A rule that keeps firing is re-rendered when a metric in its message changes"""
+        analysis = IncrementalAnalysis(dict(RECORD, daily_cost=4000))
+        diff = analysis.update({"daily_cost": 4500})
+        self.assertEqual(diff["rules"], ["cac_increase"])
+        self.assertEqual(diff["changes"]["alerts"]["removed"], ["🚨 CAC increased by 44.0% (>20% threshold)"])
+        self.assertEqual(diff["changes"]["alerts"]["added"], ["🚨 CAC increased by 62.0% (>20% threshold)"])
+
+    def test_invalid_correction_leaves_analysis_untouched(self):
+        """A correction that fails validation raises and changes nothing"""
+        analysis = IncrementalAnalysis(RECORD)
+        before = _without_timestamp(analysis.output)
+        with self.assertRaises(ValueError):
+            analysis.update({"daily_cost": -5})
+        self.assertEqual(_without_timestamp(analysis.output), before)
+        self.assertEqual(analysis.input_data["daily_cost"], 3000)
+
+    def test_rule_dependencies_include_placeholders(self):
+        """Metrics used only in a message count as dependencies of the rule"""
+        rules = compile_rules([{"id": "loss", "when": "daily_profit < 0",
+                                "then": {"alert": "Loss with CAC {current_cac:.2f}"}}])
+        self.assertEqual(rules.dependencies(), {"loss": frozenset({"daily_profit", "current_cac"})})
+        analyzer = IncrementalAnalyzer(rules=rules)
+        analyzer.analyze(("store-1", "2024-06-30"), dict(RECORD, daily_cost=6000))
+        diff = analyzer.correct(("store-1", "2024-06-30"), {"number_of_customers": 60})
+        self.assertEqual(diff["changes"]["alerts"]["new"], ["Loss with CAC 100.00"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import orjson
+from ingest import stream_analysis, ingest_file, iter_chunks
+
+CSV_ROWS = """daily_revenue,daily_cost,number_of_customers,previous_day_revenue,previous_day_cost,previous_day_customers
+5000,3000,50,4500,2500,45
+2000,3000,40,2500,2000,50
+abc,3000,40,2500,2000,50
+1000,500,0,1000,500,1
+"""
+
+class TestStreamingIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, "daily.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_ROWS)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stream_csv_with_rejects(self):
+        """Valid rows are analyzed and invalid rows are reported, not fatal"""
+        rejects = []
+        results = list(stream_analysis(self.csv_path, chunk_size=2,
+                                       on_reject=lambda n, record, error: rejects.append((n, error))))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["profit_loss_status"]["daily_profit"], 2000)
+        self.assertEqual(results[1]["profit_loss_status"]["status"], "negative")
+        self.assertEqual(results[2]["customer_acquisition"]["current_cac"], 0)
+        self.assertEqual([n for n, _ in rejects], [3])
+
+    def test_reject_without_handler_raises(self):
+        """Without a reject handler the first invalid row raises ValueError"""
+        with self.assertRaises(ValueError):
+            list(stream_analysis(self.csv_path))
+
+    def test_ingest_jsonl_to_jsonl(self):
+        """JSONL input is streamed to a JSONL results file"""
+        source = os.path.join(self.tmpdir.name, "daily.jsonl")
+        destination = os.path.join(self.tmpdir.name, "results.jsonl")
+        record = {"daily_revenue": 5000, "daily_cost": 3000, "number_of_customers": 50,
+                  "previous_day_revenue": 4500, "previous_day_cost": 2500, "previous_day_customers": 45}
+        with open(source, "wb") as f:
+            for _ in range(5):
+                f.write(orjson.dumps(record) + b"\n")
+
+        stats = ingest_file(source, destination, chunk_size=2)
+        self.assertEqual(stats["records_written"], 5)
+        with open(destination, "rb") as f:
+            lines = [orjson.loads(line) for line in f]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[-1]["input_data"], record)
+
+    def test_results_carry_join_keys(self):
+        """Every result names its source record, entity and date, even without input_data"""
+        source = os.path.join(self.tmpdir.name, "keyed.csv")
+        with open(source, "w", encoding="utf-8") as f:
+            lines = CSV_ROWS.splitlines()
+            f.write("entity_id,date," + lines[0] + "\n")
+            for i, line in enumerate(lines[1:]):
+                f.write(f"store-{i},2024-06-0{i + 1},{line}\n")
+        destination = os.path.join(self.tmpdir.name, "results.jsonl")
+        ingest_file(source, destination, chunk_size=2, on_reject=lambda *args: None, include_input=False)
+        with open(destination, "rb") as f:
+            results = [orjson.loads(line) for line in f]
+        self.assertEqual([(r["record_number"], r["entity_id"], r["date"]) for r in results],
+                         [(1, "store-0", "2024-06-01"), (2, "store-1", "2024-06-02"), (4, "store-3", "2024-06-04")])
+        self.assertNotIn("input_data", results[0])
+
+    def test_chunks_are_bounded(self):
+        """Chunks never exceed chunk_size rows"""
+        record = {"daily_revenue": 1, "daily_cost": 1, "number_of_customers": 1,
+                  "previous_day_revenue": 1, "previous_day_cost": 1, "previous_day_customers": 1}
+        sizes = [len(chunk["daily_revenue"]) for chunk in iter_chunks((dict(record) for _ in range(25)), 10)]
+        self.assertEqual(sizes, [10, 10, 5])
+
+if __name__ == "__main__":
+    unittest.main()
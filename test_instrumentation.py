@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+import json
+from agent import run_business_analysis, DEFAULT_SCENARIOS
+from instrumentation import Instrumentation, LatencyHistogram, profile_batch
+
+NODES = ["input", "processing", "recommendation", "output"]
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_node_timings(self):
+        """Every node is counted once per analysis"""
+        instrumentation = Instrumentation()
+        for _ in range(5):
+            run_business_analysis(DEFAULT_SCENARIOS["loss_scenario"], save_to_file=False,
+                                  instrumentation=instrumentation)
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(sorted(snapshot), sorted(NODES))
+        for stats in snapshot.values():
+            self.assertEqual(stats["calls"], 5)
+            self.assertGreater(stats["total_ms"], 0)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        self.assertEqual(json.loads(instrumentation.to_json())["nodes"]["input"]["calls"], 5)
+
+    def test_histogram_percentiles(self):
+        """Percentiles are interpolated inside buckets and clamped to the observed range"""
+        histogram = LatencyHistogram(bounds=(1, 2, 4))
+        for duration in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(duration)
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.buckets, [1, 2, 1, 1])
+        self.assertGreaterEqual(histogram.percentile(50), 1)
+        self.assertLessEqual(histogram.percentile(50), 2)
+        self.assertEqual(histogram.percentile(100), 10)
+
+    def test_prometheus_export(self):
+        """Prometheus output has cumulative buckets, sum and count per node"""
+        instrumentation = Instrumentation(buckets_ms=(1, 10))
+        instrumentation.record("input", 0.5)
+        instrumentation.record("input", 5)
+        text = instrumentation.to_prometheus()
+        self.assertIn("# TYPE business_agent_node_duration_seconds histogram", text)
+        self.assertIn('business_agent_node_duration_seconds_bucket{node="input",le="0.001"} 1', text)
+        self.assertIn('business_agent_node_duration_seconds_bucket{node="input",le="0.01"} 2', text)
+        self.assertIn('business_agent_node_duration_seconds_count{node="input"} 2', text)
+
+    def test_profile_batch(self):
+        """A cProfile dump is written for a batch run"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "batch.prof")
+            report = profile_batch(list(DEFAULT_SCENARIOS.values()) * 3, path)
+            self.assertTrue(os.path.getsize(path) > 0)
+            self.assertIn("run_business_analysis", report)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from agent import run_multiple_scenarios, DEFAULT_SCENARIOS
+
+def _sweep(count):
+    """Scenarios with distinct revenue so results can be matched to their inputs"""
+    base = DEFAULT_SCENARIOS["profitable_growth"]
+    return {f"scenario_{i:03d}": {**base, "daily_revenue": 5000 + i} for i in range(count)}
+
+class TestParallelScenarios(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def _run(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_multiple_scenarios(**kwargs)
+
+    def test_default_scenarios_serial(self):
+        """The built-in scenarios still produce per-scenario and combined files"""
+        combined = self._run()
+        self.assertEqual(combined["analysis_summary"]["scenarios_analyzed"], list(DEFAULT_SCENARIOS))
+        self.assertTrue(os.path.exists("langgraph_loss_scenario.json"))
+        with open("langgraph_combined.json", encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f)["results"]), list(DEFAULT_SCENARIOS))
+
+    def test_thread_pool_preserves_order(self):
+        """Thread pool results keep scenario order and report timings"""
+        scenarios = _sweep(40)
+        combined = self._run(scenarios=scenarios, workers=4, backend="thread")
+        self.assertEqual(list(combined["results"]), list(scenarios))
+        for name, result in combined["results"].items():
+            self.assertEqual(result["input_data"]["daily_revenue"], scenarios[name]["daily_revenue"])
+        self.assertEqual(set(combined["analysis_summary"]["scenario_timings_ms"]), set(scenarios))
+
+    def test_process_pool_matches_serial(self):
+        """Process pool results equal the serial run apart from timestamps"""
+        scenarios = _sweep(12)
+        serial = self._run(scenarios=scenarios)
+        parallel = self._run(scenarios=scenarios, workers=2, backend="process")
+        self.assertEqual(list(parallel["results"]), list(scenarios))
+        for name in scenarios:
+            self.assertEqual(parallel["results"][name]["alerts"], serial["results"][name]["alerts"])
+            self.assertEqual(parallel["results"][name]["profit_loss_status"], serial["results"][name]["profit_loss_status"])
+
+    def test_unknown_backend(self):
+        """An unknown backend is rejected"""
+        with self.assertRaises(ValueError):
+            self._run(scenarios=_sweep(2), workers=2, backend="gpu")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from agent import save_to_json, run_multiple_scenarios, DEFAULT_SCENARIOS
+from persistence import ResultsLog, read_results, write_json_atomic
+
+RECORDS = [{"scenario": f"s{i}", "value": i, "text": "💰 Costs increased significantly"} for i in range(25)]
+
+class TestPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_atomic_write_keeps_old_file_on_failure(self):
+        """A failed write leaves the previous file intact and no temp files behind"""
+        path = os.path.join(self.dir, "result.json")
+        write_json_atomic({"version": 1}, path)
+        with mock.patch("persistence.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_json_atomic({"version": 2}, path)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"version": 1})
+        self.assertEqual(os.listdir(self.dir), ["result.json"])
+
+    def test_save_to_json_raises(self):
+        """save_to_json reports errors to the caller instead of printing them"""
+        with self.assertRaises(OSError):
+            save_to_json({"a": 1}, os.path.join(self.dir, "missing", "out.json"))
+
+    def test_pretty_output_is_unicode(self):
+        """Pretty JSON keeps emoji unescaped, like json.dump(ensure_ascii=False)"""
+        path = os.path.join(self.dir, "pretty.json")
+        save_to_json(RECORDS[0], path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn("💰", text)
+        self.assertIn('\n  "scenario"', text)
+
+    def test_results_log_round_trip(self):
+        """JSONL and msgpack logs stream back exactly what was appended"""
+        for name in ("results.jsonl", "results.msgpack"):
+            path = os.path.join(self.dir, name)
+            with ResultsLog(path, buffer_records=7) as log:
+                log.write_many(RECORDS[:10])
+            with ResultsLog(path) as log:
+                log.write_many(RECORDS[10:])
+            self.assertEqual(list(read_results(path)), RECORDS)
+
+    def test_scenarios_without_per_scenario_files(self):
+        """Bulk sweeps can write one results log instead of one file per scenario"""
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_multiple_scenarios(per_scenario_files=False, results_log="sweep.jsonl")
+            self.assertEqual(sorted(os.listdir(".")), ["langgraph_combined.json", "sweep.jsonl"])
+            self.assertEqual([row["scenario"] for row in read_results("sweep.jsonl")], list(DEFAULT_SCENARIOS))
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    unittest.main()
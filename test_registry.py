@@ -0,0 +1,87 @@
+import threading
+import unittest
+import registry
+import agent
+import simple_agent
+from agent import DEFAULT_SCENARIOS
+
+class TestCompiledAgentRegistry(unittest.TestCase):
+
+    def setUp(self):
+        registry.invalidate()
+        self.builds = 0
+
+    def tearDown(self):
+        registry.invalidate()
+
+    def _builder(self, **config):
+        self.builds += 1
+        return object()
+
+    def test_agent_compiled_once(self):
+        """Repeated lookups return the same compiled agent"""
+        first = registry.get_compiled_agent("test", self._builder)
+        second = registry.get_compiled_agent("test", self._builder)
+        self.assertIs(first, second)
+        self.assertEqual(self.builds, 1)
+
+    def test_config_is_part_of_key(self):
+        """Different configs of the same variant compile separately"""
+        a = registry.get_compiled_agent("test", self._builder, threshold=20)
+        b = registry.get_compiled_agent("test", self._builder, threshold=30)
+        self.assertIsNot(a, b)
+        self.assertIs(a, registry.get_compiled_agent("test", self._builder, threshold=20))
+
+    def test_invalidate_variant(self):
+        """Invalidation only drops the requested variant"""
+        registry.get_compiled_agent("one", self._builder)
+        registry.get_compiled_agent("two", self._builder)
+        self.assertEqual(registry.invalidate("one"), 1)
+        self.assertEqual(registry.compiled_count(), 1)
+        registry.get_compiled_agent("one", self._builder)
+        self.assertEqual(self.builds, 3)
+
+    def test_thread_safe_compilation(self):
+        """Concurrent first use compiles the agent only once"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get_compiled_agent("test", self._builder)))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+    def test_registry_is_bounded(self):
+        """Configs with per-call objects are evicted least recently used first"""
+        previous = registry.set_capacity(3)
+        try:
+            first = registry.get_compiled_agent("test", self._builder, history=object())
+            for _ in range(5):
+                registry.get_compiled_agent("test", self._builder, history=object())
+            self.assertEqual(registry.compiled_count(), 3)
+            kept = registry.get_compiled_agent("test", self._builder, threshold=20)
+            for _ in range(2):
+                registry.get_compiled_agent("test", self._builder, history=object())
+                self.assertIs(registry.get_compiled_agent("test", self._builder, threshold=20), kept)
+            self.assertNotIn(first, [agent for agent in registry._agents.values()])
+        finally:
+            registry.set_capacity(previous)
+
+    def test_run_business_analysis_reuses_agent(self):
+        """Both agent modules reuse their compiled graph across calls"""
+        self.assertIs(agent.get_business_agent(), agent.get_business_agent())
+        self.assertIs(simple_agent.get_business_agent(), simple_agent.get_business_agent())
+        self.assertIsNot(agent.get_business_agent(), simple_agent.get_business_agent())
+
+    def test_default_options_share_one_agent(self):
+        """Options left at their defaults (profile="full", rules=None) hit the same registry entry"""
+        self.assertIs(agent.get_business_agent(profile="full", rules=None), agent.get_business_agent())
+        self.assertIs(agent.get_business_agent(profile="minimal"), simple_agent.get_business_agent())
+        state = agent.initial_state(dict(DEFAULT_SCENARIOS["profitable_growth"]))
+        output = agent.get_business_agent().invoke(state)["output"]
+        self.assertEqual(output["input_data"], DEFAULT_SCENARIOS["profitable_growth"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from core import DEFAULT_RULE_SPECS
+from persistence import read_results
+from rules import compile_rules
+from resumable import run_resumable_batch, BatchCheckpoint
+
+def _records(count):
+    return [{"daily_revenue": 1000 + i, "daily_cost": 500, "number_of_customers": 10,
+             "previous_day_revenue": 1000, "previous_day_cost": 500, "previous_day_customers": 10}
+            for i in range(count)]
+
+class CrashAfter:
+    """Iterable that raises after yielding `limit` records, simulating a crash"""
+
+    def __init__(self, records, limit):
+        self.records = records
+        self.limit = limit
+
+    def __iter__(self):
+        for i, record in enumerate(self.records):
+            if i == self.limit:
+                raise RuntimeError("simulated crash")
+            yield dict(record)
+
+class TestResumableBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmpdir.name, "results.jsonl")
+        self.checkpoint = os.path.join(self.tmpdir.name, "progress.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_resume_after_crash(self):
+        """A restarted job skips committed chunks and writes every record exactly once"""
+        records = _records(95)
+        with self.assertRaises(RuntimeError):
+            run_resumable_batch(CrashAfter(records, 47), self.output, self.checkpoint, "job", chunk_size=10)
+
+        stats = run_resumable_batch((dict(r) for r in records), self.output, self.checkpoint, "job", chunk_size=10)
+        self.assertEqual(stats["records_skipped"], 40)
+        self.assertEqual(stats["records_done"], 95)
+
+        revenues = [row["input_data"]["daily_revenue"] for row in read_results(self.output)]
+        self.assertEqual(revenues, [r["daily_revenue"] for r in records])
+
+    def test_completed_job_is_not_rerun(self):
+        """Running a completed job again does nothing"""
+        run_resumable_batch(_records(20), self.output, self.checkpoint, "job", chunk_size=8)
+        size = os.path.getsize(self.output)
+        stats = run_resumable_batch(_records(20), self.output, self.checkpoint, "job", chunk_size=8)
+        self.assertEqual(stats["records_skipped"], 20)
+        self.assertEqual(os.path.getsize(self.output), size)
+
+    def test_rejects_are_counted(self):
+        """Invalid rows are reported and counted across chunks"""
+        records = _records(10)
+        del records[3]["daily_cost"]
+        rejected = []
+        stats = run_resumable_batch(records, self.output, self.checkpoint, "job", chunk_size=4,
+                                    on_reject=lambda n, record, error: rejected.append(n))
+        self.assertEqual(rejected, [4])
+        self.assertEqual((stats["records_written"], stats["records_rejected"]), (9, 1))
+
+    def test_resume_with_other_rules_is_refused(self):
+        """A job started with one rule set cannot be continued with another"""
+        with self.assertRaises(RuntimeError):
+            run_resumable_batch(CrashAfter(_records(30), 15), self.output, self.checkpoint, "job", chunk_size=10)
+        with self.assertRaisesRegex(ValueError, "different rules"):
+            run_resumable_batch(_records(30), self.output, self.checkpoint, "job", chunk_size=10,
+                                rules=compile_rules(DEFAULT_RULE_SPECS[:1]))
+        stats = run_resumable_batch(_records(30), self.output, self.checkpoint, "job", chunk_size=10,
+                                    rules=compile_rules(DEFAULT_RULE_SPECS))
+        self.assertEqual(stats["records_skipped"], 10)
+
+    def test_missing_output_restarts_the_job(self):
+        """Deleting the output of a committed job makes the next run start from the first record"""
+        run_resumable_batch(_records(20), self.output, self.checkpoint, "job", chunk_size=8)
+        os.remove(self.output)
+        stats = run_resumable_batch(_records(20), self.output, self.checkpoint, "job", chunk_size=8)
+        self.assertTrue(stats["restarted"])
+        self.assertEqual((stats["records_skipped"], stats["records_written"]), (0, 20))
+        self.assertEqual(len(list(read_results(self.output))), 20)
+
+    def test_checkpoint_progress(self):
+        """Progress is committed once per chunk"""
+        run_resumable_batch(_records(25), self.output, self.checkpoint, "job", chunk_size=10)
+        checkpoint = BatchCheckpoint(self.checkpoint)
+        progress = checkpoint.load("job")
+        checkpoint.close()
+        self.assertEqual(progress["chunks_done"], 3)
+        self.assertEqual(progress["status"], "complete")
+        self.assertEqual(progress["output_offset"], os.path.getsize(self.output))
+
+if __name__ == "__main__":
+    unittest.main()
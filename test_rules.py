@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from agent import DEFAULT_RULES, run_business_analysis, DEFAULT_SCENARIOS
+from batch import run_business_analysis_batch
+from core import calculate_metrics
+from rules import MESSAGE_METRICS, compile_rules, load_rules
+
+TENANT_RULES_YAML = """
+rules:
+  - id: thin_margin
+    when:
+      all:
+        - daily_profit > 0
+        - "daily_profit < 1000"
+    then:
+      alert: "Margin is thin ({daily_profit:.0f})"
+  - id: big_loss
+    when: daily_profit < -1000
+    then:
+      alert: "Big loss"
+      recommendation: "Cut costs now"
+    else:
+      recommendation: "No big loss"
+  - id: any_spike
+    when:
+      any:
+        - cost_change_percent > 25
+        - not: revenue_change_percent > -20
+    then:
+      recommendation: "Check spikes"
+"""
+
+class TestRuleEngine(unittest.TestCase):
+
+    def test_shared_subexpressions(self):
+        """Identical leaves and composites compile to a single plan node"""
+        ruleset = compile_rules([
+            {"id": "a", "when": {"all": ["daily_profit > 0", "revenue_change_percent > 0"]}, "then": {"alert": "a"}},
+            {"id": "b", "when": {"all": ["daily_profit > 0", "revenue_change_percent > 0"]}, "then": {"alert": "b"}},
+            {"id": "c", "when": "daily_profit > 0", "then": {"alert": "c"}},
+        ])
+        self.assertEqual(len(ruleset.nodes), 3)
+        self.assertEqual(ruleset.rules[0].condition, ruleset.rules[1].condition)
+
+    def test_short_circuit(self):
+        """'all' stops at the first false leaf, so later metrics are not even read"""
+        ruleset = compile_rules([{"id": "a", "when": {"all": ["daily_profit > 0", "cac_change_percent > 0"]},
+                                  "then": {"alert": "a"}}])
+        self.assertEqual(ruleset.evaluate({"daily_profit": -5}), ([], []))
+
+    def test_default_rules_match_builtin_scenarios(self):
+        """The default rule set reproduces the original threshold messages"""
+        result = run_business_analysis(DEFAULT_SCENARIOS["high_cac_alert"], save_to_file=False)
+        self.assertTrue(result["alerts"][0].startswith("🚨 CAC increased by 300.0%"))
+        self.assertIn("(>20% threshold)", result["alerts"][0])
+
+    def test_load_yaml_and_evaluate(self):
+        """Tenant rules load from YAML and apply per record and per batch"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tenant.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(TENANT_RULES_YAML)
+            ruleset = load_rules(path)
+
+        data = DEFAULT_SCENARIOS["loss_scenario"]
+        single = run_business_analysis(data, save_to_file=False, rules=ruleset)
+        self.assertEqual(single["alerts"], ["Big loss"])
+        self.assertEqual(single["recommendations"], ["Cut costs now", "Check spikes"])
+
+        batch = run_business_analysis_batch({field: [value] for field, value in data.items()}, rules=ruleset)
+        self.assertEqual(batch[0]["alerts"], single["alerts"])
+        self.assertEqual(batch[0]["recommendations"], single["recommendations"])
+
+    def test_batch_masks_match_per_record(self):
+        """Vectorized evaluation agrees with per-record evaluation"""
+        rng = np.random.default_rng(7)
+        metrics = {
+            "daily_profit": rng.normal(0, 2000, 500),
+            "cac_change_percent": rng.normal(0, 30, 500),
+            "revenue_change_percent": rng.normal(0, 15, 500),
+            "cost_change_percent": rng.normal(0, 15, 500),
+        }
+        masks = DEFAULT_RULES.evaluate_batch(metrics)
+        for i in range(500):
+            row = {name: values[i] for name, values in metrics.items()}
+            fired = DEFAULT_RULES.fired(row)
+            self.assertEqual(fired, [bool(masks[rule.rule_id][i]) for rule in DEFAULT_RULES.rules])
+
+    def test_invalid_rules(self):
+        """Malformed rules fail at compile time with the rule id"""
+        with self.assertRaisesRegex(ValueError, "bad"):
+            compile_rules([{"id": "bad", "when": {"metric": "daily_profit", "op": "~", "value": 1}, "then": {}}])
+        with self.assertRaises(ValueError):
+            compile_rules([{"id": "dup", "when": "daily_profit > 0", "then": {}},
+                           {"id": "dup", "when": "daily_profit > 0", "then": {}}])
+
+    def test_unknown_metrics_fail_at_compile_time(self):
+        """Unknown metrics in conditions or message placeholders name the offending rule"""
+        self.assertEqual(MESSAGE_METRICS, set(calculate_metrics(DEFAULT_SCENARIOS["loss_scenario"])))
+        with self.assertRaisesRegex(ValueError, "typo.*daily_proft"):
+            compile_rules([{"id": "typo", "when": "daily_proft < 0", "then": {"alert": "loss"}}])
+        with self.assertRaisesRegex(ValueError, "placeholder.*cac_change"):
+            compile_rules([{"id": "msg", "when": "daily_profit < 0", "then": {"alert": "CAC {cac_change:.1f}%"}}])
+        with self.assertRaisesRegex(ValueError, "status.*profit_status"):
+            compile_rules([{"id": "status", "when": {"metric": "profit_status", "op": "==", "value": 0},
+                            "then": {}}])
+
+    def test_profit_status_placeholder_in_every_mode(self):
+        """{profit_status} renders the same in the graph, batch and compact paths"""
+        from compact import analyze_batch_compact
+        rules = compile_rules([{"id": "status", "when": "daily_profit < 0", "then": {"alert": "Profit is {profit_status}"}}])
+        record = DEFAULT_SCENARIOS["loss_scenario"]
+        expected = run_business_analysis(dict(record), save_to_file=False, rules=rules)["alerts"]
+        self.assertEqual(expected, ["Profit is negative"])
+        batch = {field: [value] for field, value in record.items()}
+        self.assertEqual(run_business_analysis_batch(batch, rules=rules)[0]["alerts"], expected)
+        self.assertEqual(run_business_analysis(dict(record), save_to_file=False, rules=rules, compact=True)["alerts"],
+                         expected)
+        self.assertEqual(analyze_batch_compact(batch, rules).output(0)["alerts"], expected)
+
+if __name__ == "__main__":
+    unittest.main()
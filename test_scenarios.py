@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from agent import COST_INCREASE_THRESHOLD, DEFAULT_RULES, DEFAULT_SCENARIOS, run_business_analysis
+from batch import compute_metrics_batch
+from scenarios import ScenarioSet, sweep
+
+BASE = DEFAULT_SCENARIOS["profitable_growth"]
+
+def _strip(output):
+    output = dict(output)
+    output.pop("analysis_timestamp")
+    return output
+
+class TestScenarioGrid(unittest.TestCase):
+
+    def test_grid_shape_and_values(self):
+        """A ±30% cost axis in 1% steps crossed with customer counts covers every combination"""
+        scenarios = ScenarioSet.relative_grid(BASE, {"daily_cost": (-0.3, 0.3, 0.01),
+                                                     "number_of_customers": (-0.5, 0.5, 0.1)})
+        self.assertEqual(scenarios.shape, (61, 11))
+        self.assertEqual(len(scenarios), 61 * 11)
+        cost = scenarios.column("daily_cost")
+        self.assertAlmostEqual(cost.min(), 3500)
+        self.assertAlmostEqual(cost.max(), 6500)
+        self.assertEqual(sorted(set(scenarios.column("number_of_customers").tolist()))[:2], [40.0, 48.0])
+        # Fields that are not varied stay single values
+        self.assertEqual(scenarios.fields["previous_day_cost"].size, 1)
+
+    def test_matches_flat_batch_and_graph(self):
+        """Shared-term evaluation gives the same metrics, rules and outputs as analyzing every scenario"""
+        result = sweep(BASE, {"daily_cost": (-0.3, 0.3, 0.05), "daily_revenue": (-0.2, 0.2, 0.1),
+                              "previous_day_customers": (-0.5, 0.5, 0.25)})
+        columns = result.scenarios.columns()
+        metrics = compute_metrics_batch(columns)
+        for name, values in metrics.items():
+            np.testing.assert_array_equal(result.metric(name), values)
+        for rule_id, mask in DEFAULT_RULES.evaluate_batch(metrics).items():
+            np.testing.assert_array_equal(result.fired(rule_id), mask)
+        record = {field: column[37].item() for field, column in columns.items()}
+        self.assertEqual(_strip(result.outputs(37, 38)[0]), _strip(run_business_analysis(record, save_to_file=False)))
+
+    def test_regions_summarize_where_alerts_fire(self):
+        """Regions partition the scenarios by alert set, with the ranges of the varied fields"""
+        result = sweep(BASE, {"daily_cost": (-0.3, 0.3, 0.01)})
+        regions = result.regions()
+        self.assertEqual(sum(region["scenarios"] for region in regions), len(result))
+        by_alerts = {tuple(region["alerts"]): region for region in regions}
+        limit = BASE["previous_day_cost"] * (1 + COST_INCREASE_THRESHOLD / 100)
+        low, high = by_alerts[("cost_increase",)]["ranges"]["daily_cost"]
+        self.assertGreater(low, limit)
+        self.assertLessEqual(high, 6500)
+        self.assertLessEqual(by_alerts[()]["ranges"]["daily_cost"][1], limit)
+        self.assertIn("cost_increase", result.format_regions())
+
+    def test_random_samples(self):
+        """Random scenarios are reproducible with a seed and stay within the relative ranges"""
+        first = ScenarioSet.random(BASE, {"daily_cost": (-0.3, 0.3)}, 500, seed=7)
+        second = ScenarioSet.random(BASE, {"daily_cost": (-0.3, 0.3)}, 500, seed=7)
+        np.testing.assert_array_equal(first.column("daily_cost"), second.column("daily_cost"))
+        self.assertTrue(((first.column("daily_cost") >= 3500) & (first.column("daily_cost") <= 6500)).all())
+        self.assertEqual(sum(region["scenarios"] for region in first.evaluate().regions()), 500)
+        with self.assertRaises(ValueError):
+            ScenarioSet.random(BASE, {"daily_profit": (-0.1, 0.1)}, 10)
+
+if __name__ == "__main__":
+    unittest.main()
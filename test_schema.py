@@ -0,0 +1,116 @@
+import unittest
+from decimal import Decimal
+import numpy as np
+from agent import run_business_analysis
+from batch import run_business_analysis_batch
+from compact import analyze_batch_compact
+from hierarchy import Hierarchy, RollupAccumulator
+from ingest import iter_chunks
+from schema import DEFAULT_SCHEMA, FieldRule, Schema
+
+GOOD = {"daily_revenue": 5000, "daily_cost": 3000, "number_of_customers": 50,
+        "previous_day_revenue": 4500, "previous_day_cost": 2500, "previous_day_customers": 45}
+
+class TestInputSchema(unittest.TestCase):
+
+    def test_rejected_rows_report(self):
+        """Every bad row is reported with its first error; valid rows come back as clean columns"""
+        records = [
+            dict(GOOD),
+            dict(GOOD, daily_revenue="abc"),
+            {field: value for field, value in GOOD.items() if field != "daily_cost"},
+            dict(GOOD, previous_day_cost=float("nan")),
+            dict(GOOD, daily_cost=-5),
+            dict(GOOD, number_of_customers=12.5),
+            dict(GOOD, daily_revenue=6000.5),
+        ]
+        result = DEFAULT_SCHEMA.validate_records(records)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.valid.tolist(), [True, False, False, False, False, False, True])
+        self.assertEqual([row for row, _ in result.rejected], [1, 2, 3, 4, 5])
+        errors = [error for _, error in result.rejected]
+        self.assertIn("Invalid number for field daily_revenue", errors[0])
+        self.assertEqual(errors[1], "Missing required field: daily_cost")
+        self.assertIn("Non-finite value for field previous_day_cost", errors[2])
+        self.assertIn("below 0 for field daily_cost", errors[3])
+        self.assertIn("Non-integer value for field number_of_customers", errors[4])
+        self.assertEqual(result.columns["daily_revenue"].tolist(), [5000, 6000.5])
+
+    def test_columns_and_text(self):
+        """NumPy columns and CSV text validate the same way; whole-number text stays integer"""
+        text = {field: [str(value), str(value + 1)] for field, value in GOOD.items()}
+        result = DEFAULT_SCHEMA.validate(text)
+        self.assertEqual(len(result.rejected), 0)
+        self.assertEqual(result.columns["number_of_customers"].dtype, np.int64)
+        arrays = {field: np.array([value, value], dtype=np.float64) for field, value in GOOD.items()}
+        arrays["daily_cost"][1] = np.inf
+        self.assertEqual([row for row, _ in DEFAULT_SCHEMA.validate(arrays).rejected], [1])
+        with self.assertRaises(ValueError):
+            DEFAULT_SCHEMA.validate({"daily_revenue": [1]})
+
+    def test_custom_rules(self):
+        """Rules can allow negatives (e.g. refunds) per field"""
+        schema = Schema([FieldRule("daily_revenue", minimum=None), FieldRule("daily_cost")])
+        result = schema.validate({"daily_revenue": [-10, 5], "daily_cost": [1, -1]})
+        self.assertEqual([row for row, _ in result.rejected], [1])
+
+    def test_input_node_and_ingest_use_the_schema(self):
+        """The graph rejects NaN and negatives up front, and ingest keeps going past bad rows"""
+        with self.assertRaises(ValueError):
+            run_business_analysis(dict(GOOD, daily_cost=float("nan")), save_to_file=False)
+        with self.assertRaises(ValueError):
+            run_business_analysis(dict(GOOD, number_of_customers=-1), save_to_file=False)
+
+        records = [dict(GOOD) for _ in range(10)]
+        records[4]["daily_revenue"] = None
+        rejects = []
+        chunks = list(iter_chunks(records, 3, on_reject=lambda n, record, error: rejects.append(n)))
+        self.assertEqual(sum(len(chunk["daily_revenue"]) for chunk in chunks), 9)
+        self.assertEqual(rejects, [5])
+
+    def test_input_is_not_mutated(self):
+        """Numeric strings are parsed for the analysis without touching the caller's dict"""
+        record = dict(GOOD, daily_revenue="5000", number_of_customers="50")
+        for compact in (False, True):
+            result = run_business_analysis(record, save_to_file=False, compact=compact)
+            self.assertEqual(result["profit_loss_status"]["daily_profit"], 2000)
+            self.assertEqual(record["daily_revenue"], "5000")
+            self.assertEqual(record["number_of_customers"], "50")
+
+    def test_numpy_scalars_and_decimals(self):
+        """Records built from NumPy/pandas rows or Decimal values are accepted; bools are not"""
+        record = dict(GOOD, daily_revenue=Decimal("5000.5"), daily_cost=np.float32(3000),
+                      number_of_customers=np.int64(50), previous_day_customers=np.int32(45))
+        result = run_business_analysis(record, save_to_file=False)
+        self.assertEqual(result["profit_loss_status"]["daily_profit"], 2000.5)
+        self.assertEqual(result["customer_acquisition"]["current_cac"], 60.0)
+        self.assertIsNone(DEFAULT_SCHEMA.check(dict(record)))
+        self.assertIn("Invalid number", DEFAULT_SCHEMA.check(dict(GOOD, number_of_customers=np.bool_(True))))
+        self.assertIn("Non-finite", DEFAULT_SCHEMA.check(dict(GOOD, daily_cost=Decimal("NaN"))))
+
+    def test_batch_path_uses_the_schema(self):
+        """run_business_analysis_batch rejects NaN and negatives like the graph does"""
+        batch = {field: [value, value] for field, value in GOOD.items()}
+        batch["daily_cost"] = [3000, float("nan")]
+        with self.assertRaisesRegex(ValueError, "Row 1: Non-finite value for field daily_cost"):
+            run_business_analysis_batch(batch)
+        batch["daily_cost"] = [3000, 3000]
+        batch["previous_day_customers"] = [-1, 45]
+        with self.assertRaisesRegex(ValueError, "Row 0: Value below 0"):
+            run_business_analysis_batch(batch)
+
+    def test_compact_and_rollup_batches_use_the_schema(self):
+        """Compact batches and rollup chunks reject NaN and negatives before touching any state"""
+        batch = {field: [value, value] for field, value in GOOD.items()}
+        batch["number_of_customers"] = [50, float("nan")]
+        with self.assertRaisesRegex(ValueError, "Row 1: Non-finite value for field number_of_customers"):
+            analyze_batch_compact(batch)
+        hierarchy = Hierarchy({"a": None, "b": "a"})
+        accumulator = RollupAccumulator(hierarchy)
+        batch["number_of_customers"] = [50, -5]
+        with self.assertRaisesRegex(ValueError, "Row 1: Value below 0"):
+            accumulator.add(["b", "b"], batch)
+        self.assertFalse(accumulator.totals.any())
+
+if __name__ == "__main__":
+    unittest.main()
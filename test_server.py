@@ -0,0 +1,152 @@
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+import orjson
+from batch import run_business_analysis_batch
+from persistence import ResultsLog
+from server import DashboardServer, ResultStore, analyze_records, paginate, preload
+
+def _record(entity_id, revenue=1000, cost=500):
+    return {"entity_id": entity_id, "daily_revenue": revenue, "daily_cost": cost, "number_of_customers": 10,
+            "previous_day_revenue": 1000, "previous_day_cost": 500, "previous_day_customers": 10}
+
+def _results(*records):
+    columns = {field: [record[field] for record in records] for field in records[0] if field != "entity_id"}
+    return run_business_analysis_batch(columns)
+
+class TestResultStore(unittest.TestCase):
+
+    def test_filters_and_latest_per_entity(self):
+        """Queries filter by entity, status and alerts; entities keep only the newest row"""
+        store = ResultStore()
+        profit, loss, later = _results(_record("a"), _record("b", cost=2000), _record("a", revenue=1200))
+        store.add_many([(profit, "a"), (loss, "b"), (later, "a")])
+
+        self.assertEqual([seq for seq, _, _ in store.results(entity="a")], [1, 3])
+        self.assertEqual([seq for seq, _, _ in store.results(status="negative")], [2])
+        self.assertTrue(all(row["entity_id"] == "b" for row in store.alerts()))
+        self.assertEqual(len(store.alerts(contains="PROFIT IS NEGATIVE")), 1)
+        entities = store.entities()
+        self.assertEqual([(row["entity_id"], row["seq"]) for row in entities], [("a", 3), ("b", 2)])
+
+    def test_bounded_history_and_since(self):
+        """Old results are evicted, and since= only returns newer ones"""
+        store = ResultStore(max_results=3)
+        (result,) = _results(_record("a"))
+        for _ in range(5):
+            store.add(result, "a")
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.first_seq, 3)
+        self.assertEqual([seq for seq, _, _ in store.results(since=4)], [5])
+        self.assertEqual(store.wait_for(5, timeout=0.01), [])
+
+    def test_anonymous_results_are_not_tracked_per_entity(self):
+        """Results without an entity id leave with the history instead of piling up in the latest map"""
+        store = ResultStore(max_results=3)
+        (result,) = _results(_record("a"))
+        for _ in range(10):
+            store.add(result)
+        store.add(result, "a")
+        self.assertEqual(store.stats()["entities"], 1)
+        self.assertEqual([row["entity_id"] for row in store.entities()], ["a"])
+
+    def test_latest_map_is_bounded_and_looked_up_by_id(self):
+        """Only the most recently updated entities are kept, and requested ids are looked up directly"""
+        store = ResultStore(max_entities=2)
+        (result,) = _results(_record("a"))
+        store.add_many([(result, "a"), (result, "b"), (result, "a"), (result, "c")])
+        self.assertEqual([row["entity_id"] for row in store.entities()], ["a", "c"])
+        self.assertEqual([(row["entity_id"], row["seq"]) for row in store.entities(ids=["c", "b", "a", "c"])],
+                         [("a", 3), ("c", 4)])
+        self.assertEqual(store.entities(status="negative", ids=["a"]), [])
+
+    def test_preload_reads_entity_id_from_batch_output(self):
+        """Outputs of analyze_records carry entity_id, which preload uses as the entity"""
+        results = analyze_records([_record("a"), _record("b", cost=2000)])
+        self.assertEqual([result["entity_id"] for result in results], ["a", "b"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "results.jsonl")
+            with ResultsLog(path) as log:
+                for result in results:
+                    log.write(result)
+            store = ResultStore()
+            self.assertEqual(preload(store, path), 2)
+        self.assertEqual([row["entity_id"] for row in store.entities()], ["a", "b"])
+
+    def test_paginate_newest_first(self):
+        page = paginate(list(range(10)), offset=2, limit=3, newest_first=True)
+        self.assertEqual(page, {"total": 10, "offset": 2, "limit": 3, "items": [7, 6, 5]})
+
+class TestDashboardServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = DashboardServer(("127.0.0.1", 0), keepalive=0.05, quiet=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _request(self, method, path, body=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        connection.request(method, path, body=orjson.dumps(body) if body is not None else None)
+        response = connection.getresponse()
+        data = orjson.loads(response.read())
+        connection.close()
+        return response.status, data
+
+    def test_analyze_then_query(self):
+        """Posted records are analyzed, stored and served through the paginated endpoints"""
+        status, data = self._request("POST", "/api/analyze", [_record("a"), _record("b", cost=2000)])
+        self.assertEqual(status, 200)
+        self.assertEqual(data["seqs"], [1, 2])
+
+        status, page = self._request("GET", "/api/metrics?status=negative")
+        self.assertEqual(page["total"], 1)
+        self.assertEqual(page["items"][0]["entity_id"], "b")
+
+        status, page = self._request("GET", "/api/alerts?entity=b&limit=1")
+        self.assertEqual(page["limit"], 1)
+        self.assertEqual(len(page["items"]), 1)
+
+        status, page = self._request("GET", "/api/entities?entity=b,missing")
+        self.assertEqual([row["entity_id"] for row in page["items"]], ["b"])
+
+        status, data = self._request("POST", "/api/analyze", {"daily_revenue": 1})
+        self.assertEqual(status, 400)
+        self.assertIn("Missing required field", data["error"])
+
+    def test_event_stream_pushes_only_new_results(self):
+        """The event stream resumes after `since` and sends one frame per new result"""
+        (first, second) = _results(_record("a"), _record("b"))
+        self.server.publish(first, "a")
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        connection.request("GET", "/api/events?since=1")
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.assertEqual(response.readline(), b"retry: 2000\n")
+
+        self.server.publish(second, "b")
+        frame = []
+        while True:
+            line = response.readline()
+            if line.startswith(b":") or line == b"\n":
+                if frame:
+                    break
+                continue
+            frame.append(line)
+        connection.close()
+
+        self.assertEqual(frame[0], b"id: 2\n")
+        self.assertEqual(frame[1], b"event: result\n")
+        payload = orjson.loads(frame[2][len(b"data: "):])
+        self.assertEqual(payload["entity_id"], "b")
+        self.assertEqual(payload["result"]["profit_loss_status"], second["profit_loss_status"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import collections
+import os
+import tempfile
+import unittest
+import orjson
+from agent import run_business_analysis
+from cli import SAMPLE_RECORD, main
+from persistence import read_results
+from worker import JobQueue, WorkerService, run_worker, shard_of, result_path
+
+def _records(count, entities=5):
+    return [dict(SAMPLE_RECORD, entity_id=f"store-{i % entities}", daily_revenue=1000 + 100 * i)
+            for i in range(count)]
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmpdir.name, "jobs.sqlite"))
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmpdir.cleanup()
+
+    def test_claims_follow_entity_shards(self):
+        """Each shard claims only its own entities' jobs, oldest first, and never the same job twice"""
+        self.queue.enqueue_many(_records(40, entities=8))
+        claimed = {shard: self.queue.claim(shard, 3, 100) for shard in range(3)}
+        ids = [job.id for jobs in claimed.values() for job in jobs]
+        self.assertEqual(sorted(ids), list(range(1, 41)))
+        for shard, jobs in claimed.items():
+            self.assertEqual([job.id for job in jobs], sorted(job.id for job in jobs))
+            self.assertTrue(all(shard_of(job.entity_id, 3) == shard for job in jobs))
+        self.assertEqual(self.queue.claim(0, 3, 100), [])
+
+    def test_depth_and_stats(self):
+        """Completing a batch moves jobs to done/failed and feeds throughput and latency"""
+        self.queue.enqueue_many(_records(10))
+        jobs = self.queue.claim(0, 1, 6)
+        self.assertEqual(self.queue.depth(shards=1)["queued_by_shard"], [4])
+        self.queue.complete([job.id for job in jobs[1:]], [(jobs[0].id, "bad record")])
+        stats = self.queue.stats()
+        self.assertEqual((stats["queued"], stats["running"], stats["done"], stats["failed"]), (4, 0, 5, 1))
+        self.assertEqual(stats["recent_done"], 5)
+        self.assertGreater(stats["jobs_per_second"], 0)
+        self.assertLessEqual(stats["latency_ms"]["p50"], stats["latency_ms"]["max"])
+
+    def test_requeue_running_jobs(self):
+        """Jobs left running by a dead worker go back to the queue, failed ones only on request"""
+        self.queue.enqueue_many(_records(4))
+        jobs = self.queue.claim(0, 1, 4)
+        self.queue.complete([], [(jobs[0].id, "bad record")])
+        self.assertEqual(self.queue.requeue(), 3)
+        self.assertEqual(self.queue.requeue(failed=True), 1)
+        self.assertEqual(self.queue.depth()["queued"], 4)
+
+class TestWorkerService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.tmpdir.name, "jobs.sqlite")
+        self.output_dir = os.path.join(self.tmpdir.name, "results")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_run_worker_writes_results_and_failures(self):
+        """A worker analyzes its shard like run_business_analysis and fails bad records individually"""
+        records = _records(12)
+        records[3]["daily_cost"] = "n/a"
+        with JobQueue(self.queue_path) as queue:
+            queue.enqueue_many(records)
+        os.makedirs(self.output_dir)
+        output = result_path(self.output_dir, 0)
+        self.assertEqual(run_worker(self.queue_path, 0, 1, output, batch_size=5, idle_exit=True), 12)
+
+        results = {row["job_id"]: row for row in read_results(output)}
+        self.assertEqual(len(results), 11)
+        expected = run_business_analysis(dict(records[0]), save_to_file=False)
+        self.assertEqual(results[1]["result"]["alerts"], expected["alerts"])
+        self.assertEqual(results[1]["entity_id"], "store-0")
+        with JobQueue(self.queue_path) as queue:
+            self.assertEqual(queue.depth()["failed"], 1)
+
+    def test_entity_ids_keep_their_type(self):
+        """Integer and string entity ids come back from the queue and into the results unchanged"""
+        with JobQueue(self.queue_path) as queue:
+            queue.enqueue(dict(SAMPLE_RECORD, entity_id=42))
+            queue.enqueue(dict(SAMPLE_RECORD), entity_id="42")
+            queue.enqueue(dict(SAMPLE_RECORD))
+            self.assertEqual([job.entity_id for job in queue.claim(0, 1, 10)], [42, "42", None])
+            queue.requeue()
+        os.makedirs(self.output_dir)
+        output = result_path(self.output_dir, 0)
+        run_worker(self.queue_path, 0, 1, output, idle_exit=True, profile="minimal")
+        self.assertEqual([row["entity_id"] for row in read_results(output)], [42, "42", None])
+
+    def test_service_shards_entities_across_processes(self):
+        """Every job is written once, each entity by a single worker in enqueue order"""
+        with JobQueue(self.queue_path) as queue:
+            queue.enqueue_many(_records(60, entities=6))
+        with WorkerService(self.queue_path, self.output_dir, workers=2, batch_size=8) as service:
+            self.assertTrue(service.wait_idle(timeout=60))
+            stats = service.stats()
+        self.assertEqual(stats["done"], 60)
+        self.assertEqual(stats["workers"], 2)
+
+        writers = collections.defaultdict(set)
+        order = collections.defaultdict(list)
+        for shard, path in enumerate(service.result_paths()):
+            for row in read_results(path):
+                writers[row["entity_id"]].add(shard)
+                order[row["entity_id"]].append(row["job_id"])
+        self.assertEqual(sum(len(jobs) for jobs in order.values()), 60)
+        self.assertTrue(all(len(shards) == 1 for shards in writers.values()))
+        self.assertTrue(all(jobs == sorted(jobs) for jobs in order.values()))
+
+    def test_cli_enqueue_and_drain(self):
+        """`enqueue` fills the queue and `worker --drain` exits once it is empty"""
+        input_path = os.path.join(self.tmpdir.name, "daily.jsonl")
+        with open(input_path, "wb") as f:
+            for record in _records(9):
+                f.write(orjson.dumps(record) + b"\n")
+        self.assertEqual(main(["enqueue", input_path, "--queue", self.queue_path, "-q"]), 0)
+        self.assertEqual(main(["worker", "--queue", self.queue_path, "--output-dir", self.output_dir,
+                               "--workers", "1", "--drain", "--profile", "minimal", "-q"]), 0)
+        rows = list(read_results(result_path(self.output_dir, 0)))
+        self.assertEqual(len(rows), 9)
+        self.assertNotIn("input_data", rows[0]["result"])
+
+if __name__ == "__main__":
+    unittest.main()
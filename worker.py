@@ -0,0 +1,360 @@
+from typing import Dict, Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+import hashlib
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+import numpy as np
+import orjson
+from core import OUTPUT_PROFILES
+from persistence import RESULT_FORMATS, ResultsLog
+
+# Job states
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    entity_id TEXT,  -- JSON-encoded, so integer ids keep their type
+    bucket INTEGER NOT NULL,
+    payload BLOB,
+    status TEXT NOT NULL DEFAULT 'queued',
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_by_finish ON jobs (finished_at) WHERE finished_at IS NOT NULL;
+"""
+
+class Job(NamedTuple):
+    id: int
+    entity_id: Any
+    record: Dict[str, Any]
+    enqueued_at: float
+
+def _encode_entity(entity_id: Any) -> Optional[str]:
+    """Entity ids are stored as JSON text, so 42 and "42" come back as they went in"""
+    return None if entity_id is None else orjson.dumps(entity_id).decode("utf-8")
+
+def entity_bucket(entity_id: Any) -> int:
+    """Stable 31-bit hash of an entity id; jobs without one are spread at random"""
+    if entity_id is None:
+        return random.getrandbits(31)
+    # blake2b rather than crc32: crc32's low bits are linear in the input, so ids like
+    # "store-1".."store-4" can all land on the same shard
+    digest = hashlib.blake2b(str(entity_id).encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") & 0x7FFFFFFF
+
+def shard_of(entity_id: Any, shards: int) -> int:
+    """Worker shard that processes every job of an entity when the service runs `shards` workers"""
+    return entity_bucket(entity_id) % shards
+
+class JobQueue:
+    """Local job queue in a SQLite file, shared by producers and worker processes
+
+    Each job stores a stable hash of its entity id, and worker k of N claims only the
+    jobs whose hash is k modulo N. An entity's jobs therefore always go to the same
+    worker, in enqueue order, while producers never need to know how many workers run.
+    Jobs are claimed and completed in batches, one transaction each.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def enqueue(self, record: Dict[str, Any], entity_id: Any = None) -> int:
+        """Add one record (keyed by `entity_id`, else its own entity_id field) and return its job id"""
+        entity_id = entity_id if entity_id is not None else record.get("entity_id")
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (entity_id, bucket, payload, enqueued_at) VALUES (?, ?, ?, ?)",
+                (_encode_entity(entity_id), entity_bucket(entity_id), orjson.dumps(record), time.time()))
+        return cursor.lastrowid
+
+    def enqueue_many(self, records: Iterable[Dict[str, Any]], entity_field: str = "entity_id") -> int:
+        """Add many records in one transaction and return how many were queued"""
+        now = time.time()
+        rows = ((_encode_entity(record.get(entity_field)), entity_bucket(record.get(entity_field)),
+                 orjson.dumps(record), now) for record in records)
+        with self._conn:
+            cursor = self._conn.executemany(
+                "INSERT INTO jobs (entity_id, bucket, payload, enqueued_at) VALUES (?, ?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def claim(self, shard: int, shards: int, limit: int) -> List[Job]:
+        """Mark up to `limit` of a shard's oldest queued jobs as running and return them in order"""
+        with self._conn:
+            rows = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id IN ("
+                "SELECT id FROM jobs WHERE status = 'queued' AND bucket % ? = ? ORDER BY id LIMIT ?) "
+                "RETURNING id, entity_id, payload, enqueued_at",
+                (time.time(), shards, shard, limit)).fetchall()
+        # RETURNING does not guarantee an order
+        rows.sort()
+        return [Job(job_id, None if entity_id is None else orjson.loads(entity_id), orjson.loads(payload), enqueued_at)
+                for job_id, entity_id, payload, enqueued_at in rows]
+
+    def complete(self, done: List[int], failed: List[Tuple[int, str]] = ()) -> None:
+        """Record a claimed batch: finished job ids, and (job id, error) for the failed ones
+
+        Finished jobs drop their payload, failed ones keep it so they can be retried.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.executemany("UPDATE jobs SET status = 'done', payload = NULL, finished_at = ? WHERE id = ?",
+                                   [(now, job_id) for job_id in done])
+            self._conn.executemany("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                                   [(error, now, job_id) for job_id, error in failed])
+
+    def requeue(self, shard: Optional[int] = None, shards: int = 1, failed: bool = False) -> int:
+        """Put running jobs (e.g. of a dead worker) back in the queue, and failed ones with `failed`"""
+        statuses = (RUNNING, FAILED) if failed else (RUNNING,)
+        query = (f"UPDATE jobs SET status = 'queued', started_at = NULL, finished_at = NULL, error = NULL "
+                 f"WHERE status IN ({', '.join('?' * len(statuses))})")
+        params: Tuple[Any, ...] = statuses
+        if shard is not None:
+            query += " AND bucket % ? = ?"
+            params += (shards, shard)
+        with self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that completed more than `older_than` seconds ago"""
+        with self._conn:
+            return self._conn.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < ?",
+                                      (time.time() - older_than,)).rowcount
+
+    def depth(self, shards: Optional[int] = None) -> Dict[str, Any]:
+        """Job counts per status, plus queued jobs per shard when `shards` is given"""
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        if shards:
+            per_shard = dict(self._conn.execute(
+                "SELECT bucket % ?, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY 1", (shards,)).fetchall())
+            counts["queued_by_shard"] = [per_shard.get(shard, 0) for shard in range(shards)]
+        return counts
+
+    def stats(self, window: float = 60.0, shards: Optional[int] = None) -> Dict[str, Any]:
+        """Queue depth, throughput and latency of the jobs finished in the last `window` seconds
+
+        Latency is measured from enqueue to completion (queue wait included); processing
+        time is from claim to completion, which covers a whole claimed batch.
+        """
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT finished_at - enqueued_at, finished_at - started_at, started_at FROM jobs "
+            "WHERE status = 'done' AND finished_at >= ?", (now - window,)).fetchall()
+        stats = self.depth(shards)
+        stats["window_seconds"] = window
+        stats["recent_done"] = len(rows)
+        if not rows:
+            stats.update(jobs_per_second=0.0, latency_ms=None, processing_ms=None)
+            return stats
+        latency, processing, started = (np.array(column, dtype=np.float64) for column in zip(*rows))
+        # Over a fresh service, rate is measured from the first claim rather than the full window
+        span = now - max(now - window, float(started.min()))
+        stats["jobs_per_second"] = len(rows) / span if span > 0 else 0.0
+        stats["latency_ms"] = _percentiles(latency)
+        stats["processing_ms"] = _percentiles(processing)
+        return stats
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+def _percentiles(seconds: np.ndarray) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(seconds.max() * 1000)}
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """One-line summary of JobQueue.stats for the console"""
+    line = (f"📥 {stats[QUEUED]} queued, {stats[RUNNING]} running | ✅ {stats[DONE]} done, "
+            f"{stats[FAILED]} failed | {stats['jobs_per_second']:.0f} jobs/s")
+    latency = stats["latency_ms"]
+    if latency:
+        line += f" | latency p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms"
+    return line
+
+def result_path(output_dir: str, shard: int, fmt: str = "jsonl") -> str:
+    """Results log written by one worker shard"""
+    return os.path.join(output_dir, f"results-{shard:03d}.{fmt}")
+
+def run_worker(queue_path: str, shard: int, shards: int, output_path: str, fmt: str = "jsonl",
+               batch_size: int = 256, poll_interval: float = 0.05, profile: str = "full",
+               stop: Optional[Any] = None, idle_exit: bool = False) -> int:
+    """Process one shard of the queue until `stop` is set (or the shard is empty, with `idle_exit`)
+
+    The compiled graph is built once when the worker starts. Each claimed batch is analyzed,
+    appended to the shard's results log as one block, flushed, and only then marked done,
+    so a crash can repeat a batch (results carry the job id) but never lose one.
+    Returns the number of jobs processed.
+    """
+    from agent import get_business_agent, initial_state
+
+    agent = get_business_agent(profile=profile)
+    processed = 0
+    with JobQueue(queue_path) as queue, ResultsLog(output_path, fmt, buffer_records=batch_size) as sink:
+        while stop is None or not stop.is_set():
+            jobs = queue.claim(shard, shards, batch_size)
+            if not jobs:
+                if idle_exit:
+                    break
+                if stop is not None:
+                    stop.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+                continue
+
+            done, failed = [], []
+            for job in jobs:
+                try:
+                    output = agent.invoke(initial_state(job.record))["output"]
+                except Exception as e:
+                    # A bad record fails its own job, not the worker
+                    failed.append((job.id, f"{type(e).__name__}: {e}"))
+                    continue
+                sink.write({"job_id": job.id, "entity_id": job.entity_id, "result": output})
+                done.append(job.id)
+            sink.flush()
+            queue.complete(done, failed)
+            processed += len(jobs)
+    return processed
+
+class WorkerService:
+    """Long-lived analysis service: N worker processes draining a JobQueue
+
+    Worker k holds a warm compiled graph, processes the entities of shard k in enqueue
+    order, and writes results to its own log in `output_dir` (results-00k.jsonl), so
+    workers never contend on an output file. Dead workers are restarted by `supervise`,
+    after their unfinished jobs are put back in the queue.
+    """
+
+    def __init__(self, queue_path: str, output_dir: str, workers: int = 2, batch_size: int = 256,
+                 poll_interval: float = 0.05, profile: str = "full", fmt: str = "jsonl"):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {profile} (expected one of {OUTPUT_PROFILES})")
+        if fmt not in RESULT_FORMATS:
+            raise ValueError(f"Unsupported results format: {fmt} (expected one of {RESULT_FORMATS})")
+        self.queue_path = queue_path
+        self.output_dir = output_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.profile = profile
+        self.format = fmt
+        self.queue = JobQueue(queue_path)
+        self._stop = multiprocessing.Event()
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.restarts = 0
+
+    def result_paths(self) -> List[str]:
+        return [result_path(self.output_dir, shard, self.format) for shard in range(self.workers)]
+
+    def _spawn(self, shard: int) -> None:
+        process = multiprocessing.Process(
+            target=run_worker, name=f"analysis-worker-{shard}",
+            args=(self.queue_path, shard, self.workers, result_path(self.output_dir, shard, self.format),
+                  self.format, self.batch_size, self.poll_interval, self.profile, self._stop),
+            daemon=True)
+        process.start()
+        self._processes[shard] = process
+
+    def start(self) -> "WorkerService":
+        """Requeue jobs left running by a previous run and start the workers"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.queue.requeue()
+        self._stop.clear()
+        for shard in range(self.workers):
+            self._spawn(shard)
+        return self
+
+    def supervise(self) -> int:
+        """Restart dead workers (after requeueing their shard's running jobs); returns how many"""
+        restarted = 0
+        for shard, process in enumerate(self._processes):
+            if process is not None and not process.is_alive() and not self._stop.is_set():
+                self.queue.requeue(shard, self.workers)
+                self._spawn(shard)
+                restarted += 1
+        self.restarts += restarted
+        return restarted
+
+    def alive(self) -> int:
+        """Number of running worker processes"""
+        return sum(1 for process in self._processes if process is not None and process.is_alive())
+
+    def idle(self) -> bool:
+        """Whether no job is queued or running"""
+        depth = self.queue.depth()
+        return depth[QUEUED] == 0 and depth[RUNNING] == 0
+
+    def wait_idle(self, timeout: Optional[float] = None, interval: float = 0.05) -> bool:
+        """Block until the queue is drained (True) or `timeout` seconds pass (False)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.idle():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.supervise()
+            time.sleep(interval)
+        return True
+
+    def stats(self, window: float = 60.0) -> Dict[str, Any]:
+        """Queue depth (also per shard), throughput, latency and worker liveness"""
+        stats = self.queue.stats(window, self.workers)
+        stats.update(workers=self.workers, workers_alive=self.alive(), restarts=self.restarts)
+        return stats
+
+    def run_forever(self, stats_interval: float = 10.0, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    drain: bool = False, retain_seconds: Optional[float] = 3600.0) -> None:
+        """Supervise the workers and report stats every `stats_interval` seconds
+
+        Runs until interrupted, or until the queue is empty with `drain`. Finished jobs
+        older than `retain_seconds` are purged so the queue file does not grow forever.
+        """
+        last_report = time.monotonic()
+        while True:
+            self.supervise()
+            if drain and self.idle():
+                break
+            now = time.monotonic()
+            if now - last_report >= stats_interval:
+                if retain_seconds is not None:
+                    self.queue.purge(retain_seconds)
+                if on_stats is not None:
+                    on_stats(self.stats())
+                last_report = now
+            time.sleep(min(stats_interval, 0.1))
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let each worker finish its current batch and exit; stragglers are terminated"""
+        self._stop.set()
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+    def close(self) -> None:
+        self.stop()
+        self.queue.close()
+
+    def __enter__(self) -> "WorkerService":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()